@@ -1,7 +1,7 @@
 """
 Pydantic models for Hunyuan3D API server.
 """
-from typing import Optional, Literal
+from typing import Any, Dict, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -65,7 +65,14 @@ class GenerationResponse(BaseModel):
 
 class StatusResponse(BaseModel):
     """Response model for status endpoint"""
-    status: str = Field(..., description="Status of the generation task")
+    uid: Optional[str] = Field(None, description="Unique identifier for the generation task")
+    status: str = Field(..., description="Status of the generation task (pending, processing, completed, error)")
+    download_url: Optional[str] = Field(
+        None,
+        description="Presigned download URL of the generated model (only when status is 'completed')"
+    )
+    textured: Optional[bool] = Field(None, description="Whether the model was textured")
+    seed: Optional[int] = Field(None, description="Random seed used for generation")
     model_base64: Optional[str] = Field(
         None, 
         description="Base64 encoded generated model file (only when status is 'completed')"
@@ -74,6 +81,11 @@ class StatusResponse(BaseModel):
         None,
         description="Error message (only when status is 'error')"
     )
+    artifacts: Optional[Dict[str, Dict[str, Any]]] = Field(
+        None,
+        description="Intermediate outputs published while the job runs, by name (e.g. 'initial_mesh' for the "
+                    "untextured preview, 'textured_mesh'), each with a presigned 'url'"
+    )
 
 
 class HealthResponse(BaseModel):
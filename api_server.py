@@ -24,86 +24,175 @@ except Exception as e:
     print(f"Warning: Failed to apply torchvision fix: {e}")
 
 from model_worker import ModelWorker, load_image_from_base64
+from hy3dshape.utils import tracer, serve_metrics
+from job_queue import JobQueue, JobStore, JobStatus
+from multipart_upload import MultipartUploader
+from artifact_publisher import ArtifactPublisher
+from constants import (
+    API_TITLE, API_DESCRIPTION, API_VERSION, API_CONTACT, API_LICENSE_INFO, API_TAGS_METADATA,
+    SERVER_ERROR_MSG,
+)
 
+JOB_DB_PATH = os.getenv('HY3DGEN_JOB_DB', '/tmp/hy3dgen_jobs.sqlite3')
+# Seconds a synchronous request waits for its job before giving up
+JOB_RESULT_TIMEOUT = float(os.getenv('HY3DGEN_JOB_TIMEOUT', '1800'))
+# Directory of the model warm-start cache; empty disables it
+WARM_START_DIR = os.getenv('HY3DGEN_WARM_START_DIR', '')
+# Port of the standalone Prometheus /metrics endpoint in Runpod mode; 0 disables it
+METRICS_PORT = int(os.getenv('HY3DGEN_METRICS_PORT', '0'))
+# Chrome trace JSON file rewritten after every sampled job; empty disables it
+TRACE_FILE = os.getenv('HY3DGEN_TRACE_FILE', '')
+# Uploads intermediate outputs in the background; set by init_job_queue
+artifact_publisher = None
+# Seconds a job waits for each of its background artifact uploads before giving up on it
+ARTIFACT_TIMEOUT = float(os.getenv('HY3DGEN_ARTIFACT_TIMEOUT', '300'))
+# Seconds the presigned download URLs stay valid
+PRESIGNED_URL_EXPIRES = int(os.getenv('HY3DGEN_PRESIGNED_URL_EXPIRES', '3600'))
+# Multipart upload settings: part size (MB, at least 5), parts uploaded in parallel, retries per part
+UPLOAD_PART_SIZE_MB = int(os.getenv('HY3DGEN_UPLOAD_PART_SIZE_MB', '8'))
+UPLOAD_CONCURRENCY = int(os.getenv('HY3DGEN_UPLOAD_CONCURRENCY', '8'))
+UPLOAD_RETRIES = int(os.getenv('HY3DGEN_UPLOAD_RETRIES', '3'))
 
-def upload_to_r2(file_path, object_name):
+
+def presigned_url(object_name):
+    """Return a presigned download URL of an R2 object."""
+    return s3.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": bucket_name, "Key": object_name},
+        ExpiresIn=PRESIGNED_URL_EXPIRES,
+    )
+
+
+def upload_to_r2(source, object_name):
     """
     Upload a file to Cloudflare R2 bucket and return a presigned download URL.
+
+    Args:
+        source: File path, bytes, binary file object or producer of byte chunks
+        object_name (str): Object key
     """
     # Check if file exists before attempting upload
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Generated file not found: {file_path}")
-        
-    with open(file_path, 'rb') as file:
-        s3.upload_fileobj(
-            Fileobj=file,
-            Bucket=bucket_name,
-            Key=object_name,
-            ExtraArgs={"ContentType": "model/gltf-binary"},
-        )
-    
-    # Return a one-hour presigned URL
-    url = s3.generate_presigned_url(
-        ClientMethod="get_object",
-        Params={"Bucket": bucket_name, "Key": object_name},
-        ExpiresIn=3600,
-    )
-    return url
+    if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+        raise FileNotFoundError(f"Generated file not found: {source}")
 
+    stats = uploader.upload(source, object_name, content_type="model/gltf-binary")
+    span = tracer.current_span()
+    if span is not None:
+        span.set(bytes=stats['bytes'], parts=stats['parts'], retries=stats['retries'],
+                 throughput_mb_s=round(stats['throughput_mb_s'], 1))
+
+    return presigned_url(object_name)
 
-def worker_fn(input_data):
-    """Main Runpod serverless function for Hunyuan3D 2.1"""
-    try:
-        print(f"Worker input: {input_data}")
-        
-        # Get parameters with defaults (matching api_models.py structure exactly)
-        image_base64 = input_data.get('image')  # str, required
-        remove_background = bool(input_data.get('remove_background', True))  # bool, default True
-        texture = bool(input_data.get('texture', False))  # bool, default False (matches api_models.py!)
-        seed = int(input_data.get('seed', 1234))  # int, default 1234
-        octree_resolution = int(input_data.get('octree_resolution', 256))  # int, default 256
-        num_inference_steps = int(input_data.get('num_inference_steps', 5))  # int, default 5
-        guidance_scale = float(input_data.get('guidance_scale', 5.0))  # float, default 5.0
-        face_count = int(input_data.get('face_count', 40000))  # int, default 40000
-        
-        if not image_base64:
-            return {"error": "No image provided"}
 
-        # Create parameters dict matching model_worker expectations
-        params = {
-            'image': image_base64,
-            'remove_background': remove_background,
-            'texture': texture,
-            'seed': seed,
-            'octree_resolution': octree_resolution,
-            'num_inference_steps': num_inference_steps,
-            'guidance_scale': guidance_scale,
-            'face_count': face_count
-        }
-        
-        # Generate 3D model using ModelWorker
-        uid = uuid.uuid4()
+def parse_params(input_data):
+    """
+    Extract generation parameters from a request payload.
+
+    Args:
+        input_data (dict): Request payload
+
+    Returns:
+        dict: Parameters matching ModelWorker.generate expectations
+    """
+    # Get parameters with defaults (matching api_models.py structure exactly)
+    return {
+        'image': input_data.get('image'),  # str, required
+        'remove_background': bool(input_data.get('remove_background', True)),  # bool, default True
+        'texture': bool(input_data.get('texture', False)),  # bool, default False (matches api_models.py!)
+        'seed': int(input_data.get('seed', 1234)),  # int, default 1234
+        'octree_resolution': int(input_data.get('octree_resolution', 256)),  # int, default 256
+        'num_inference_steps': int(input_data.get('num_inference_steps', 5)),  # int, default 5
+        'guidance_scale': float(input_data.get('guidance_scale', 5.0)),  # float, default 5.0
+        'face_count': int(input_data.get('face_count', 40000)),  # int, default 40000
+    }
+
+
+def process_job(uid, params):
+    """Run one queued generation job and upload the result to R2."""
+    with tracer.span('job', uid=uid) as span:
+        # Generate 3D model using ModelWorker; intermediate outputs are published while it runs
         file_path, generation_uid = worker.generate(uid, params)
-        
+
         print(f"Generated file: {file_path}")
-        
-        # Upload to R2
-        object_name = f"hunyuan3d-21-{uuid.uuid4().hex[:8]}.glb"
-        download_url = upload_to_r2(file_path, object_name)
-        
-        print(f"File uploaded to R2: {download_url}")
-        
+
+        # The final mesh was usually already published by the worker while generate returned
+        published = artifact_publisher.lookup(uid, file_path) if artifact_publisher is not None else None
+
+        with tracer.span('upload_r2'):
+            download_url = None
+            if published is not None:
+                try:
+                    download_url = published.result(ARTIFACT_TIMEOUT)['url']
+                except Exception as e:
+                    print(f"Warning: Published artifact unavailable ({e!r}), uploading again")
+            if download_url is None:
+                object_name = f"hunyuan3d-21-{uuid.uuid4().hex[:8]}.glb"
+                download_url = upload_to_r2(file_path, object_name)
+
         # Clean up local file
         if os.path.exists(file_path):
             os.remove(file_path)
-        
-        return {
-            "download_url": download_url,
-            "textured": texture,
-            "seed": seed,
-            "uid": str(generation_uid)
-        }
-        
+    if TRACE_FILE and span.sampled:
+        tracer.export_chrome_trace(TRACE_FILE)
+
+    print(f"File uploaded to R2: {download_url}")
+
+    result = {
+        "download_url": download_url,
+        "textured": params['texture'],
+        "seed": params['seed'],
+        "uid": str(generation_uid)
+    }
+    if artifact_publisher is not None:
+        result["artifacts"] = artifact_publisher.artifacts(uid, timeout=ARTIFACT_TIMEOUT)
+        artifact_publisher.forget(uid)
+    return result
+
+
+def job_response(job):
+    """Convert a job record into the payload returned to clients."""
+    if job is None:
+        return {"status": "not_found", "message": "Unknown uid"}
+    response = {"uid": job["uid"], "status": job["status"]}
+    if job.get("artifacts"):
+        # Intermediate outputs are available before the job completes
+        response["artifacts"] = job["artifacts"]
+    if job["status"] == JobStatus.COMPLETED:
+        response.update(job["result"] or {})
+    elif job["status"] == JobStatus.ERROR:
+        response["message"] = job["message"]
+    return response
+
+
+def worker_fn(input_data):
+    """
+    Main Runpod serverless function for Hunyuan3D 2.1
+
+    The optional 'action' field selects the operation:
+        - 'generate' (default): enqueue the job and wait for its result
+        - 'send': enqueue the job and return its uid immediately
+        - 'status': return the state of the job given by 'uid'
+    """
+    try:
+        print(f"Worker input: {input_data}")
+
+        action = input_data.get('action', 'generate')
+        if action == 'status':
+            return job_response(job_queue.status(input_data.get('uid', '')))
+
+        params = parse_params(input_data)
+        if not params['image']:
+            return {"error": "No image provided"}
+
+        uid = job_queue.enqueue(params, priority=int(input_data.get('priority', 0)))
+        if action == 'send':
+            return {"uid": uid}
+
+        job = job_queue.result(uid, timeout=JOB_RESULT_TIMEOUT)
+        if job["status"] == JobStatus.ERROR:
+            return {"error": f"Generation failed: {job['message']}", "uid": uid}
+        return job["result"]
+
     except Exception as e:
         error_msg = f"Generation failed: {str(e)}"
         print(f"ERROR: {error_msg}")
@@ -112,6 +201,63 @@ def worker_fn(input_data):
         return {"error": error_msg}
 
 
+def create_app():
+    """
+    Build the FastAPI application exposing /generate, /send, /status/{uid}, /health,
+    /metrics (Prometheus text) and /trace (Chrome trace JSON).
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse
+    from fastapi.concurrency import run_in_threadpool
+    from api_models import GenerationRequest, GenerationResponse, StatusResponse, HealthResponse
+
+    app = FastAPI(
+        title=API_TITLE,
+        description=API_DESCRIPTION,
+        version=API_VERSION,
+        contact=API_CONTACT,
+        license_info=API_LICENSE_INFO,
+        openapi_tags=API_TAGS_METADATA,
+    )
+
+    @app.post("/generate", tags=["generation"])
+    async def generate(request: GenerationRequest):
+        uid = job_queue.enqueue(parse_params(request.model_dump()))
+        try:
+            job = await run_in_threadpool(job_queue.result, uid, JOB_RESULT_TIMEOUT)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail=SERVER_ERROR_MSG)
+        if job["status"] == JobStatus.ERROR:
+            raise HTTPException(status_code=500, detail=job["message"])
+        return job_response(job)
+
+    @app.post("/send", response_model=GenerationResponse, tags=["generation"])
+    async def send(request: GenerationRequest):
+        uid = job_queue.enqueue(parse_params(request.model_dump()))
+        return GenerationResponse(uid=uid)
+
+    @app.get("/status/{uid}", response_model=StatusResponse, tags=["status"])
+    async def status(uid: str):
+        job = job_queue.status(uid)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown uid {uid}")
+        return StatusResponse(**job_response(job))
+
+    @app.get("/health", response_model=HealthResponse, tags=["status"])
+    async def health():
+        return HealthResponse(status="healthy", worker_id=worker.worker_id)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        return tracer.prometheus_text()
+
+    @app.get("/trace", include_in_schema=False)
+    async def trace():
+        return tracer.chrome_trace()
+
+    return app
+
+
 def init_models():
     """Initialize Hunyuan3D 2.1 models using ModelWorker"""
     global worker
@@ -126,12 +272,34 @@ def init_models():
         low_vram_mode=False,
         worker_id=None,
         model_semaphore=None,
-        save_dir='/tmp'
+        save_dir='/tmp',
+        warm_start_dir=WARM_START_DIR,
     )
     
     print("All models initialized successfully!")
 
 
+def init_job_queue():
+    """Start the job queue that serialises generation requests onto the worker"""
+    global job_queue, artifact_publisher
+
+    num_workers = 1
+    max_batch_size = int(os.getenv('HY3DGEN_MAX_BATCH_SIZE', '1'))
+    if worker.low_vram_mode:
+        if max_batch_size > 1:
+            # A single job is in flight, so a batching window would only add latency
+            print("Warning: HY3DGEN_MAX_BATCH_SIZE is ignored in low VRAM mode")
+    else:
+        if max_batch_size > 1:
+            worker.enable_batching(max_batch_size, float(os.getenv('HY3DGEN_BATCH_WINDOW', '0.05')))
+        # One in-flight job per stage lets consecutive requests overlap across stages,
+        # plus enough for a full batch to be waiting on the shape batcher
+        num_workers = len(worker.start_scheduler().stages) + max(max_batch_size, 1) - 1
+    job_queue = JobQueue(process_job, JobStore(JOB_DB_PATH), num_workers=num_workers).start()
+    worker.job_queue = job_queue
+    worker.artifact_publisher = artifact_publisher = ArtifactPublisher(uploader, presigned_url, store=job_queue.store)
+
+
 if __name__ == "__main__":
     # Initialize R2 credentials
     account_id = os.getenv('CF_R2_ACCOUNT_ID', '')
@@ -151,12 +319,28 @@ if __name__ == "__main__":
         endpoint_url=f'https://{account_id}.r2.cloudflarestorage.com',
         aws_access_key_id=access_key_id,
         aws_secret_access_key=secret_access_key,
-        config=Config(signature_version='s3v4')
+        config=Config(signature_version='s3v4', max_pool_connections=max(10, UPLOAD_CONCURRENCY))
+    )
+    uploader = MultipartUploader(
+        s3,
+        bucket_name,
+        part_size=UPLOAD_PART_SIZE_MB * 2 ** 20,
+        max_concurrency=UPLOAD_CONCURRENCY,
+        max_retries=UPLOAD_RETRIES,
     )
     
     # Initialize models
     init_models()
-    
-    # Start Runpod serverless worker
-    print("Starting Hunyuan3D 2.1 Runpod worker...")
-    runpod.serverless.start({"handler": worker_fn})
\ No newline at end of file
+    init_job_queue()
+
+    if os.getenv('HY3DGEN_API_MODE', 'runpod') == 'http':
+        # Serve the REST endpoints described in constants.API_DESCRIPTION
+        import uvicorn
+        print("Starting Hunyuan3D 2.1 HTTP server...")
+        uvicorn.run(create_app(), host='0.0.0.0', port=int(os.getenv('PORT', '8080')))
+    else:
+        if METRICS_PORT:
+            serve_metrics(METRICS_PORT)
+        # Start Runpod serverless worker
+        print("Starting Hunyuan3D 2.1 Runpod worker...")
+        runpod.serverless.start({"handler": worker_fn})
\ No newline at end of file
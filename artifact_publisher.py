@@ -0,0 +1,141 @@
+"""
+Background publishing of intermediate generation artifacts for Hunyuan3D API server.
+
+Artifacts (the untextured preview mesh, the textured mesh) are uploaded on
+background threads as soon as a generation stage produces them, and their
+presigned URLs are recorded in the job store so that clients polling the job
+status can fetch them while later stages are still running.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from hy3dshape.utils import logger
+
+
+class ArtifactPublisher:
+    """
+    Uploads artifacts on background threads and records them in a JobStore.
+
+    Example:
+        ```python
+        publisher = ArtifactPublisher(uploader, presigned_url, store=job_queue.store)
+        publisher.publish(uid, 'initial_mesh', glb_bytes, local_path=initial_save_path)
+        ...
+        future = publisher.lookup(uid, final_save_path)
+        download_url = future.result()['url']
+        ```
+    """
+
+    def __init__(self, uploader, url_fn, store=None, max_workers=2, key_prefix='hunyuan3d-21'):
+        """
+        Args:
+            uploader (MultipartUploader): Engine performing the uploads
+            url_fn (callable): url_fn(object_name) -> presigned download URL
+            store (JobStore): Store receiving the artifacts of each job (optional)
+            max_workers (int): Artifacts uploaded at the same time
+            key_prefix (str): Prefix of the object names
+        """
+        self.uploader = uploader
+        self.url_fn = url_fn
+        self.store = store
+        self.key_prefix = key_prefix
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='artifact')
+        self._lock = threading.Lock()
+        # uid -> name -> (local_path, future)
+        self._jobs = {}
+
+    def publish(self, uid, name, source, content_type='model/gltf-binary', local_path=None, extension='.glb'):
+        """
+        Start uploading an artifact in the background.
+
+        Args:
+            uid (str): Job identifier
+            name (str): Artifact name, e.g. 'initial_mesh'
+            source: bytes, file path, binary file object or producer of byte chunks. Pass bytes when
+                the file may be moved or deleted before the upload starts.
+            content_type (str): Content-Type of the object
+            local_path (str): Local file the artifact was produced as, for lookup
+            extension (str): Extension of the object name
+
+        Returns:
+            Future: Resolves to the artifact record (name, url, object_name, bytes, seconds, created_at)
+        """
+        object_name = f"{self.key_prefix}-{uuid.uuid4().hex[:8]}-{name}{extension}"
+        future = self._executor.submit(self._upload, str(uid), name, source, content_type, object_name)
+        with self._lock:
+            self._jobs.setdefault(str(uid), {})[name] = (local_path, future)
+        return future
+
+    def _upload(self, uid, name, source, content_type, object_name):
+        try:
+            stats = self.uploader.upload(source, object_name, content_type=content_type)
+            artifact = {
+                'name': name,
+                'url': self.url_fn(object_name),
+                'object_name': object_name,
+                'bytes': stats['bytes'],
+                'seconds': round(stats['seconds'], 3),
+                'created_at': time.time(),
+            }
+        except Exception as e:
+            logger.warning(f"Publishing {name} of job {uid} failed: {e}")
+            raise
+        if self.store is not None:
+            try:
+                self.store.set_artifact(uid, name, artifact)
+            except KeyError:
+                # Jobs run outside the queue (e.g. direct ModelWorker.generate calls) have no record
+                pass
+        logger.info(f"Published {name} of job {uid} as {object_name}")
+        return artifact
+
+    def lookup(self, uid, local_path):
+        """
+        Find the artifact published from a local file.
+
+        Returns:
+            Future: The upload of that file, or None if it was not published
+        """
+        if local_path is None:
+            return None
+        with self._lock:
+            artifacts = dict(self._jobs.get(str(uid), {}))
+        for path, future in artifacts.values():
+            if path is not None and os.path.abspath(path) == os.path.abspath(local_path):
+                return future
+        return None
+
+    def artifacts(self, uid, timeout=None):
+        """
+        Wait for the uploads of a job and return the artifacts that succeeded.
+
+        Args:
+            uid (str): Job identifier
+            timeout (float): Seconds to wait for the pending uploads in total, forever if None.
+                Uploads still running afterwards are left out.
+
+        Returns:
+            dict: Artifact records by name
+        """
+        with self._lock:
+            artifacts = dict(self._jobs.get(str(uid), {}))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        published = {}
+        for name, (_, future) in artifacts.items():
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                published[name] = future.result(remaining)
+            except Exception:
+                continue
+        return published
+
+    def forget(self, uid):
+        """Drop the bookkeeping of a finished job."""
+        with self._lock:
+            self._jobs.pop(str(uid), None)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
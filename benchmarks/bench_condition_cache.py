@@ -0,0 +1,78 @@
+"""
+CPU micro-benchmark of the HunYuanDiTPlain condition K/V cache.
+
+Runs a small randomly-initialised HunYuanDiTPlain for a few denoising steps with the
+same condition and reports per-step time with and without the cache:
+
+    python benchmarks/bench_condition_cache.py --steps 10 --depth 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dshape'))
+
+from hy3dshape.models.denoisers.hunyuandit import HunYuanDiTPlain
+
+
+def run_steps(model, latents, contexts, steps):
+    timings = []
+    out = None
+    for i in range(steps):
+        t = torch.full((latents.shape[0],), i / steps)
+        start = time.perf_counter()
+        out = model(latents, t, contexts)
+        timings.append(time.perf_counter() - start)
+    return out, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--hidden-size', type=int, default=256)
+    parser.add_argument('--context-dim', type=int, default=1024)
+    parser.add_argument('--text-len', type=int, default=1370)
+    parser.add_argument('--num-latents', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=2, help='2 = one image with classifier-free guidance')
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    model = HunYuanDiTPlain(
+        input_size=args.num_latents,
+        in_channels=64,
+        hidden_size=args.hidden_size,
+        context_dim=args.context_dim,
+        depth=args.depth,
+        num_heads=8,
+        text_len=args.text_len,
+        qk_norm=True,
+        num_moe_layers=2,
+        num_experts=4,
+        moe_top_k=2,
+    ).eval()
+
+    latents = torch.randn(args.batch_size, args.num_latents, 64)
+    contexts = {'main': torch.randn(args.batch_size, args.text_len, args.context_dim)}
+
+    with torch.no_grad():
+        run_steps(model, latents, contexts, 1)  # warm-up
+        reference, plain = run_steps(model, latents, contexts, args.steps)
+        with model.cached_condition():
+            cached_out, cached = run_steps(model, latents, contexts, args.steps)
+
+    torch.testing.assert_close(cached_out, reference)
+    plain_ms = 1000 * sum(plain) / len(plain)
+    # The first cached step fills the cache; report steady state separately.
+    cached_ms = 1000 * sum(cached[1:]) / max(len(cached) - 1, 1)
+    print(f'depth={args.depth} hidden={args.hidden_size} context={args.text_len}x{args.context_dim}')
+    print(f'  without cache: {plain_ms:.2f} ms/step')
+    print(f'  with cache:    {cached_ms:.2f} ms/step (first step {1000 * cached[0]:.2f} ms)')
+    print(f'  speedup:       {plain_ms / cached_ms:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
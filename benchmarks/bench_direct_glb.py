@@ -0,0 +1,120 @@
+"""
+Benchmark of the direct PBR GLB export against the OBJ round trip.
+
+Exports a synthetic textured mesh (what MeshRender.get_mesh and the texture
+getters return after painting: 40k faces, 4096x4096 albedo and metallic-roughness
+maps, downsampled by half on export) the previous way - save_mesh writes OBJ,
+MTL and three JPEGs, create_glb_with_pbr_materials reads them back and
+re-encodes the metallic-roughness map - and with save_glb_mesh, then reports
+the time of both paths and the size of the written files. Both GLBs are loaded
+back with trimesh to check that they hold the same surface:
+
+    python benchmarks/bench_direct_glb.py --faces 40000 --texture-size 4096
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from convert_utils import create_glb_with_pbr_materials
+from DifferentiableRenderer.mesh_utils import save_glb_mesh, save_mesh
+
+
+def painted_mesh(num_faces, texture_size, seed):
+    rng = np.random.default_rng(seed)
+    minor_sections = int((num_faces / 8) ** 0.5)
+    mesh = trimesh.creation.torus(1.0, 0.3, major_sections=num_faces // (2 * minor_sections),
+                                  minor_sections=minor_sections)
+    vtx_uv = np.stack([np.arctan2(mesh.vertices[:, 1], mesh.vertices[:, 0]) / (2 * np.pi) + 0.5,
+                       mesh.vertices[:, 2] / 0.6 + 0.5], axis=1)
+
+    def smooth(channels):
+        low = rng.random((texture_size // 32, texture_size // 32, channels)).astype(np.float32)
+        return cv2.resize(low, (texture_size, texture_size), interpolation=cv2.INTER_CUBIC).clip(0, 1)
+
+    texture = smooth(3)
+    mr = smooth(2)
+    # MeshRender.get_texture_mr repeats each channel three times
+    metallic = np.repeat(mr[:, :, 0:1], 3, axis=2)
+    roughness = np.repeat(mr[:, :, 1:2], 3, axis=2)
+    faces = mesh.faces.astype(np.int32)
+    return mesh.vertices.astype(np.float32), faces, vtx_uv.astype(np.float32), faces, texture, metallic, roughness
+
+
+def downsample(image):
+    return cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2))
+
+
+def obj_round_trip(directory, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic, roughness):
+    # Hunyuan3DPaintPipeline.save_mesh followed by the former ModelWorker.quick_convert_with_obj2gltf
+    obj_path = os.path.join(directory, 'textured_mesh.obj')
+    save_mesh(obj_path, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic=metallic, roughness=roughness)
+    glb_path = os.path.join(directory, 'textured_mesh.glb')
+    textures = {
+        'albedo': obj_path.replace('.obj', '.jpg'),
+        'metallic': obj_path.replace('.obj', '_metallic.jpg'),
+        'roughness': obj_path.replace('.obj', '_roughness.jpg'),
+    }
+    create_glb_with_pbr_materials(obj_path, textures, glb_path)
+    return glb_path
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faces', type=int, default=40000)
+    parser.add_argument('--texture-size', type=int, default=4096)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic, roughness = painted_mesh(
+        args.faces, args.texture_size, args.seed)
+    print(f'{len(pos_idx)} faces, {args.texture_size}x{args.texture_size} textures (exported at half size)')
+
+    with tempfile.TemporaryDirectory() as obj_dir, tempfile.TemporaryDirectory() as glb_dir:
+        def round_trip():
+            maps = [downsample(image) for image in (texture, metallic, roughness)]
+            return obj_round_trip(obj_dir, vtx_pos, pos_idx, vtx_uv, uv_idx, *maps)
+
+        def direct():
+            maps = [downsample(image) for image in (texture, metallic, roughness)]
+            glb_path = os.path.join(glb_dir, 'textured_mesh.glb')
+            save_glb_mesh(glb_path, vtx_pos, pos_idx, vtx_uv, uv_idx, maps[0], metallic=maps[1], roughness=maps[2])
+            return glb_path
+
+        legacy_path, legacy_time = timed(round_trip)
+        direct_path, direct_time = timed(direct)
+        print(f'OBJ round trip  {legacy_time:6.2f} s  {len(os.listdir(obj_dir))} files, '
+              f'{directory_size(obj_dir) / 2 ** 20:6.1f} MB written, GLB {os.path.getsize(legacy_path) / 2 ** 20:6.1f} MB')
+        print(f'direct GLB      {direct_time:6.2f} s  {len(os.listdir(glb_dir))} file,  '
+              f'{directory_size(glb_dir) / 2 ** 20:6.1f} MB written, GLB {os.path.getsize(direct_path) / 2 ** 20:6.1f} MB')
+        print(f'speedup {legacy_time / direct_time:.2f}x')
+
+        legacy_mesh = trimesh.load(legacy_path, force='mesh')
+        direct_mesh = trimesh.load(direct_path, force='mesh')
+        assert len(legacy_mesh.faces) == len(direct_mesh.faces)
+        assert np.allclose(legacy_mesh.bounds, direct_mesh.bounds, atol=1e-5)
+        assert np.isclose(legacy_mesh.area, direct_mesh.area, rtol=1e-5)
+        legacy_uv = np.sort(np.round(legacy_mesh.visual.uv[legacy_mesh.faces].reshape(-1, 2), 5), axis=0)
+        direct_uv = np.sort(np.round(direct_mesh.visual.uv[direct_mesh.faces].reshape(-1, 2), 5), axis=0)
+        assert np.allclose(legacy_uv, direct_uv, atol=2e-5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark of the streaming GLB writer behind create_glb_with_pbr_materials.
+
+Writes a textured 40k-face mesh with albedo, metallic and roughness maps at
+2048x2048 and 4096x4096, once the previous way (trimesh exports temp.glb,
+pygltflib reloads it and embeds the textures as base64 data URIs) and once with
+GLBBuilder (one binary chunk streamed to the file), and reports file size and
+write time. The combined metallic-roughness map is encoded to PNG in both
+paths, which dominates the write time; the streaming writer is also run with a
+faster PNG compression level. The new file is parsed back to check that every
+bufferView is in bounds and that the embedded textures are the original bytes:
+
+    python benchmarks/bench_glb_export.py --sizes 2048 4096
+
+The previous path needs pygltflib; pass --skip-legacy without it.
+"""
+import argparse
+import base64
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+import trimesh
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from convert_utils import combine_metallic_roughness, create_glb_with_pbr_materials
+
+
+def legacy_create_glb(obj_path, textures_dict, output_path):
+    # create_glb_with_pbr_materials before the streaming writer
+    import pygltflib
+
+    mesh = trimesh.load(obj_path)
+    temp_glb = "temp.glb"
+    mesh.export(temp_glb)
+    gltf = pygltflib.GLTF2().load(temp_glb)
+
+    def image_to_data_uri(image_path):
+        with open(image_path, "rb") as f:
+            image_data = f.read()
+        encoded = base64.b64encode(image_data).decode()
+        return f"data:image/png;base64,{encoded}"
+
+    mr_combined_path = "mr_combined.png"
+    combine_metallic_roughness(textures_dict["metallic"], textures_dict["roughness"], mr_combined_path)
+    images = [pygltflib.Image(uri=image_to_data_uri(textures_dict["albedo"])),
+              pygltflib.Image(uri=image_to_data_uri(mr_combined_path))]
+    textures = [pygltflib.Texture(source=0), pygltflib.Texture(source=1)]
+    pbr = pygltflib.PbrMetallicRoughness(baseColorFactor=[1.0, 1.0, 1.0, 1.0], metallicFactor=1.0, roughnessFactor=1.0,
+                                         baseColorTexture=pygltflib.TextureInfo(index=0),
+                                         metallicRoughnessTexture=pygltflib.TextureInfo(index=1))
+    gltf.images = images
+    gltf.textures = textures
+    gltf.materials = [pygltflib.Material(name="PBR_Material", pbrMetallicRoughness=pbr)]
+    for primitive in gltf.meshes[0].primitives:
+        primitive.material = 0
+    gltf.save(output_path)
+
+
+def write_inputs(directory, size, faces, seed):
+    rng = np.random.default_rng(seed)
+    minor_sections = int((faces / 8) ** 0.5)
+    mesh = trimesh.creation.torus(1.0, 0.3, major_sections=faces // (2 * minor_sections), minor_sections=minor_sections)
+    uv = np.stack([np.arctan2(mesh.vertices[:, 1], mesh.vertices[:, 0]) / (2 * np.pi) + 0.5,
+                   mesh.vertices[:, 2] / 0.6 + 0.5], axis=1)
+    mesh.visual = trimesh.visual.TextureVisuals(uv=uv)
+    obj_path = os.path.join(directory, 'textured_mesh.obj')
+    mesh.export(obj_path)
+
+    # Smooth noise compresses like a baked texture rather than like white noise
+    def smooth(channels):
+        low = rng.integers(0, 256, size=(size // 32, size // 32, channels), dtype=np.uint8).squeeze()
+        return Image.fromarray(low).resize((size, size), Image.BICUBIC)
+
+    textures = {
+        'albedo': os.path.join(directory, 'textured_mesh.jpg'),
+        'metallic': os.path.join(directory, 'textured_mesh_metallic.jpg'),
+        'roughness': os.path.join(directory, 'textured_mesh_roughness.jpg'),
+    }
+    smooth(3).save(textures['albedo'], quality=95)
+    smooth(1).save(textures['metallic'], quality=95)
+    smooth(1).save(textures['roughness'], quality=95)
+    return obj_path, textures
+
+
+def check_glb(path, albedo_path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    assert magic == 0x46546C67 and version == 2 and length == len(data)
+    json_length, _ = struct.unpack_from('<II', data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    bin_length, _ = struct.unpack_from('<II', data, 20 + json_length)
+    binary = data[28 + json_length:28 + json_length + bin_length]
+    assert gltf['buffers'][0]['byteLength'] <= len(binary)
+    for view in gltf['bufferViews']:
+        assert view['byteOffset'] % 4 == 0 and view['byteOffset'] + view['byteLength'] <= len(binary)
+    albedo_view = gltf['bufferViews'][gltf['images'][0]['bufferView']]
+    with open(albedo_path, 'rb') as f:
+        assert binary[albedo_view['byteOffset']:albedo_view['byteOffset'] + albedo_view['byteLength']] == f.read()
+    assert gltf['images'][0]['mimeType'] == 'image/jpeg'
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2048, 4096])
+    parser.add_argument('--faces', type=int, default=40000)
+    parser.add_argument('--png-compress-levels', type=int, nargs='+', default=[6, 1])
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            obj_path, textures = write_inputs(tmp, size, args.faces, args.seed)
+            texture_bytes = sum(os.path.getsize(path) for path in textures.values())
+            print(f'{size}x{size} textures ({texture_bytes / 2 ** 20:.1f} MB of JPEG), {args.faces} faces')
+
+            if not args.skip_legacy:
+                legacy_path = os.path.join(tmp, 'legacy.glb')
+                cwd = os.getcwd()
+                os.chdir(tmp)
+                try:
+                    _, legacy_time = timed(lambda: legacy_create_glb(obj_path, textures, legacy_path))
+                finally:
+                    os.chdir(cwd)
+                print(f'  temp.glb + base64  {legacy_time:6.2f} s  {os.path.getsize(legacy_path) / 2 ** 20:7.1f} MB')
+
+            for compress_level in args.png_compress_levels:
+                stream_path = os.path.join(tmp, f'stream_{compress_level}.glb')
+                _, stream_time = timed(lambda: create_glb_with_pbr_materials(
+                    obj_path, textures, stream_path, png_compress_level=compress_level))
+                print(f'  streaming writer   {stream_time:6.2f} s  {os.path.getsize(stream_path) / 2 ** 20:7.1f} MB'
+                      f'  (PNG compress level {compress_level})')
+                check_glb(stream_path, textures['albedo'])
+
+
+if __name__ == '__main__':
+    main()
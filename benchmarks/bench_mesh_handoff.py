@@ -0,0 +1,68 @@
+"""
+Benchmark of the in-memory mesh handoff between pymeshlab, trimesh and MeshRender.
+
+Remeshes a generated mesh of about 500k faces the previous way (pymeshlab saves
+an OBJ, trimesh reloads it, the simplified mesh is exported and loaded again by
+the paint pipeline) and with the in-memory mesh_simplify_trimesh, and reports the time
+of both paths and the I/O time saved:
+
+    python benchmarks/bench_mesh_handoff.py --faces 500000 --format glb
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from utils.simplify_mesh_utils import load_meshset, mesh_simplify_trimesh
+
+
+def legacy_remesh(mesh_path, remesh_path, target_count=40000):
+    # mesh_simplify_trimesh and the paint pipeline reload before the in-memory handoff
+    ms = load_meshset(mesh_path)
+    ms.save_current_mesh(remesh_path.replace(".glb", ".obj"), save_textures=False)
+    courent = trimesh.load(remesh_path.replace(".glb", ".obj"), force="mesh")
+    if courent.faces.shape[0] > target_count:
+        courent = courent.simplify_quadric_decimation(target_count)
+    courent.export(remesh_path)
+    return trimesh.load(remesh_path)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faces', type=int, default=500000)
+    parser.add_argument('--format', default='glb', choices=['glb', 'obj'])
+    parser.add_argument('--target-count', type=int, default=40000,
+                        help='decimation target; above --faces only the I/O of both paths is measured')
+    args = parser.parse_args()
+
+    minor_sections = int((args.faces / 8) ** 0.5)
+    mesh = trimesh.creation.torus(1.0, 0.3, major_sections=args.faces // (2 * minor_sections),
+                                  minor_sections=minor_sections)
+    with tempfile.TemporaryDirectory() as tmp:
+        mesh_path = os.path.join(tmp, f'white_mesh.{args.format}')
+        mesh.export(mesh_path)
+        print(f'{len(mesh.faces)} faces, {os.path.getsize(mesh_path) / 2 ** 20:.1f} MB {args.format}')
+
+        legacy, legacy_time = timed(lambda: legacy_remesh(mesh_path, os.path.join(tmp, 'white_mesh_remesh.obj'), args.target_count))
+        in_memory, memory_time = timed(lambda: mesh_simplify_trimesh(mesh_path, target_count=args.target_count))
+        _, load_time = timed(lambda: load_meshset(mesh_path))
+
+    print(f'file round-trips {legacy_time:8.2f} s  ({len(legacy.faces)} faces)')
+    print(f'in memory        {memory_time:8.2f} s  ({len(in_memory.faces)} faces)')
+    print(f'  of which input load {load_time:.2f} s, shared by both paths')
+    print(f'I/O time saved   {legacy_time - memory_time:8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
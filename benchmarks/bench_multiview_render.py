@@ -0,0 +1,84 @@
+"""
+CPU benchmark of batched multi-view rendering in MeshRender.
+
+Renders normal, position and alpha maps of an icosphere for 6 and 30 views, once
+view by view (render_normal / render_position / render_alpha) and once through the
+batched methods, checks that both paths agree and reports the timings:
+
+    python benchmarks/bench_multiview_render.py --resolution 512 --subdivisions 6
+
+Requires the custom_rasterizer extension to be built.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from DifferentiableRenderer.MeshRender import MeshRender
+
+
+def candidate_views(num_views):
+    # Same layout as Hunyuan3DPaintConfig: 6 axis views followed by rings at +-20 degrees
+    elevs = [0, 0, 0, 0, 90, -90]
+    azims = [0, 90, 180, 270, 0, 180]
+    for azim in range(0, 360, 30):
+        elevs += [20, -20]
+        azims += [azim, azim]
+    return elevs[:num_views], azims[:num_views]
+
+
+def timed(fn, repeats):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def max_diff(a, b):
+    return max(float((x.float() - y.float()).abs().max()) for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolution', type=int, default=512)
+    parser.add_argument('--subdivisions', type=int, default=6, help='icosphere subdivisions (6 = 82k faces)')
+    parser.add_argument('--max-batch-views', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    mesh = trimesh.creation.icosphere(subdivisions=args.subdivisions)
+    render = MeshRender(default_resolution=args.resolution, device='cpu', max_batch_views=args.max_batch_views)
+    render.set_mesh(np.asarray(mesh.vertices, dtype=np.float32), np.asarray(mesh.faces, dtype=np.int32))
+    print(f'{len(mesh.faces)} faces, {args.resolution}x{args.resolution}, {torch.get_num_threads()} threads')
+
+    for num_views in (6, 30):
+        elevs, azims = candidate_views(num_views)
+        print(f'{num_views} views')
+        for name, single, batch in (
+            ('normal',
+             lambda: [render.render_normal(e, a, use_abs_coor=True) for e, a in zip(elevs, azims)],
+             lambda: render.render_normal_batch(elevs, azims, use_abs_coor=True)),
+            ('position',
+             lambda: [render.render_position(e, a) for e, a in zip(elevs, azims)],
+             lambda: render.render_position_batch(elevs, azims)),
+            ('alpha',
+             lambda: [render.render_alpha(e, a) for e, a in zip(elevs, azims)],
+             lambda: render.render_alpha_batch(elevs, azims)),
+        ):
+            single_out, single_time = timed(single, args.repeats)
+            batch_out, batch_time = timed(batch, args.repeats)
+            print(f'  {name:<9} per-view {single_time * 1e3:8.1f} ms  batched {batch_time * 1e3:8.1f} ms  '
+                  f'speedup {single_time / batch_time:5.2f}x  max diff {max_diff(single_out, batch_out):.2e}')
+
+
+if __name__ == '__main__':
+    main()
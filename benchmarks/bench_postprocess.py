@@ -0,0 +1,98 @@
+"""
+Benchmark of the shape post-processing chain with the array-based trimesh <-> pymeshlab bridge.
+
+Runs FloaterRemover, DegenerateFaceRemover and FaceReducer on generated meshes
+of 100k to 2M faces (a sphere plus small floaters) with the array bridge of
+hy3dshape.postprocessors, and the same filters with the previous temporary-PLY
+conversions, and reports both timings, along with the cost of a single
+trimesh -> pymeshlab -> trimesh round trip:
+
+    python benchmarks/bench_postprocess.py --faces 100000 500000 2000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pymeshlab
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dshape'))
+
+from hy3dshape.postprocessors import (DegenerateFaceRemover, FaceReducer, FloaterRemover, pymeshlab2trimesh,
+                                      reduce_face, remove_floater, trimesh2pymeshlab)
+
+
+def ply_pymeshlab2trimesh(ms):
+    # Conversions of hy3dshape.postprocessors before the array bridge
+    with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
+        ms.save_current_mesh(temp_file.name)
+        mesh = trimesh.load(temp_file.name)
+    os.remove(temp_file.name)
+    return mesh
+
+
+def ply_trimesh2pymeshlab(mesh):
+    with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
+        mesh.export(temp_file.name)
+        ms = pymeshlab.MeshSet()
+        ms.load_new_mesh(temp_file.name)
+    os.remove(temp_file.name)
+    return ms
+
+
+def ply_chain(mesh, max_facenum):
+    mesh = ply_pymeshlab2trimesh(remove_floater(ply_trimesh2pymeshlab(mesh)))
+    ms = ply_trimesh2pymeshlab(mesh)
+    with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
+        ms.save_current_mesh(temp_file.name)
+        ms = pymeshlab.MeshSet()
+        ms.load_new_mesh(temp_file.name)
+    os.remove(temp_file.name)
+    mesh = ply_pymeshlab2trimesh(ms)
+    return ply_pymeshlab2trimesh(reduce_face(ply_trimesh2pymeshlab(mesh), max_facenum=max_facenum))
+
+
+def array_chain(mesh, max_facenum):
+    mesh = FloaterRemover()(mesh)
+    mesh = DegenerateFaceRemover()(mesh)
+    return FaceReducer()(mesh, max_facenum=max_facenum)
+
+
+def test_mesh(num_faces, seed):
+    count = int(np.sqrt(num_faces / 4))
+    sphere = trimesh.creation.uv_sphere(count=[count, count])
+    rng = np.random.default_rng(seed)
+    floaters = [trimesh.creation.icosphere(subdivisions=1, radius=0.01).apply_translation(rng.uniform(-2, 2, 3))
+                for _ in range(8)]
+    return trimesh.util.concatenate([sphere] + floaters)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faces', type=int, nargs='+', default=[100000, 500000, 1000000, 2000000])
+    parser.add_argument('--max-facenum', type=int, default=40000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for num_faces in args.faces:
+        mesh = test_mesh(num_faces, args.seed)
+        _, ply_convert_time = timed(lambda: ply_pymeshlab2trimesh(ply_trimesh2pymeshlab(mesh)))
+        _, array_convert_time = timed(lambda: pymeshlab2trimesh(trimesh2pymeshlab(mesh)))
+        ply_mesh, ply_time = timed(lambda: ply_chain(mesh.copy(), args.max_facenum))
+        array_mesh, array_time = timed(lambda: array_chain(mesh.copy(), args.max_facenum))
+        print(f'{len(mesh.faces):8d} faces')
+        print(f'  round trip  temporary PLY {ply_convert_time:7.2f} s  arrays {array_convert_time:7.2f} s')
+        print(f'  chain       temporary PLY {ply_time:7.2f} s  arrays {array_time:7.2f} s  '
+              f'output faces {len(ply_mesh.faces)} / {len(array_mesh.faces)}')
+
+if __name__ == '__main__':
+    main()
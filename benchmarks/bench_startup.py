@@ -0,0 +1,93 @@
+"""
+Startup benchmark of the ModelWorker warm-start cache.
+
+Builds the shape and paint pipelines from the checkpoints (cold start), writes
+them to the warm-start cache, restores them from it (warm start) and reports the
+load time of every component for both paths:
+
+    python benchmarks/bench_startup.py --cache-dir /tmp/hy3dgen_warm_start
+
+Run it a second time to measure a warm start alone; pass --skip-cold to do so.
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# The paint configuration uses paths relative to the repository root, like ModelWorker
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'hy3dshape'))
+sys.path.insert(0, os.path.join(ROOT, 'hy3dpaint'))
+
+import torch
+
+from hy3dshape import Hunyuan3DDiTFlowMatchingPipeline
+from textureGenPipeline import Hunyuan3DPaintConfig
+from utils.image_super_utils import imageSuperNet
+from utils.multiview_utils import multiviewDiffusionNet
+from warm_start import WarmStartCache, pipeline_checkpoint_paths
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return result, time.perf_counter() - start
+
+
+def paint_config():
+    conf = Hunyuan3DPaintConfig(6, 512)
+    conf.realesrgan_ckpt_path = "hy3dpaint/ckpt/RealESRGAN_x4plus.pth"
+    conf.multiview_cfg_path = "hy3dpaint/cfgs/hunyuan-paint-pbr.yaml"
+    conf.custom_pipeline = "hy3dpaint/hunyuanpaintpbr"
+    return conf
+
+
+def report(title, timings):
+    print(title)
+    for name, seconds in timings.items():
+        print(f'  {name:<16} {seconds:8.2f} s')
+    print(f'  {"total":<16} {sum(timings.values()):8.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache-dir', default='/tmp/hy3dgen_warm_start')
+    parser.add_argument('--model-path', default='tencent/Hunyuan3D-2.1')
+    parser.add_argument('--device', default='cuda')
+    parser.add_argument('--skip-cold', action='store_true', help='only restore an existing cache')
+    args = parser.parse_args()
+
+    conf = paint_config()
+    conf.device = args.device
+    cache = WarmStartCache(args.cache_dir, checkpoint_paths=pipeline_checkpoint_paths(args.model_path, conf),
+                           model_path=args.model_path, paint_config=vars(conf))
+
+    if not args.skip_cold or not cache.is_valid():
+        cold = {}
+        pipeline, cold['shape'] = timed(
+            lambda: Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(args.model_path, device=args.device))
+        super_model, cold['super_model'] = timed(lambda: imageSuperNet(conf))
+        multiview_model, cold['multiview_model'] = timed(lambda: multiviewDiffusionNet(conf))
+        report('cold start', cold)
+
+        cache.save_shape_pipeline(pipeline)
+        cache.save_paint_pipeline(SimpleNamespace(models={'super_model': super_model, 'multiview_model': multiview_model}))
+        print(f'cache written to {args.cache_dir}')
+        del pipeline, super_model, multiview_model
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    cache.load_times = {}
+    _, shape_time = timed(lambda: cache.load_shape_pipeline(device=args.device))
+    _, paint_time = timed(lambda: cache.load_paint_pipeline(conf))
+    report('warm start', cache.load_times)
+    print(f'  shape pipeline {shape_time:.2f} s, paint pipeline {paint_time:.2f} s (including renderer setup)')
+
+
+if __name__ == '__main__':
+    main()
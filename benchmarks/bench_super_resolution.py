@@ -0,0 +1,76 @@
+"""
+Benchmark of batched super-resolution in imageSuperNet.
+
+Upscales 12 synthetic views (the 6 albedo + 6 MR images of a paint request) one
+by one through imageSuperNet.__call__ and with enhance_batch at batch sizes 1 to
+12, reports the per-view latency and the largest pixel difference to the
+one-by-one output:
+
+    python benchmarks/bench_super_resolution.py --resolution 512 --ckpt hy3dpaint/ckpt/RealESRGAN_x4plus.pth
+
+Without CUDA (or without the checkpoint) both paths use the LANCZOS fallback.
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from utils.image_super_utils import imageSuperNet
+
+
+def synthetic_views(num_views, resolution, seed):
+    rng = np.random.default_rng(seed)
+    # Smooth random images, closer to rendered views than white noise
+    low = rng.integers(0, 256, size=(num_views, resolution // 16, resolution // 16, 3), dtype=np.uint8)
+    return [Image.fromarray(array).resize((resolution, resolution), Image.BICUBIC) for array in low]
+
+
+def timed(fn, repeats):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def max_diff(a, b):
+    return max(int(np.abs(np.asarray(x, dtype=np.int16) - np.asarray(y, dtype=np.int16)).max()) for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ckpt', default='hy3dpaint/ckpt/RealESRGAN_x4plus.pth')
+    parser.add_argument('--resolution', type=int, default=512)
+    parser.add_argument('--views', type=int, default=12)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(range(1, 13)))
+    parser.add_argument('--repeats', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    super_model = imageSuperNet(SimpleNamespace(realesrgan_ckpt_path=args.ckpt if os.path.exists(args.ckpt) else None))
+    backend = 'RealESRGAN' if super_model.upsampler is not None else 'LANCZOS'
+    images = synthetic_views(args.views, args.resolution, args.seed)
+    print(f'{args.views} views, {args.resolution}x{args.resolution}, {backend}, '
+          f'device {"cuda" if torch.cuda.is_available() else "cpu"}')
+
+    reference, single_time = timed(lambda: [super_model(image) for image in images], args.repeats)
+    print(f'one by one      {single_time / args.views * 1e3:8.1f} ms/view')
+    for batch_size in args.batch_sizes:
+        outputs, batch_time = timed(lambda: super_model.enhance_batch(images, batch_size=batch_size), args.repeats)
+        print(f'batch size {batch_size:3d}  {batch_time / args.views * 1e3:8.1f} ms/view  '
+              f'speedup {single_time / batch_time:5.2f}x  max diff {max_diff(reference, outputs)}')
+
+
+if __name__ == '__main__':
+    main()
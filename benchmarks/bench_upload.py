@@ -0,0 +1,154 @@
+"""
+Benchmark of the concurrent multipart upload engine behind api_server.upload_to_r2.
+
+Starts a local moto S3 server (or uses --endpoint, e.g. a MinIO or R2 bucket),
+uploads random payloads of 5 to 200 MB with the previous s3.upload_fileobj call
+on a file and with MultipartUploader from bytes, from a file and from a
+producer yielding 1 MB chunks, and reports the throughput of each. Every object
+is downloaded again and compared with the payload. A run with injected part
+failures checks that failed parts are retried on their own:
+
+    python benchmarks/bench_upload.py --sizes 5 20 50 100 200 --part-size 8 --concurrency 8
+
+Throughput against the local stand-in is bound by the server's CPU; --latency
+adds a delay to every request (of both paths) to mimic a remote bucket.
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dshape'))
+
+from multipart_upload import MultipartUploader
+
+
+class FlakyClient:
+    """Wraps a client so that the first attempt of every `every`-th part fails."""
+
+    def __init__(self, client, every):
+        self.client = client
+        self.every = every
+        self.failed = set()
+        self.lock = threading.Lock()
+
+    def upload_part(self, **kwargs):
+        part_number = kwargs['PartNumber']
+        with self.lock:
+            fail = part_number % self.every == 0 and part_number not in self.failed
+            self.failed.add(part_number)
+        if fail:
+            raise ConnectionError(f'injected failure of part {part_number}')
+        return self.client.upload_part(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def start_moto_server():
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f'http://{host}:{port}'
+
+
+def make_client(endpoint, concurrency, latency):
+    client = boto3.client(
+        's3',
+        region_name='us-east-1',
+        endpoint_url=endpoint,
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', 'testing'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'testing'),
+        config=Config(signature_version='s3v4', max_pool_connections=max(10, concurrency)),
+    )
+    if latency:
+        client.meta.events.register('before-send.s3.*', lambda **kwargs: time.sleep(latency / 1000))
+    return client
+
+
+def producer(payload, chunk_size=2 ** 20):
+    for start in range(0, len(payload), chunk_size):
+        yield payload[start:start + chunk_size]
+
+
+def check_object(client, bucket, key, digest):
+    body = client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    assert hashlib.md5(body).hexdigest() == digest, f'{key} differs from the payload'
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 20, 50, 100, 200], help='payload sizes in MB')
+    parser.add_argument('--part-size', type=int, default=8, help='part size in MB')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoint', default=None, help='S3 endpoint; a local moto server is started when omitted')
+    parser.add_argument('--bucket', default='hunyuan3d-bench')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay added to every request in ms')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        server, endpoint = start_moto_server()
+    client = make_client(endpoint, args.concurrency, args.latency)
+    if server is not None:
+        client.create_bucket(Bucket=args.bucket)
+    uploader = MultipartUploader(client, args.bucket, part_size=args.part_size * 2 ** 20,
+                                 max_concurrency=args.concurrency)
+    print(f'endpoint {endpoint}, parts of {args.part_size} MB, concurrency {args.concurrency}, '
+          f'added latency {args.latency:.0f} ms')
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                payload = os.urandom(size * 2 ** 20)
+                digest = hashlib.md5(payload).hexdigest()
+                path = os.path.join(tmp, 'payload.glb')
+                with open(path, 'wb') as f:
+                    f.write(payload)
+
+                def upload_fileobj():
+                    with open(path, 'rb') as file:
+                        client.upload_fileobj(Fileobj=file, Bucket=args.bucket, Key='upload_fileobj.glb',
+                                              ExtraArgs={'ContentType': 'model/gltf-binary'})
+
+                _, baseline_time = timed(upload_fileobj)
+                check_object(client, args.bucket, 'upload_fileobj.glb', digest)
+                line = f'{size:4d} MB  upload_fileobj {size / baseline_time:7.1f} MB/s'
+                for name, source in [('bytes', payload), ('file', path), ('producer', producer(payload))]:
+                    stats = uploader.upload(source, f'{name}.glb', content_type='model/gltf-binary')
+                    check_object(client, args.bucket, f'{name}.glb', digest)
+                    line += f'  {name} {stats["throughput_mb_s"]:7.1f} MB/s'
+                print(line)
+
+            payload = os.urandom(4 * args.part_size * 2 ** 20 + 12345)
+            flaky = MultipartUploader(FlakyClient(client, every=2), args.bucket, part_size=args.part_size * 2 ** 20,
+                                      max_concurrency=args.concurrency, retry_backoff=0.01)
+            stats = flaky.upload(payload, 'flaky.glb')
+            check_object(client, args.bucket, 'flaky.glb', hashlib.md5(payload).hexdigest())
+            assert stats['parts'] == 5 and stats['retries'] == 2, stats
+            print(f'injected failures: {stats["retries"]} parts retried, object intact')
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the chart-level UV parametrization against xatlas.
+
+Unwraps a mesh (a noisy torus by default, or --mesh) with xatlas.parametrize and
+with chart_parametrize at several worker counts, and reports the time and the
+atlas quality (uv_atlas_quality: stretch, utilisation, flipped faces, charts).
+xatlas runs in a child process, so a crash in it is reported instead of ending
+the benchmark. Every worker count above 1 uses a process pool, whatever the mesh
+size:
+
+    python benchmarks/bench_uv_unwrap.py --faces 40000 --workers 1 4 8
+    python benchmarks/bench_uv_unwrap.py --mesh white_mesh_remesh.obj
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import trimesh
+import xatlas
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from utils.uvwrap_utils import chart_parametrize, uv_atlas_quality
+
+
+def noisy_torus(num_faces, seed):
+    minor_sections = max(int(np.sqrt(num_faces / 4)), 3)
+    mesh = trimesh.creation.torus(1.0, 0.3, major_sections=num_faces // (2 * minor_sections), minor_sections=minor_sections)
+    mesh.vertices += np.random.default_rng(seed).normal(scale=0.002, size=mesh.vertices.shape)
+    return mesh
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def timed_xatlas(vertices, faces):
+    return timed(lambda: xatlas.parametrize(vertices, faces))
+
+
+def report(name, seconds, quality):
+    print(f'{name:<20} {seconds:8.2f} s  stretch {quality["stretch"]:.3f} (max {quality["max_stretch"]:.2f})  '
+          f'utilisation {quality["utilisation"]:.3f}  flipped {quality["flipped_faces"]}  charts {quality["charts"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mesh', default=None, help='mesh file; a noisy torus is generated when omitted')
+    parser.add_argument('--faces', type=int, default=40000)
+    parser.add_argument('--texture-size', type=int, default=4096)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    parser.add_argument('--skip-xatlas', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mesh = trimesh.load(args.mesh, force='mesh') if args.mesh else noisy_torus(args.faces, args.seed)
+    vertices, faces = np.asarray(mesh.vertices), np.asarray(mesh.faces)
+    print(f'{len(faces)} faces, {len(vertices)} vertices')
+
+    if not args.skip_xatlas:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            try:
+                atlas, seconds = pool.submit(timed_xatlas, vertices, faces).result()
+                report('xatlas', seconds, uv_atlas_quality(vertices, faces, *atlas))
+            except BrokenProcessPool:
+                print(f"{'xatlas':<20} crashed")
+    for workers in args.workers:
+        atlas, seconds = timed(
+            lambda: chart_parametrize(vertices, faces, texture_size=args.texture_size, max_workers=workers,
+                                      min_parallel_faces=0))
+        report(f'charts, {workers} workers', seconds, uv_atlas_quality(vertices, faces, *atlas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of the sparse voxel-neighbour attention mask against compute_voxel_grid_mask.
+
+Renders synthetic position maps (a sphere seen from N views around it, background
+1 as in the paint pipeline) and builds the view-to-view attention mask for 6 to 12
+views at 32x32 and 64x64 latent grids, with the dense pairwise mask and with the
+spatially hashed neighbour lists. Reports time, mask memory and neighbour density,
+and checks that both masks are identical where the dense one is built:
+
+    python benchmarks/bench_voxel_mask.py --views 6 9 12 --grids 32 64
+
+Dense masks larger than --max-dense-gb are skipped.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from einops import rearrange
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hy3dpaint'))
+
+from hunyuanpaintpbr.unet.modules import (compute_voxel_grid_mask, compute_voxel_grid_neighbors,
+                                          voxel_neighbors_to_block_mask, voxel_neighbors_to_dense)
+
+
+def sphere_position_maps(num_views, resolution, seed):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:resolution, :resolution]
+    u = (xx + 0.5) / resolution * 2 - 1
+    v = 1 - (yy + 0.5) / resolution * 2
+    r2 = u * u + v * v
+    inside = r2 < 0.8
+    z = np.sqrt(np.clip(0.8 - r2, 0, None))
+    position = np.ones((1, num_views, 3, resolution, resolution), dtype=np.float32)
+    for view in range(num_views):
+        azim = 2 * np.pi * view / num_views + rng.uniform(0, 0.3)
+        points = np.stack([u * np.cos(azim) + z * np.sin(azim), v, -u * np.sin(azim) + z * np.cos(azim)])
+        points = points * 0.5 / np.sqrt(0.8) + 0.5
+        position[0, view][:, inside] = points[:, inside]
+    return torch.from_numpy(position)
+
+
+def synchronize(device):
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+
+def timed(fn, device):
+    if device.type == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+    synchronize(device)
+    start = time.perf_counter()
+    result = fn()
+    synchronize(device)
+    peak = torch.cuda.max_memory_allocated() if device.type == 'cuda' else None
+    return result, time.perf_counter() - start, peak
+
+
+def tensor_bytes(*tensors):
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--views', type=int, nargs='+', default=[6, 9, 12])
+    parser.add_argument('--grids', type=int, nargs='+', default=[32, 64])
+    parser.add_argument('--resolution', type=int, default=512, help='position map resolution')
+    parser.add_argument('--max-dense-gb', type=float, default=4.0)
+    parser.add_argument('--block-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    print(f'device {device}')
+    for num_views in args.views:
+        position = sphere_position_maps(num_views, args.resolution, args.seed).to(device)
+        for grid in args.grids:
+            num_tokens = num_views * grid * grid
+            neighbors, sparse_time, sparse_peak = timed(lambda: compute_voxel_grid_neighbors(position.clone(), grid), device)
+            sparse_bytes = tensor_bytes(neighbors['crow_indices'], neighbors['col_indices'], neighbors['invalid'])
+            block_mask = voxel_neighbors_to_block_mask(neighbors, args.block_size)
+            density = neighbors['col_indices'].numel() / num_tokens ** 2
+            line = (f'{num_views:2d} views  {grid}x{grid}  {num_tokens:6d} tokens  '
+                    f'sparse {sparse_time * 1e3:9.1f} ms {sparse_bytes / 2 ** 20:8.1f} MB')
+            if sparse_peak is not None:
+                line += f' (peak {sparse_peak / 2 ** 20:.0f} MB)'
+
+            # Dense mask plus the half-precision [B, N, N, L, L] distances it is computed from
+            dense_bytes = num_tokens ** 2 * 3
+            if dense_bytes / 2 ** 30 > args.max_dense_gb:
+                line += f'  dense skipped ({dense_bytes / 2 ** 30:.1f} GB)'
+            else:
+                dense, dense_time, dense_peak = timed(lambda: compute_voxel_grid_mask(position.clone(), grid), device)
+                line += (f'  dense {dense_time * 1e3:9.1f} ms {tensor_bytes(dense) / 2 ** 20:8.1f} MB'
+                         f'  speedup {dense_time / sparse_time:6.1f}x')
+                if dense_peak is not None:
+                    line += f' (peak {dense_peak / 2 ** 20:.0f} MB)'
+                dense = rearrange(dense, 'b ni nj li lj -> b (ni li) (nj lj)')
+                assert torch.equal(dense, voxel_neighbors_to_dense(neighbors)), 'sparse mask differs from dense mask'
+                del dense
+            print(line)
+            # Background tokens are all neighbours of each other, which keeps most blocks active
+            print(f'    listed pairs {density:.4%} of the dense mask, background tokens '
+                  f'{neighbors["invalid"].float().mean().item():.1%}, '
+                  f'{block_mask.float().mean().item():.1%} of {args.block_size}x{args.block_size} blocks active')
+
+
+if __name__ == '__main__':
+    main()
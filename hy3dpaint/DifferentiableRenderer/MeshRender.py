@@ -29,7 +29,7 @@ from .camera_utils import (
 )
 
 try:
-    from .mesh_utils import load_mesh, save_mesh
+    from .mesh_utils import load_mesh, save_mesh, save_glb_mesh
 except:
     print("Bpy IO CAN NOT BE Imported!!!")
 
@@ -325,6 +325,71 @@ def _apply_background_mask(content: torch.Tensor, visible_mask: torch.Tensor,
     return content * visible_mask + bg_tensor * (1 - visible_mask)
 
 
+class TextureBakeAccumulator:
+    """
+    Streaming cosine-weighted texture merge.
+
+    Keeps a running weighted-sum texture and trust (confidence) map so every
+    back-projected view is folded in exactly once, instead of re-merging all
+    previous views. Views whose covered texels are more than 99% painted already
+    are skipped, like in MeshRender.fast_bake_texture.
+    """
+
+    def __init__(self, texture_size: Tuple[int, int], device: str = "cuda"):
+        """
+        Args:
+            texture_size: UV texture size (height, width)
+            device: Device of the accumulation buffers
+        """
+        self.texture_size = tuple(texture_size)
+        self.device = device
+        self.texture_merge = None
+        self.trust_map_merge = None
+        self.num_added = 0
+        self.num_skipped = 0
+
+    @torch.no_grad()
+    def add(self, texture: torch.Tensor, cos_map: torch.Tensor) -> bool:
+        """
+        Fold one back-projected view into the running sums.
+
+        Args:
+            texture: Projected texture [H, W, C]
+            cos_map: Corresponding cosine weight map [H, W, 1]
+
+        Returns:
+            Whether the view was merged (False if it was skipped)
+        """
+        if self.texture_merge is None:
+            channel = texture.shape[-1]
+            self.texture_merge = torch.zeros(self.texture_size + (channel,)).to(self.device)
+            self.trust_map_merge = torch.zeros(self.texture_size + (1,)).to(self.device)
+
+        covered = cos_map > 0
+        view_sum = covered.sum()
+        painted_sum = (covered * (self.trust_map_merge > 0)).sum()
+        if painted_sum / view_sum > 0.99:
+            self.num_skipped += 1
+            return False
+        self.texture_merge += texture * cos_map
+        self.trust_map_merge += cos_map
+        self.num_added += 1
+        return True
+
+    @torch.no_grad()
+    def result(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Normalize the accumulated texture.
+
+        Returns:
+            Tuple of (merged_texture, valid_mask) tensors
+        """
+        if self.texture_merge is None:
+            raise ValueError("No view has been added to the bake accumulator")
+        texture_merge = self.texture_merge / torch.clamp(self.trust_map_merge, min=1e-8)
+        return texture_merge, self.trust_map_merge > 1e-8
+
+
 class MeshRender:
     def __init__(
         self,
@@ -340,6 +405,7 @@ class MeshRender:
         shader_type="face",
         use_opengl=False,
         device="cuda",
+        max_batch_views=8,
     ):
         """
         Initialize mesh renderer with configurable parameters.
@@ -357,9 +423,11 @@ class MeshRender:
             shader_type: Shading type ("face" or "vertex")
             use_opengl: Whether to use OpenGL backend (deprecated)
             device: Computing device ("cuda" or "cpu")
+            max_batch_views: Maximum number of views rasterized together by the batched render methods
         """
 
         self.device = device
+        self.max_batch_views = max_batch_views
 
         self.set_default_render_resolution(default_resolution)
         self.set_default_texture_resolution(texture_size)
@@ -494,6 +562,108 @@ class MeshRender:
             
             return result[0, ...]
 
+    def _create_view_states_batch(self, elevs, azims, camera_distance=None, center=None, resolution=None):
+        """Transform the vertices into clip space for several views with one batched matmul per transform."""
+        camera_distance = self.camera_distance if camera_distance is None else camera_distance
+        r_mv = np.stack([
+            get_mv_matrix(elev=elev, azim=azim, camera_distance=camera_distance, center=center)
+            for elev, azim in zip(elevs, azims)
+        ])
+        r_mv = torch.from_numpy(r_mv).to(self.vtx_pos.device)
+        proj = torch.from_numpy(self.camera_proj_mat).to(self.vtx_pos.device)
+
+        # Homogeneous vertex positions are shared by all views
+        posw = torch.cat([self.vtx_pos, torch.ones([self.vtx_pos.shape[0], 1]).to(self.vtx_pos.device)], axis=1)
+        pos_camera = torch.matmul(posw[None], r_mv.transpose(1, 2))
+        pos_clip = torch.matmul(pos_camera, proj.t())
+        resolution = _ensure_resolution_format(resolution, self.default_resolution)
+        return pos_camera, pos_clip, resolution
+
+    def _render_batch(self, elevs, azims, mode: RenderMode, camera_distance=None, center=None, resolution=None,
+                      bg_color=[1, 1, 1], **kwargs) -> torch.Tensor:
+        """
+        Batched counterpart of _unified_render_pipeline for the NORMAL, POSITION and ALPHA modes.
+
+        Views are rasterized max_batch_views at a time, each chunk in a single rasterizer call.
+
+        Returns:
+            Tensor of shape [B, H, W, C]
+        """
+        results = []
+        for start in range(0, len(elevs), self.max_batch_views):
+            chunk_elevs = elevs[start:start + self.max_batch_views]
+            chunk_azims = azims[start:start + self.max_batch_views]
+            pos_camera, pos_clip, view_resolution = self._create_view_states_batch(
+                chunk_elevs, chunk_azims, camera_distance, center, resolution
+            )
+            rast_out, _ = self.raster_rasterize_batch(pos_clip, self.pos_idx, resolution=view_resolution)
+
+            if mode == RenderMode.ALPHA:
+                results.append(rast_out[..., -1:].long())
+                continue
+
+            visible_mask = torch.clamp(rast_out[..., -1:], 0, 1)
+            if mode == RenderMode.NORMAL:
+                normal = self._get_normals_for_shading_batch(pos_camera, rast_out, kwargs.get('use_abs_coor', False))
+                result = _apply_background_mask(normal, visible_mask, bg_color, self.device)
+                if kwargs.get('normalize_rgb', True):
+                    result = (result + 1) * 0.5
+            elif mode == RenderMode.POSITION:
+                tex_position = 0.5 - self.vtx_pos[:, :3] / self.scale_factor
+                tex_position = tex_position.contiguous()
+                position, _ = self.raster_interpolate_batch(tex_position[None, ...], rast_out, self.pos_idx)
+                result = _apply_background_mask(position, visible_mask, bg_color, self.device)
+            else:
+                raise ValueError(f"Batched rendering does not support mode {mode}")
+
+            if self.use_antialias:
+                result = self.raster_antialias(result, rast_out, pos_clip, self.pos_idx)
+            results.append(result)
+        return torch.cat(results, dim=0)
+
+    def _get_normals_for_shading_batch(self, pos_camera: torch.Tensor, rast_out: torch.Tensor,
+                                       use_abs_coor: bool = False) -> torch.Tensor:
+        """Batched counterpart of _get_normals_for_shading for already rasterized views."""
+        num_views = rast_out.shape[0]
+        if use_abs_coor:
+            # World-space normals are the same for every view
+            face_normals = self._compute_face_normals(self.vtx_pos[self.pos_idx[:, :3], :])[None]
+        else:
+            pos_camera = pos_camera[..., :3] / pos_camera[..., 3:4]
+            face_normals = torch.stack([
+                self._compute_face_normals(pos_camera[i][self.pos_idx[:, :3], :]) for i in range(num_views)
+            ])
+
+        if self.shader_type == "vertex":
+            vertex_normals = torch.stack([
+                torch.from_numpy(trimesh.geometry.mean_vertex_normals(
+                    vertex_count=self.vtx_pos.shape[0],
+                    faces=self.pos_idx.cpu(),
+                    face_normals=face_normals[i].cpu(),
+                )).float()
+                for i in range(face_normals.shape[0])
+            ]).to(self.device)
+            if vertex_normals.shape[0] == 1:
+                normal, _ = self.raster_interpolate_batch(vertex_normals, rast_out, self.pos_idx)
+            else:
+                normal = torch.cat([
+                    self.raster_interpolate_batch(vertex_normals[i:i + 1], rast_out[i:i + 1], self.pos_idx)[0]
+                    for i in range(num_views)
+                ])
+
+        elif self.shader_type == "face":
+            tri_ids = rast_out[..., 3]
+            tri_ids_mask = tri_ids > 0
+            tri_ids = ((tri_ids - 1) * tri_ids_mask).long()
+            if face_normals.shape[0] > 1:
+                # Offset face ids into the flattened [B * F] per-view normals
+                view_ids = torch.arange(num_views, device=tri_ids.device).view(-1, 1, 1)
+                tri_ids = tri_ids + view_ids * face_normals.shape[1]
+            normal = torch.zeros(rast_out.shape[0], rast_out.shape[1], rast_out.shape[2], 3).to(rast_out)
+            normal.reshape(-1, 3)[tri_ids_mask.view(-1)] = face_normals.reshape(-1, 3)[tri_ids[tri_ids_mask].view(-1)]
+
+        return normal
+
     def set_orth_scale(self, ortho_scale):
         """
         Set the orthographic projection scale and update camera projection matrix.
@@ -572,6 +742,56 @@ class MeshRender:
 
         return textc, textd
 
+    def raster_rasterize_batch(self, pos, tri, resolution):
+        """
+        Rasterize several views of the mesh in a single rasterizer call.
+
+        Args:
+            pos: Vertex positions in clip space, [B, N, 4]
+            tri: Triangle indices
+            resolution: Rendering resolution [height, width]
+
+        Returns:
+            Tuple of (rasterization_output [B, H, W, 4], gradient_info)
+        """
+
+        if self.raster_mode == "cr":
+            rast_out_db = None
+            if pos.dtype == torch.float64:
+                pos = pos.to(torch.float32)
+            if tri.dtype == torch.int64:
+                tri = tri.to(torch.int32)
+
+            findices, barycentric = self.raster.rasterize_batch(pos, tri, resolution)
+            rast_out = torch.cat((barycentric, findices.unsqueeze(-1)), dim=-1)
+        else:
+            raise ValueError(f"No raster named {self.raster_mode}")
+
+        return rast_out, rast_out_db
+
+    def raster_interpolate_batch(self, uv, rast_out, uv_idx):
+        """
+        Interpolate vertex attributes shared by all views across batched rasterization output.
+
+        Args:
+            uv: Vertex attributes to interpolate, [1, N, C]
+            rast_out: Batched rasterization output from raster_rasterize_batch
+            uv_idx: Vertex indices for triangles
+
+        Returns:
+            Tuple of (interpolated_values [B, H, W, C], gradient_info)
+        """
+
+        if self.raster_mode == "cr":
+            textd = None
+            if uv.dim() == 2:
+                uv = uv.unsqueeze(0)
+            textc = self.raster.interpolate_batch(uv, rast_out[..., -1], rast_out[..., :-1], uv_idx)
+        else:
+            raise ValueError(f"No raster named {self.raster_mode}")
+
+        return textc, textd
+
     def raster_antialias(self, color, rast, pos, tri, topology_hash=None, pos_gradient_boost=1.0):
         """
         Apply antialiasing to rendered colors (currently returns input unchanged).
@@ -627,16 +847,16 @@ class MeshRender:
         if texture_data is not None:
             self.set_texture(texture_data)
 
-    def save_mesh(self, mesh_path, downsample=False):
+    def _get_export_textures(self, downsample=False):
         """
-        Save current mesh with textures to file.
+        Collect the diffuse, metallic, roughness and normal maps for export.
         
         Args:
-            mesh_path: Output file path
             downsample: Whether to downsample textures by half
+            
+        Returns:
+            Tuple of (texture, metallic, roughness, normal); unset maps are None
         """
-
-        vtx_pos, pos_idx, vtx_uv, uv_idx = self.get_mesh(normalize=False)
         texture_data = self.get_texture()
         texture_metallic, texture_roughness = self.get_texture_mr()
         texture_normal = self.get_texture_normal()
@@ -654,6 +874,19 @@ class MeshRender:
                 texture_normal = cv2.resize(
                     texture_normal, (texture_normal.shape[1] // 2, texture_normal.shape[0] // 2)
                 )
+        return texture_data, texture_metallic, texture_roughness, texture_normal
+
+    def save_mesh(self, mesh_path, downsample=False):
+        """
+        Save current mesh with textures to file.
+        
+        Args:
+            mesh_path: Output file path
+            downsample: Whether to downsample textures by half
+        """
+
+        vtx_pos, pos_idx, vtx_uv, uv_idx = self.get_mesh(normalize=False)
+        texture_data, texture_metallic, texture_roughness, texture_normal = self._get_export_textures(downsample)
 
         save_mesh(
             mesh_path,
@@ -667,6 +900,33 @@ class MeshRender:
             normal=texture_normal,
         )
 
+    def save_glb(self, glb_path, downsample=False):
+        """
+        Export current mesh and PBR textures directly to a GLB file.
+        
+        Skips the OBJ/MTL/JPG files that save_mesh writes and that would otherwise
+        be read back for the GLB conversion.
+        
+        Args:
+            glb_path: Output GLB path or writable binary file object
+            downsample: Whether to downsample textures by half
+        """
+
+        vtx_pos, pos_idx, vtx_uv, uv_idx = self.get_mesh(normalize=False)
+        texture_data, texture_metallic, texture_roughness, texture_normal = self._get_export_textures(downsample)
+
+        save_glb_mesh(
+            glb_path,
+            vtx_pos,
+            pos_idx,
+            vtx_uv,
+            uv_idx,
+            texture_data,
+            metallic=texture_metallic,
+            roughness=texture_roughness,
+            normal=texture_normal,
+        )
+
     def set_mesh(self, vtx_pos, pos_idx, vtx_uv=None, uv_idx=None, scale_factor=1.15, auto_center=True):
         """
         Set mesh geometry data and perform coordinate transformations.
@@ -991,6 +1251,13 @@ class MeshRender:
                                             use_abs_coor=use_abs_coor, normalize_rgb=normalize_rgb)
         return _format_output(image, return_type)
 
+    def render_normal_batch(self, elevs, azims, camera_distance=None, center=None, resolution=None,
+                            bg_color=[1, 1, 1], use_abs_coor=False, normalize_rgb=True, return_type="th"):
+        """Render surface normals from several viewpoints; returns one image per (elev, azim) pair."""
+        images = self._render_batch(elevs, azims, RenderMode.NORMAL, camera_distance, center, resolution, bg_color,
+                                    use_abs_coor=use_abs_coor, normalize_rgb=normalize_rgb)
+        return [_format_output(image, return_type) for image in images]
+
     def convert_normal_map(self, image):
         """
         Convert normal map from standard format to renderer's coordinate system.
@@ -1031,6 +1298,12 @@ class MeshRender:
             return Image.fromarray(image.astype(np.uint8))
         return _format_output(image, return_type)
 
+    def render_position_batch(self, elevs, azims, camera_distance=None, center=None, resolution=None,
+                              bg_color=[1, 1, 1], return_type="th"):
+        """Render world-space positions from several viewpoints; returns one image per (elev, azim) pair."""
+        images = self._render_batch(elevs, azims, RenderMode.POSITION, camera_distance, center, resolution, bg_color)
+        return [_format_output(image, return_type) for image in images]
+
     def render_uvpos(self, return_type="th"):
         """Render vertex positions mapped to UV texture space."""
         config = RenderConfig(return_type=return_type)
@@ -1046,6 +1319,13 @@ class MeshRender:
             raise Exception("PIL format not supported for alpha rendering")
         return _format_output(image, return_type)
 
+    def render_alpha_batch(self, elevs, azims, camera_distance=None, center=None, resolution=None, return_type="th"):
+        """Render alpha masks from several viewpoints; each has the [1, H, W, 1] layout of render_alpha."""
+        if return_type == ReturnType.PIL.value:
+            raise Exception("PIL format not supported for alpha rendering")
+        images = self._render_batch(elevs, azims, RenderMode.ALPHA, camera_distance, center, resolution)
+        return [_format_output(image[None], return_type) for image in images]
+
     def uv_feature_map(self, vert_feat, bg=None):
         """
         Map per-vertex features to UV texture space using mesh topology.
@@ -1368,19 +1648,11 @@ class MeshRender:
             Tuple of (merged_texture, valid_mask) tensors
         """
 
-        channel = textures[0].shape[-1]
-        texture_merge = torch.zeros(self.texture_size + (channel,)).to(self.device)
-        trust_map_merge = torch.zeros(self.texture_size + (1,)).to(self.device)
+        accumulator = TextureBakeAccumulator(self.texture_size, self.device)
         for texture, cos_map in zip(textures, cos_maps):
-            view_sum = (cos_map > 0).sum()
-            painted_sum = ((cos_map > 0) * (trust_map_merge > 0)).sum()
-            if painted_sum / view_sum > 0.99:
-                continue
-            texture_merge += texture * cos_map
-            trust_map_merge += cos_map
-        texture_merge = texture_merge / torch.clamp(trust_map_merge, min=1e-8)
+            accumulator.add(texture, cos_map)
 
-        return texture_merge, trust_map_merge > 1e-8
+        return accumulator.result()
 
     @torch.no_grad()
     def uv_inpaint(self, texture, mask, vertex_inpaint=True, method="NS", return_float=False):
@@ -16,7 +16,6 @@ import os
 import cv2
 import math
 import numpy as np
-from io import StringIO
 from typing import Optional, Tuple, Dict, Any
 
 # Try to import Blender, fallback to trimesh for GLB conversion
@@ -100,6 +99,15 @@ def _save_texture_map(
     return os.path.basename(path)
 
 
+def _encode_texture_map(texture: np.ndarray, image_format: str = ".jpg") -> bytes:
+    """Encode an RGB texture map in [0, 1] like _save_texture_map, without writing it to disk."""
+    processed_texture = (texture * 255).astype(np.uint8)
+    ok, encoded = cv2.imencode(image_format, processed_texture[..., ::-1])  # RGB to BGR
+    if not ok:
+        raise ValueError(f"Failed to encode texture as {image_format}")
+    return encoded.tobytes()
+
+
 def _write_mtl_properties(f, properties: Dict[str, Any]):
     """Write material properties to MTL file."""
     for key, value in properties.items():
@@ -109,27 +117,143 @@ def _write_mtl_properties(f, properties: Dict[str, Any]):
             f.write(f"{key} {value}\n")
 
 
+OBJ_CHUNK_ROWS = 1 << 16
+
+
+def _int_field(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ASCII digits of non-negative integers, right-aligned in a fixed-width field, with a mask of the used bytes."""
+    values = values.astype(np.int64)
+    width = len(str(int(values.max()))) if len(values) else 1
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    chars = (values[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+    num_digits = np.ones(len(values), dtype=np.int64)
+    for power in powers[:-1]:
+        num_digits += values >= power
+    mask = np.arange(width) >= width - num_digits[:, None]
+    return chars, mask
+
+
+def _fixed_field(values: np.ndarray, decimals: int = 6) -> Tuple[np.ndarray, np.ndarray]:
+    """Bytes of "%.{decimals}f" % value for finite float32 values, as a fixed-width field and a mask."""
+    # A float32 times 10**6 is exact in float64, so rint rounds the exact decimal value half to even like printf
+    scaled = np.rint(np.abs(values.astype(np.float64)) * 10.0**decimals).astype(np.int64)
+    integer_chars, integer_mask = _int_field(scaled // 10**decimals)
+    powers = 10 ** np.arange(decimals - 1, -1, -1, dtype=np.int64)
+    fraction_chars = (scaled[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+    n = len(values)
+    chars = np.concatenate(
+        [
+            np.full((n, 1), ord("-"), dtype=np.uint8),
+            integer_chars,
+            np.full((n, 1), ord("."), dtype=np.uint8),
+            fraction_chars,
+        ],
+        axis=1,
+    )
+    # printf keeps the sign of negative values that round to zero, and of -0.0
+    mask = np.concatenate(
+        [np.signbit(values)[:, None], integer_mask, np.ones((n, 1 + decimals), dtype=bool)], axis=1
+    )
+    return chars, mask
+
+
+def _literal_field(text: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    chars = np.frombuffer(text.encode(), dtype=np.uint8)
+    return np.broadcast_to(chars, (n, len(chars))), np.ones((n, len(chars)), dtype=bool)
+
+
+def _join_fields(fields) -> bytes:
+    chars = np.concatenate([field[0] for field in fields], axis=1)
+    mask = np.concatenate([field[1] for field in fields], axis=1)
+    return chars[mask].tobytes()
+
+
+def _format_vector_records(prefix: str, values: np.ndarray) -> bytes:
+    """Format rows as b"{prefix} %.6f %.6f ...\n", byte-identical to np.savetxt."""
+    values = np.asarray(values)
+    # Values from 9e12 up overflow the int64 digits of _fixed_field; NaN and inf fail the comparison too
+    if values.dtype != np.float32 or not (np.abs(values) < 9e12).all():
+        row_format = " ".join([prefix] + ["%.6f"] * values.shape[1]) + "\n"
+        return "".join(row_format % tuple(row) for row in values).encode()
+    fields = [_literal_field(prefix, len(values))]
+    for column in range(values.shape[1]):
+        fields.append(_literal_field(" ", len(values)))
+        fields.append(_fixed_field(values[:, column]))
+    fields.append(_literal_field("\n", len(values)))
+    return _join_fields(fields)
+
+
+def _format_face_records(index_arrays) -> bytes:
+    """Format 1-based faces as b"f p/t p/t p/t\n" (or p/t/n with three index arrays)."""
+    n = len(index_arrays[0])
+    fields = [_literal_field("f", n)]
+    for corner in range(index_arrays[0].shape[1]):
+        for k, indices in enumerate(index_arrays):
+            fields.append(_literal_field(" " if k == 0 else "/", n))
+            fields.append(_int_field(indices[:, corner] + 1))
+    fields.append(_literal_field("\n", n))
+    return _join_fields(fields)
+
+
+def _iter_obj_chunks(
+    vtx_pos: np.ndarray,
+    vtx_uv: np.ndarray,
+    pos_idx: np.ndarray,
+    uv_idx: np.ndarray,
+    name: str,
+    vtx_normal: Optional[np.ndarray] = None,
+    normal_idx: Optional[np.ndarray] = None,
+    chunk_rows: int = OBJ_CHUNK_ROWS,
+):
+    """Yield the OBJ file as byte chunks of at most chunk_rows records."""
+    yield f"mtllib {name}.mtl\no {name}\n".encode()
+    records = [("v", vtx_pos), ("vt", vtx_uv)]
+    if vtx_normal is not None:
+        records.append(("vn", vtx_normal))
+    for prefix, values in records:
+        for start in range(0, len(values), chunk_rows):
+            yield _format_vector_records(prefix, values[start : start + chunk_rows])
+    yield b"s 0\nusemtl Material\n"
+
+    index_arrays = [pos_idx, uv_idx]
+    if vtx_normal is not None:
+        index_arrays.append(pos_idx if normal_idx is None else normal_idx)
+    index_arrays = [np.asarray(indices, dtype=np.int64) for indices in index_arrays]
+    if len(pos_idx) == 0:
+        yield b"\n"
+    for start in range(0, len(pos_idx), chunk_rows):
+        yield _format_face_records([indices[start : start + chunk_rows] for indices in index_arrays])
+
+
 def _create_obj_content(
-    vtx_pos: np.ndarray, vtx_uv: np.ndarray, pos_idx: np.ndarray, uv_idx: np.ndarray, name: str
+    vtx_pos: np.ndarray,
+    vtx_uv: np.ndarray,
+    pos_idx: np.ndarray,
+    uv_idx: np.ndarray,
+    name: str,
+    vtx_normal: Optional[np.ndarray] = None,
+    normal_idx: Optional[np.ndarray] = None,
 ) -> str:
     """Create OBJ file content."""
-    buffer = StringIO()
-
-    # Write header and vertices
-    buffer.write(f"mtllib {name}.mtl\no {name}\n")
-    np.savetxt(buffer, vtx_pos, fmt="v %.6f %.6f %.6f")
-    np.savetxt(buffer, vtx_uv, fmt="vt %.6f %.6f")
-    buffer.write("s 0\nusemtl Material\n")
-
-    # Write faces
-    pos_idx_plus1 = pos_idx + 1
-    uv_idx_plus1 = uv_idx + 1
-    face_format = np.frompyfunc(lambda *x: f"{int(x[0])}/{int(x[1])}", 2, 1)
-    faces = face_format(pos_idx_plus1, uv_idx_plus1)
-    face_strings = [f"f {' '.join(face)}" for face in faces]
-    buffer.write("\n".join(face_strings) + "\n")
-
-    return buffer.getvalue()
+    return b"".join(_iter_obj_chunks(vtx_pos, vtx_uv, pos_idx, uv_idx, name, vtx_normal, normal_idx)).decode()
+
+
+def write_obj_content(
+    f,
+    vtx_pos: np.ndarray,
+    vtx_uv: np.ndarray,
+    pos_idx: np.ndarray,
+    uv_idx: np.ndarray,
+    name: str,
+    vtx_normal: Optional[np.ndarray] = None,
+    normal_idx: Optional[np.ndarray] = None,
+) -> int:
+    """Write OBJ records (v/vt/vn/f) to a binary file object chunk by chunk; returns the bytes written."""
+    written = 0
+    for chunk in _iter_obj_chunks(vtx_pos, vtx_uv, pos_idx, uv_idx, name, vtx_normal, normal_idx):
+        f.write(chunk)
+        written += len(chunk)
+    return written
 
 
 def save_obj_mesh(mesh_path, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic=None, roughness=None, normal=None):
@@ -143,9 +267,8 @@ def save_obj_mesh(mesh_path, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic
     base_path, name = _get_base_path_and_name(mesh_path)
 
     # Create and save OBJ content
-    obj_content = _create_obj_content(vtx_pos, vtx_uv, pos_idx, uv_idx, name)
-    with open(mesh_path, "w") as obj_file:
-        obj_file.write(obj_content)
+    with open(mesh_path, "wb") as obj_file:
+        write_obj_content(obj_file, vtx_pos, vtx_uv, pos_idx, uv_idx, name)
 
     # Save texture maps
     texture_maps = {}
@@ -212,6 +335,74 @@ def save_mesh(mesh_path, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic=Non
     )
 
 
+def _unify_vertex_indices(pos_idx: np.ndarray, uv_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split vertices along UV seams so that every glTF vertex has a single position and UV."""
+    if pos_idx.shape == uv_idx.shape and np.array_equal(pos_idx, uv_idx):
+        return None, None, pos_idx
+    corners = np.stack([pos_idx.reshape(-1), uv_idx.reshape(-1)], axis=1).astype(np.int64)
+    unique_corners, faces = np.unique(corners, axis=0, return_inverse=True)
+    return unique_corners[:, 0], unique_corners[:, 1], faces.reshape(pos_idx.shape)
+
+
+def _vertex_normals(vtx_pos: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Area-weighted vertex normals."""
+    triangles = vtx_pos[faces]
+    face_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    vtx_normal = np.stack(
+        [
+            np.bincount(faces.reshape(-1), weights=np.repeat(face_normals[:, axis], 3), minlength=len(vtx_pos))
+            for axis in range(3)
+        ],
+        axis=1,
+    ).astype(np.float32)
+    length = np.linalg.norm(vtx_normal, axis=1, keepdims=True)
+    return vtx_normal / np.maximum(length, 1e-12)
+
+
+def save_glb_mesh(
+    glb_path, vtx_pos, pos_idx, vtx_uv, uv_idx, texture, metallic=None, roughness=None, normal=None, albedo_format=".jpg"
+):
+    """
+    Save mesh and PBR textures straight to a GLB, without the OBJ/MTL/JPG round trip.
+
+    The albedo is encoded once (JPEG by default, as in the OBJ export), the metallic and
+    roughness maps go into one lossless PNG with roughness in G and metallic in B, and
+    everything is streamed into a single GLB binary chunk.
+
+    Args:
+        glb_path: Output path or writable binary file object
+        vtx_pos, pos_idx, vtx_uv, uv_idx: Mesh as returned by MeshRender.get_mesh(normalize=False)
+        texture: Albedo map [H, W, 3] in [0, 1]
+        metallic, roughness: Optional [H, W, C] maps in [0, 1]; channel 0 is used
+        normal: Optional normal map [H, W, 3] in [0, 1]
+        albedo_format: ".jpg" or ".png"
+    """
+    from utils.glb_utils import GLBBuilder
+
+    vtx_pos = _convert_to_numpy(vtx_pos, np.float32)
+    vtx_uv = _convert_to_numpy(vtx_uv, np.float32)
+    pos_idx = _convert_to_numpy(pos_idx, np.int64)
+    uv_idx = _convert_to_numpy(uv_idx, np.int64)
+
+    pos_map, uv_map, faces = _unify_vertex_indices(pos_idx, uv_idx)
+    if pos_map is not None:
+        vtx_pos, vtx_uv = vtx_pos[pos_map], vtx_uv[uv_map]
+    vtx_normal = _vertex_normals(vtx_pos, faces)
+
+    builder = GLBBuilder()
+    textures = {"base_color_texture": builder.add_texture(builder.add_image(_encode_texture_map(texture, albedo_format)))}
+    if metallic is not None and roughness is not None:
+        mr = np.full(metallic.shape[:2] + (3,), 255, dtype=np.uint8)
+        mr[..., 1] = (roughness[..., 0] * 255).astype(np.uint8)
+        mr[..., 2] = (metallic[..., 0] * 255).astype(np.uint8)
+        textures["metallic_roughness_texture"] = builder.add_texture(builder.add_image(mr, image_format="PNG"))
+    if normal is not None:
+        textures["normal_texture"] = builder.add_texture(builder.add_image(_encode_texture_map(normal, ".png")))
+    material = builder.add_pbr_material(**textures)
+    builder.add_mesh(vtx_pos, faces, uvs=vtx_uv, normals=vtx_normal, material=material)
+    builder.write(glb_path)
+
+
 def _setup_blender_scene():
     """Setup Blender scene for conversion."""
     if not HAS_BLENDER:
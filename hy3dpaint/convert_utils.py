@@ -1,19 +1,32 @@
+import os
+
 import trimesh
-import pygltflib
 import numpy as np
 from PIL import Image
-import base64
-import io
 
+try:
+    from utils.glb_utils import GLBBuilder
+except ImportError:
+    from hy3dpaint.utils.glb_utils import GLBBuilder
+
+
+def _load_image(image):
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return Image.open(image)
 
-def combine_metallic_roughness(metallic_path, roughness_path, output_path):
+
+def combine_metallic_roughness(metallic_path, roughness_path, output_path=None):
     """
     将metallic和roughness贴图合并为一张贴图
     GLB格式要求metallic在B通道，roughness在G通道
+    metallic/roughness可以是路径或PIL图像；output_path为None时直接返回PIL图像，不写文件
     """
     # 加载贴图
-    metallic_img = Image.open(metallic_path).convert("L")  # 转为灰度
-    roughness_img = Image.open(roughness_path).convert("L")  # 转为灰度
+    metallic_img = _load_image(metallic_path).convert("L")  # 转为灰度
+    roughness_img = _load_image(roughness_path).convert("L")  # 转为灰度
 
     # 确保尺寸一致
     if metallic_img.size != roughness_img.size:
@@ -35,14 +48,21 @@ def combine_metallic_roughness(metallic_path, roughness_path, output_path):
 
     # 转回PIL图像并保存
     combined = Image.fromarray(combined_array)
+    if output_path is None:
+        return combined
     combined.save(output_path)
     return output_path
 
 
-def create_glb_with_pbr_materials(obj_path, textures_dict, output_path):
+def create_glb_with_pbr_materials(obj_path, textures_dict, output_path, png_compress_level=6):
     """
-    使用pygltflib创建包含完整PBR材质的GLB文件
+    在内存中组装包含完整PBR材质的GLB文件
+
+    网格数据和贴图都作为同一个二进制块中的bufferView写入（不使用base64），
+    不会在当前目录写入temp.glb或mr_combined.png，因此并发请求互不影响。
 
+    obj_path: OBJ路径或trimesh.Trimesh
+    output_path: 输出路径或可写的二进制文件对象
     textures_dict = {
         'albedo': 'path/to/albedo.png',
         'metallic': 'path/to/metallic.png',
@@ -50,91 +70,48 @@ def create_glb_with_pbr_materials(obj_path, textures_dict, output_path):
         'normal': 'path/to/normal.png',  # 可选
         'ao': 'path/to/ao.png'  # 可选
     }
+    贴图可以是路径、已编码的PNG/JPEG/KTX2字节或PIL图像
+    png_compress_level: 需要编码的贴图（如合并后的metallicRoughness）的PNG压缩等级，
+        4096贴图时等级1比默认的6快约4倍，文件大约30%
     """
     # 1. 加载OBJ文件
-    mesh = trimesh.load(obj_path)
-
-    # 2. 先导出为临时GLB
-    temp_glb = "temp.glb"
-    mesh.export(temp_glb)
-
-    # 3. 加载GLB文件进行材质编辑
-    gltf = pygltflib.GLTF2().load(temp_glb)
-
-    # 4. 准备纹理数据
-    def image_to_data_uri(image_path):
-        """将图像转换为data URI"""
-        with open(image_path, "rb") as f:
-            image_data = f.read()
-        encoded = base64.b64encode(image_data).decode()
-        return f"data:image/png;base64,{encoded}"
-
-    # 5. 合并metallic和roughness
-    if "metallic" in textures_dict and "roughness" in textures_dict:
-        mr_combined_path = "mr_combined.png"
-        combine_metallic_roughness(textures_dict["metallic"], textures_dict["roughness"], mr_combined_path)
-        textures_dict["metallicRoughness"] = mr_combined_path
-
-    # 6. 添加图像到GLTF
-    images = []
-    textures = []
-
-    texture_mapping = {
-        "albedo": "baseColorTexture",
-        "metallicRoughness": "metallicRoughnessTexture",
-        "normal": "normalTexture",
-        "ao": "occlusionTexture",
-    }
-
-    for tex_type, tex_path in textures_dict.items():
-        if tex_type in texture_mapping and tex_path:
-            # 添加图像
-            image = pygltflib.Image(uri=image_to_data_uri(tex_path))
-            images.append(image)
-
-            # 添加纹理
-            texture = pygltflib.Texture(source=len(images) - 1)
-            textures.append(texture)
-
-    # 7. 创建PBR材质
-    pbr_metallic_roughness = pygltflib.PbrMetallicRoughness(
-        baseColorFactor=[1.0, 1.0, 1.0, 1.0], metallicFactor=1.0, roughnessFactor=1.0
-    )
-
-    # 设置纹理索引
-    texture_index = 0
-    if "albedo" in textures_dict:
-        pbr_metallic_roughness.baseColorTexture = pygltflib.TextureInfo(index=texture_index)
-        texture_index += 1
-
-    if "metallicRoughness" in textures_dict:
-        pbr_metallic_roughness.metallicRoughnessTexture = pygltflib.TextureInfo(index=texture_index)
-        texture_index += 1
-
-    # 创建材质
-    material = pygltflib.Material(name="PBR_Material", pbrMetallicRoughness=pbr_metallic_roughness)
-
-    # 添加法线贴图
-    if "normal" in textures_dict:
-        material.normalTexture = pygltflib.NormalTextureInfo(index=texture_index)
-        texture_index += 1
-
-    # 添加AO贴图
-    if "ao" in textures_dict:
-        material.occlusionTexture = pygltflib.OcclusionTextureInfo(index=texture_index)
-
-    # 8. 更新GLTF
-    gltf.images = images
-    gltf.textures = textures
-    gltf.materials = [material]
-
-    # 确保mesh使用材质
-    if gltf.meshes:
-        for primitive in gltf.meshes[0].primitives:
-            primitive.material = 0
-
-    # 9. 保存最终GLB
-    gltf.save(output_path)
-    print(f"PBR GLB文件已保存: {output_path}")
-
-
+    if isinstance(obj_path, trimesh.Trimesh):
+        mesh = obj_path
+    else:
+        mesh = trimesh.load(obj_path, force="mesh")
+
+    builder = GLBBuilder()
+
+    # 2. 添加贴图；已编码的文件直接嵌入，不重新编码
+    def add_texture(texture):
+        return builder.add_texture(builder.add_image(texture, compress_level=png_compress_level))
+
+    textures = {}
+    if textures_dict.get("albedo"):
+        textures["base_color_texture"] = add_texture(textures_dict["albedo"])
+
+    # 3. 合并metallic和roughness
+    if textures_dict.get("metallicRoughness"):
+        textures["metallic_roughness_texture"] = add_texture(textures_dict["metallicRoughness"])
+    elif textures_dict.get("metallic") and textures_dict.get("roughness"):
+        mr_combined = combine_metallic_roughness(textures_dict["metallic"], textures_dict["roughness"])
+        textures["metallic_roughness_texture"] = add_texture(mr_combined)
+
+    if textures_dict.get("normal"):
+        textures["normal_texture"] = add_texture(textures_dict["normal"])
+    if textures_dict.get("ao"):
+        textures["occlusion_texture"] = add_texture(textures_dict["ao"])
+
+    # 4. 创建PBR材质
+    material = builder.add_pbr_material(**textures)
+
+    # 5. 添加网格
+    uvs = getattr(mesh.visual, "uv", None)
+    if uvs is not None and len(uvs) != len(mesh.vertices):
+        uvs = None
+    builder.add_mesh(mesh.vertices, mesh.faces, uvs=uvs, normals=mesh.vertex_normals, material=material)
+
+    # 6. 保存最终GLB
+    builder.write(output_path)
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"PBR GLB文件已保存: {output_path}")
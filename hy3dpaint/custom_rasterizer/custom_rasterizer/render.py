@@ -16,11 +16,23 @@ import custom_rasterizer_kernel
 import torch
 
 
-def rasterize(pos, tri, resolution, clamp_depth=torch.zeros(0), use_depth_prior=0):
+def rasterize(pos, tri, resolution, clamp_depth=torch.zeros(0), use_depth_prior=0, num_threads=None):
+    """
+    Rasterize one view.
+
+    On CPU the image is split into tiles rasterized by num_threads threads (torch.get_num_threads()
+    when None); the output is bit-identical to the single-threaded kernel, which num_threads=1 selects.
+    """
     assert pos.device == tri.device
-    findices, barycentric = custom_rasterizer_kernel.rasterize_image(
-        pos[0], tri, clamp_depth, resolution[1], resolution[0], 1e-6, use_depth_prior
-    )
+    if pos.device.type == "cpu" and num_threads != 1:
+        findices, barycentric = custom_rasterizer_kernel.rasterize_image_threaded(
+            pos[0], tri, clamp_depth, resolution[1], resolution[0], 1e-6, use_depth_prior,
+            torch.get_num_threads() if num_threads is None else num_threads,
+        )
+    else:
+        findices, barycentric = custom_rasterizer_kernel.rasterize_image(
+            pos[0], tri, clamp_depth, resolution[1], resolution[0], 1e-6, use_depth_prior
+        )
     return findices, barycentric
 
 
@@ -30,3 +42,34 @@ def interpolate(col, findices, barycentric, tri):
     result = barycentric.view(*barycentric.shape, 1) * vcol
     result = torch.sum(result, axis=-2)
     return result.view(1, *result.shape)
+
+
+def rasterize_batch(pos, tri, resolution, clamp_depth=torch.zeros(0), use_depth_prior=0):
+    """
+    Rasterize several views of the same mesh in one call.
+
+    pos: [B, N, 4] clip-space vertex positions, one set per view
+    clamp_depth: [B, H, W] depth prior, used when use_depth_prior is set
+    returns findices [B, H, W] and barycentric [B, H, W, 3]
+    """
+    assert pos.device == tri.device
+    findices, barycentric = custom_rasterizer_kernel.rasterize_image_batch(
+        pos.contiguous(), tri, clamp_depth, resolution[1], resolution[0], 1e-6, use_depth_prior
+    )
+    return findices, barycentric
+
+
+def interpolate_batch(col, findices, barycentric, tri):
+    """
+    Interpolate per-vertex attributes shared by all views.
+
+    col: [1, N, C], findices: [B, H, W], barycentric: [B, H, W, 3]
+    returns [B, H, W, C]
+    """
+    f = (findices - 1 + (findices == 0)).long()
+    tri_f = tri.long()[f]
+    # Accumulate one triangle corner at a time instead of gathering [B, H, W, 3, C] at once.
+    result = barycentric[..., 0:1] * col[0, tri_f[..., 0]]
+    result += barycentric[..., 1:2] * col[0, tri_f[..., 1]]
+    result += barycentric[..., 2:3] * col[0, tri_f[..., 2]]
+    return result
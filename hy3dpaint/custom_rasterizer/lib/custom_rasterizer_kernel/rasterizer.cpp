@@ -1,17 +1,23 @@
 #include "rasterizer.h"
+#include <atomic>
+#include <cmath>
+#include <thread>
 
-void rasterizeTriangleCPU(int idx, float* vt0, float* vt1, float* vt2, int width, int height, INT64* zbuffer, float* d, float occlusion_truncation) {
+// Side length in pixels of the square tiles used by the multi-threaded CPU rasterizer
+#define RASTER_TILE_SIZE 64
+
+// Rasterizes one triangle into the pixels of the rectangle [x0, x1) x [y0, y1).
+// Pixels are visited in the same order and with the same arithmetic for any rectangle,
+// so splitting an image into tiles gives exactly the same z-buffer.
+void rasterizeTriangleCPU(int idx, float* vt0, float* vt1, float* vt2, int width, int height, INT64* zbuffer, float* d, float occlusion_truncation,
+    int x0, int y0, int x1, int y1) {
     float x_min = std::min(vt0[0], std::min(vt1[0],vt2[0]));
     float x_max = std::max(vt0[0], std::max(vt1[0],vt2[0]));
     float y_min = std::min(vt0[1], std::min(vt1[1],vt2[1]));
     float y_max = std::max(vt0[1], std::max(vt1[1],vt2[1]));
 
-    for (int px = x_min; px < x_max + 1; ++px) {
-        if (px < 0 || px >= width)
-            continue;
-        for (int py = y_min; py < y_max + 1; ++py) {
-            if (py < 0 || py >= height)
-                continue;
+    for (int px = std::max(x_min, (float)x0); px < x_max + 1 && px < x1; ++px) {
+        for (int py = std::max(y_min, (float)y0); py < y_max + 1 && py < y1; ++py) {
             float vt[2] = {px + 0.5, py + 0.5};
             float baryCentricCoordinate[3];
             calculateBarycentricCoordinate(vt0, vt1, vt2, vt, baryCentricCoordinate);
@@ -78,17 +84,33 @@ void barycentricFromImgcoordCPU(float* V, int* F, int* findices, INT64* zbuffer,
     barycentric_map[pix * 3 + 2] = barycentric[2];
 }
 
-void rasterizeImagecoordsKernelCPU(float* V, int* F, float* d, INT64* zbuffer, float occlusion_trunc, int width, int height, int num_vertices, int num_faces, int f)
+void screenCoordsCPU(float* V, int* F, int f, int width, int height, float* vt0, float* vt1, float* vt2)
 {
     float* vt0_ptr = V + (F[f * 3] * 4);
     float* vt1_ptr = V + (F[f * 3 + 1] * 4);
     float* vt2_ptr = V + (F[f * 3 + 2] * 4);
 
-    float vt0[3] = {(vt0_ptr[0] / vt0_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f, (0.5f + 0.5f * vt0_ptr[1] / vt0_ptr[3]) * (height - 1) + 0.5f, vt0_ptr[2] / vt0_ptr[3] * 0.49999f + 0.5f};
-    float vt1[3] = {(vt1_ptr[0] / vt1_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f, (0.5f + 0.5f * vt1_ptr[1] / vt1_ptr[3]) * (height - 1) + 0.5f, vt1_ptr[2] / vt1_ptr[3] * 0.49999f + 0.5f};
-    float vt2[3] = {(vt2_ptr[0] / vt2_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f, (0.5f + 0.5f * vt2_ptr[1] / vt2_ptr[3]) * (height - 1) + 0.5f, vt2_ptr[2] / vt2_ptr[3] * 0.49999f + 0.5f};
+    vt0[0] = (vt0_ptr[0] / vt0_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f; vt0[1] = (0.5f + 0.5f * vt0_ptr[1] / vt0_ptr[3]) * (height - 1) + 0.5f; vt0[2] = vt0_ptr[2] / vt0_ptr[3] * 0.49999f + 0.5f;
+    vt1[0] = (vt1_ptr[0] / vt1_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f; vt1[1] = (0.5f + 0.5f * vt1_ptr[1] / vt1_ptr[3]) * (height - 1) + 0.5f; vt1[2] = vt1_ptr[2] / vt1_ptr[3] * 0.49999f + 0.5f;
+    vt2[0] = (vt2_ptr[0] / vt2_ptr[3] * 0.5f + 0.5f) * (width - 1) + 0.5f; vt2[1] = (0.5f + 0.5f * vt2_ptr[1] / vt2_ptr[3]) * (height - 1) + 0.5f; vt2[2] = vt2_ptr[2] / vt2_ptr[3] * 0.49999f + 0.5f;
+}
 
-    rasterizeTriangleCPU(f, vt0, vt1, vt2, width, height, zbuffer, d, occlusion_trunc);
+void rasterizeImagecoordsKernelCPU(float* V, int* F, float* d, INT64* zbuffer, float occlusion_trunc, int width, int height, int num_vertices, int num_faces, int f)
+{
+    float vt0[3], vt1[3], vt2[3];
+    screenCoordsCPU(V, F, f, width, height, vt0, vt1, vt2);
+
+    rasterizeTriangleCPU(f, vt0, vt1, vt2, width, height, zbuffer, d, occlusion_trunc, 0, 0, width, height);
+}
+
+void rasterizeViewCPU(float* V, int* F, float* d, int num_vertices, int num_faces, int width, int height,
+    float occlusion_truncation, int* findices, float* barycentric, INT64* z_min)
+{
+    for (int i = 0; i < num_faces; ++i)
+        rasterizeImagecoordsKernelCPU(V, F, d, z_min, occlusion_truncation, width, height, num_vertices, num_faces, i);
+
+    for (int i = 0; i < width * height; ++i)
+        barycentricFromImgcoordCPU(V, F, findices, z_min, width, height, num_vertices, num_faces, barycentric, i);
 }
 
 std::vector<torch::Tensor> rasterize_image_cpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
@@ -102,22 +124,134 @@ std::vector<torch::Tensor> rasterize_image_cpu(torch::Tensor V, torch::Tensor F,
     INT64 maxint = (INT64)MAXINT * (INT64)MAXINT + (MAXINT - 1);
     auto z_min = torch::ones({height, width}, INT64_options) * (long)maxint;
 
-    if (!use_depth_prior) {
-        for (int i = 0; i < num_faces; ++i) {
-            rasterizeImagecoordsKernelCPU(V.data_ptr<float>(), F.data_ptr<int>(), 0,
-                (INT64*)z_min.data_ptr<long>(), occlusion_truncation, width, height, num_vertices, num_faces, i); 
-        }
-    } else {
-        for (int i = 0; i < num_faces; ++i)
-            rasterizeImagecoordsKernelCPU(V.data_ptr<float>(), F.data_ptr<int>(), D.data_ptr<float>(),
-                (INT64*)z_min.data_ptr<long>(), occlusion_truncation, width, height, num_vertices, num_faces, i);
-    }
+    auto float_options = torch::TensorOptions().dtype(torch::kFloat32).requires_grad(false);
+    auto barycentric = torch::zeros({height, width, 3}, float_options);
+    rasterizeViewCPU(V.data_ptr<float>(), F.data_ptr<int>(), use_depth_prior ? D.data_ptr<float>() : 0,
+        num_vertices, num_faces, width, height, occlusion_truncation,
+        findices.data_ptr<int>(), barycentric.data_ptr<float>(), (INT64*)z_min.data_ptr<long>());
+
+    return {findices, barycentric};
+}
+
+template <typename Fn>
+void runThreads(int num_threads, Fn fn)
+{
+    std::vector<std::thread> threads;
+    for (int t = 1; t < num_threads; ++t)
+        threads.emplace_back(fn, t);
+    fn(0);
+    for (auto& thread : threads)
+        thread.join();
+}
 
+std::vector<torch::Tensor> rasterize_image_tiled_cpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior, int num_threads)
+{
+    int num_faces = F.size(0);
+    int num_vertices = V.size(0);
+    if (num_threads <= 0)
+        num_threads = at::get_num_threads();
+    auto options = torch::TensorOptions().dtype(torch::kInt32).requires_grad(false);
+    auto INT64_options = torch::TensorOptions().dtype(torch::kInt64).requires_grad(false);
     auto float_options = torch::TensorOptions().dtype(torch::kFloat32).requires_grad(false);
+    auto findices = torch::zeros({height, width}, options);
+    INT64 maxint = (INT64)MAXINT * (INT64)MAXINT + (MAXINT - 1);
+    auto z_min = torch::ones({height, width}, INT64_options) * (long)maxint;
     auto barycentric = torch::zeros({height, width, 3}, float_options);
-    for (int i = 0; i < width * height; ++i)
-        barycentricFromImgcoordCPU(V.data_ptr<float>(), F.data_ptr<int>(),
-            findices.data_ptr<int>(), (INT64*)z_min.data_ptr<long>(), width, height, num_vertices, num_faces, barycentric.data_ptr<float>(), i);
+
+    float* V_ptr = V.data_ptr<float>();
+    int* F_ptr = F.data_ptr<int>();
+    float* d = use_depth_prior ? D.data_ptr<float>() : 0;
+    INT64* zbuffer = (INT64*)z_min.data_ptr<long>();
+    int* findices_ptr = findices.data_ptr<int>();
+    float* barycentric_ptr = barycentric.data_ptr<float>();
+
+    int tiles_x = (width + RASTER_TILE_SIZE - 1) / RASTER_TILE_SIZE;
+    int tiles_y = (height + RASTER_TILE_SIZE - 1) / RASTER_TILE_SIZE;
+    int num_tiles = tiles_x * tiles_y;
+
+    // Pass 1: project every face and bin it into the tiles its bounding box overlaps.
+    // Each thread fills its own bins, so no locking is needed.
+    std::vector<float> screen((size_t)num_faces * 9);
+    std::vector<std::vector<std::vector<int>>> bins(num_threads, std::vector<std::vector<int>>(num_tiles));
+    runThreads(num_threads, [&](int t) {
+        int begin = (int)((int64_t)num_faces * t / num_threads);
+        int end = (int)((int64_t)num_faces * (t + 1) / num_threads);
+        for (int f = begin; f < end; ++f) {
+            float* vt = screen.data() + (size_t)f * 9;
+            screenCoordsCPU(V_ptr, F_ptr, f, width, height, vt, vt + 3, vt + 6);
+            float x_min = std::min(vt[0], std::min(vt[3], vt[6]));
+            float x_max = std::max(vt[0], std::max(vt[3], vt[6]));
+            float y_min = std::min(vt[1], std::min(vt[4], vt[7]));
+            float y_max = std::max(vt[1], std::max(vt[4], vt[7]));
+            // Also rejects faces with non-finite coordinates
+            if (!(x_max + 1 > 0 && x_min < width && y_max + 1 > 0 && y_min < height))
+                continue;
+            int tx0 = (int)std::max(x_min, 0.0f) / RASTER_TILE_SIZE;
+            int tx1 = (int)std::min(x_max + 1, (float)(width - 1)) / RASTER_TILE_SIZE;
+            int ty0 = (int)std::max(y_min, 0.0f) / RASTER_TILE_SIZE;
+            int ty1 = (int)std::min(y_max + 1, (float)(height - 1)) / RASTER_TILE_SIZE;
+            for (int ty = ty0; ty <= ty1; ++ty)
+                for (int tx = tx0; tx <= tx1; ++tx)
+                    bins[t][ty * tiles_x + tx].push_back(f);
+        }
+    });
+
+    // Pass 2: tiles own disjoint pixels, so threads update the z-buffer and resolve
+    // barycentrics without synchronisation. Tiles are handed out dynamically.
+    std::atomic<int> next_tile(0);
+    runThreads(num_threads, [&](int t) {
+        for (int tile = next_tile++; tile < num_tiles; tile = next_tile++) {
+            int x0 = (tile % tiles_x) * RASTER_TILE_SIZE;
+            int y0 = (tile / tiles_x) * RASTER_TILE_SIZE;
+            int x1 = std::min(x0 + RASTER_TILE_SIZE, width);
+            int y1 = std::min(y0 + RASTER_TILE_SIZE, height);
+            for (int s = 0; s < num_threads; ++s) {
+                for (int f : bins[s][tile]) {
+                    float* vt = screen.data() + (size_t)f * 9;
+                    rasterizeTriangleCPU(f, vt, vt + 3, vt + 6, width, height, zbuffer, d, occlusion_truncation, x0, y0, x1, y1);
+                }
+            }
+            for (int py = y0; py < y1; ++py)
+                for (int px = x0; px < x1; ++px)
+                    barycentricFromImgcoordCPU(V_ptr, F_ptr, findices_ptr, zbuffer, width, height, num_vertices, num_faces,
+                        barycentric_ptr, py * width + px);
+        }
+    });
+
+    return {findices, barycentric};
+}
+
+std::vector<torch::Tensor> rasterize_image_batch_cpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior)
+{
+    int num_views = V.size(0);
+    int num_vertices = V.size(1);
+    int num_faces = F.size(0);
+    auto options = torch::TensorOptions().dtype(torch::kInt32).requires_grad(false);
+    auto INT64_options = torch::TensorOptions().dtype(torch::kInt64).requires_grad(false);
+    auto float_options = torch::TensorOptions().dtype(torch::kFloat32).requires_grad(false);
+    auto findices = torch::zeros({num_views, height, width}, options);
+    INT64 maxint = (INT64)MAXINT * (INT64)MAXINT + (MAXINT - 1);
+    auto z_min = torch::ones({num_views, height, width}, INT64_options) * (long)maxint;
+    auto barycentric = torch::zeros({num_views, height, width, 3}, float_options);
+
+    float* V_ptr = V.data_ptr<float>();
+    int* F_ptr = F.data_ptr<int>();
+    float* D_ptr = use_depth_prior ? D.data_ptr<float>() : 0;
+    int* findices_ptr = findices.data_ptr<int>();
+    float* barycentric_ptr = barycentric.data_ptr<float>();
+    INT64* z_min_ptr = (INT64*)z_min.data_ptr<long>();
+    int num_pixels = width * height;
+
+    // Views are independent: each one owns its slice of the z-buffer and outputs.
+    at::parallel_for(0, num_views, 1, [&](int64_t begin, int64_t end) {
+        for (int64_t b = begin; b < end; ++b) {
+            rasterizeViewCPU(V_ptr + b * num_vertices * 4, F_ptr, D_ptr ? D_ptr + b * num_pixels : 0,
+                num_vertices, num_faces, width, height, occlusion_truncation,
+                findices_ptr + b * num_pixels, barycentric_ptr + b * num_pixels * 3, z_min_ptr + b * num_pixels);
+        }
+    });
 
     return {findices, barycentric};
 }
@@ -132,8 +266,30 @@ std::vector<torch::Tensor> rasterize_image(torch::Tensor V, torch::Tensor F, tor
         return rasterize_image_gpu(V, F, D, width, height, occlusion_truncation, use_depth_prior);
 }
 
+std::vector<torch::Tensor> rasterize_image_threaded(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior, int num_threads)
+{
+    int device_id = V.get_device();
+    if (device_id == -1)
+        return rasterize_image_tiled_cpu(V, F, D, width, height, occlusion_truncation, use_depth_prior, num_threads);
+    else
+        return rasterize_image_gpu(V, F, D, width, height, occlusion_truncation, use_depth_prior);
+}
+
+std::vector<torch::Tensor> rasterize_image_batch(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior)
+{
+    int device_id = V.get_device();
+    if (device_id == -1)
+        return rasterize_image_batch_cpu(V, F, D, width, height, occlusion_truncation, use_depth_prior);
+    else
+        return rasterize_image_batch_gpu(V, F, D, width, height, occlusion_truncation, use_depth_prior);
+}
+
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m) {
   m.def("rasterize_image", &rasterize_image, "Custom image rasterization");
+  m.def("rasterize_image_threaded", &rasterize_image_threaded, "Custom image rasterization, tile-binned and multi-threaded on CPU");
+  m.def("rasterize_image_batch", &rasterize_image_batch, "Custom image rasterization of several views of one mesh");
   m.def("build_hierarchy", &build_hierarchy, "Custom image rasterization");
   m.def("build_hierarchy_with_feat", &build_hierarchy_with_feat, "Custom image rasterization");
 }
@@ -43,6 +43,9 @@ __host__ __device__  inline bool isBarycentricCoordInBounds(float* barycentricCo
 std::vector<torch::Tensor> rasterize_image_gpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
     int width, int height, float occlusion_truncation, int use_depth_prior);
 
+std::vector<torch::Tensor> rasterize_image_batch_gpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior);
+
 std::vector<std::vector<torch::Tensor>> build_hierarchy(std::vector<torch::Tensor> view_layer_positions, std::vector<torch::Tensor> view_layer_normals, int num_level, int resolution);
 
 std::vector<std::vector<torch::Tensor>> build_hierarchy_with_feat(
@@ -125,3 +125,37 @@ std::vector<torch::Tensor> rasterize_image_gpu(torch::Tensor V, torch::Tensor F,
 
     return {findices, barycentric};
 }
+
+std::vector<torch::Tensor> rasterize_image_batch_gpu(torch::Tensor V, torch::Tensor F, torch::Tensor D,
+    int width, int height, float occlusion_truncation, int use_depth_prior)
+{
+    int device_id = V.get_device();
+    cudaSetDevice(device_id);
+    int num_views = V.size(0);
+    int num_vertices = V.size(1);
+    int num_faces = F.size(0);
+    int num_pixels = width * height;
+    auto options = torch::TensorOptions().dtype(torch::kInt32).device(torch::kCUDA, device_id).requires_grad(false);
+    auto INT64_options = torch::TensorOptions().dtype(torch::kInt64).device(torch::kCUDA, device_id).requires_grad(false);
+    auto float_options = torch::TensorOptions().dtype(torch::kFloat32).device(torch::kCUDA, device_id).requires_grad(false);
+    auto findices = torch::zeros({num_views, height, width}, options);
+    INT64 maxint = (INT64)MAXINT * (INT64)MAXINT + (MAXINT - 1);
+    auto z_min = torch::ones({num_views, height, width}, INT64_options) * (long)maxint;
+    auto barycentric = torch::zeros({num_views, height, width, 3}, float_options);
+
+    float* V_ptr = V.data_ptr<float>();
+    int* F_ptr = F.data_ptr<int>();
+    float* D_ptr = use_depth_prior ? D.data_ptr<float>() : 0;
+    cudaStream_t stream = at::cuda::getCurrentCUDAStream();
+    for (int64_t b = 0; b < num_views; ++b) {
+        float* V_view = V_ptr + b * num_vertices * 4;
+        INT64* z_view = (INT64*)z_min.data_ptr<long>() + b * num_pixels;
+        rasterizeImagecoordsKernelGPU<<<(num_faces+255)/256,256,0,stream>>>(V_view, F_ptr, D_ptr ? D_ptr + b * num_pixels : 0,
+            z_view, occlusion_truncation, width, height, num_vertices, num_faces);
+        barycentricFromImgcoordGPU<<<(num_pixels + 255)/256,256,0,stream>>>(V_view, F_ptr,
+            findices.data_ptr<int>() + b * num_pixels, z_view, width, height, num_vertices, num_faces,
+            barycentric.data_ptr<float>() + b * num_pixels * 3);
+    }
+
+    return {findices, barycentric};
+}
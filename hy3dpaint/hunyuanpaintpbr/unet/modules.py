@@ -119,21 +119,8 @@ def _chunked_feed_forward(ff: nn.Module, hidden_states: torch.Tensor, chunk_dim:
 
 
 @torch.no_grad()
-def compute_voxel_grid_mask(position, grid_resolution=8):
-
-    """Generates view-to-view attention mask based on 3D position similarity.
-    
-    Uses voxel grid downsampling to determine spatially adjacent regions.
-    Mask indicates where features should interact across different views.
-    
-    Args:
-        position: Position maps [B, N, 3, H, W] (normalized 0-1)
-        grid_resolution: Spatial reduction factor
-        
-    Returns:
-        torch.Tensor: Attention mask [B, N*grid_res**2, N*grid_res**2]
-    """
-
+def _voxel_grid_positions(position, grid_resolution):
+    """Mean position of every grid cell, [B, N, grid_res**2, 3] half; cells with fewer than 5 valid pixels are 0."""
     position = position.half()
     B, N, _, H, W = position.shape
     assert H % grid_resolution == 0 and W % grid_resolution == 0
@@ -163,6 +150,26 @@ def compute_voxel_grid_mask(position, grid_resolution=8):
 
     grid_position = grid_position.permute(0, 1, 4, 2, 3)
     grid_position = rearrange(grid_position, "b n c h w -> b n (h w) c")
+    return grid_position
+
+
+@torch.no_grad()
+def compute_voxel_grid_mask(position, grid_resolution=8):
+
+    """Generates view-to-view attention mask based on 3D position similarity.
+    
+    Uses voxel grid downsampling to determine spatially adjacent regions.
+    Mask indicates where features should interact across different views.
+    
+    Args:
+        position: Position maps [B, N, 3, H, W] (normalized 0-1)
+        grid_resolution: Spatial reduction factor
+        
+    Returns:
+        torch.Tensor: Attention mask [B, N, N, grid_res**2, grid_res**2]
+    """
+
+    grid_position = _voxel_grid_positions(position, grid_resolution)
 
     grid_position_expanded_1 = grid_position.unsqueeze(2).unsqueeze(4)  # 形状变为 B, N, 1, L, 1, 3
     grid_position_expanded_2 = grid_position.unsqueeze(1).unsqueeze(3)  # 形状变为 B, 1, N, 1, L, 3
@@ -177,6 +184,144 @@ def compute_voxel_grid_mask(position, grid_resolution=8):
     return weights
 
 
+@torch.no_grad()
+def compute_voxel_grid_neighbors(position, grid_resolution=8):
+
+    """Sparse counterpart of compute_voxel_grid_mask.
+    
+    Hashes the grid cell positions into buckets as large as the neighbour distance,
+    so that only tokens in the 27 surrounding buckets are compared. Memory and time
+    grow with the number of neighbour pairs instead of (N * grid_res**2)**2.
+    
+    Cells without geometry sit at the origin in compute_voxel_grid_mask and are all
+    neighbours of each other. That block is not listed pair by pair; it is given by
+    `invalid` instead (`voxel_neighbors_to_dense` restores it).
+    
+    Args:
+        position: Position maps [B, N, 3, H, W] (normalized 0-1)
+        grid_resolution: Spatial reduction factor
+        
+    Returns:
+        dict: Neighbour lists over the B * N * grid_res**2 tokens (view-major within a batch item):
+            crow_indices: [B * T + 1] CSR row offsets
+            col_indices: [nnz] key token index within the batch item, sorted per row
+            invalid: [B, T] tokens without geometry, neighbours of each other
+            num_tokens: T = N * grid_res**2
+    """
+
+    grid_position = _voxel_grid_positions(position, grid_resolution)
+    B, N, L, _ = grid_position.shape
+    T = N * L
+    device = grid_position.device
+    points = grid_position.reshape(B * T, 3)
+    grid_distance = 1.73 / grid_resolution
+
+    invalid = (points == 0).all(dim=-1)
+    valid_idx = torch.nonzero(~invalid).squeeze(-1)
+    batch_of = valid_idx // T
+
+    # Buckets slightly larger than the neighbour distance, so that half-precision rounding of the
+    # distance can never make a neighbour two buckets away
+    cells = torch.floor(points[valid_idx].float() / (grid_distance * 1.01)).long() + 1
+    cells_per_axis = int(cells.max().item()) + 2 if len(valid_idx) else 1
+    keys = ((batch_of * cells_per_axis + cells[:, 0]) * cells_per_axis + cells[:, 1]) * cells_per_axis + cells[:, 2]
+    keys, order = torch.sort(keys)
+    sorted_idx = valid_idx[order]
+
+    queries, candidates = [], []
+    offsets = torch.tensor(
+        [[dx, dy, dz] for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)], device=device
+    )
+    for offset in offsets:
+        neighbour_cells = cells + offset
+        neighbour_keys = (
+            (batch_of * cells_per_axis + neighbour_cells[:, 0]) * cells_per_axis + neighbour_cells[:, 1]
+        ) * cells_per_axis + neighbour_cells[:, 2]
+        start = torch.searchsorted(keys, neighbour_keys, right=False)
+        end = torch.searchsorted(keys, neighbour_keys, right=True)
+        counts = end - start
+        query = torch.repeat_interleave(valid_idx, counts)
+        # Position of every candidate within its bucket range
+        first = torch.repeat_interleave(start - torch.cumsum(counts, 0) + counts, counts)
+        candidate = sorted_idx[first + torch.arange(len(query), device=device)]
+        queries.append(query)
+        candidates.append(candidate)
+    query = torch.cat(queries)
+    candidate = torch.cat(candidates)
+    # Same half-precision distance test as compute_voxel_grid_mask
+    keep = torch.norm(points[query] - points[candidate], dim=-1) < grid_distance
+    query, candidate = query[keep], candidate[keep]
+
+    # Tokens with geometry close enough to the origin are also neighbours of every token without geometry
+    near_origin = (~invalid) & (torch.norm(points, dim=-1) < grid_distance)
+    if near_origin.any() and invalid.any():
+        near_idx = torch.nonzero(near_origin).squeeze(-1)
+        invalid_idx = torch.nonzero(invalid).squeeze(-1)
+        same_batch = (near_idx[:, None] // T) == (invalid_idx[None, :] // T)
+        near_pairs, invalid_pairs = torch.nonzero(same_batch, as_tuple=True)
+        query = torch.cat([query, near_idx[near_pairs], invalid_idx[invalid_pairs]])
+        candidate = torch.cat([candidate, invalid_idx[invalid_pairs], near_idx[near_pairs]])
+
+    order = torch.argsort(query * T + candidate % T)
+    query, candidate = query[order], candidate[order]
+    crow_indices = torch.zeros(B * T + 1, dtype=torch.long, device=device)
+    crow_indices[1:] = torch.cumsum(torch.bincount(query, minlength=B * T), 0)
+    return {
+        "crow_indices": crow_indices,
+        "col_indices": candidate % T,
+        "invalid": invalid.reshape(B, T),
+        "num_tokens": T,
+    }
+
+
+def voxel_neighbors_to_dense(neighbors):
+
+    """Expands compute_voxel_grid_neighbors output to the [B, T, T] mask of compute_multi_resolution_mask.
+    
+    Args:
+        neighbors: Output of compute_voxel_grid_neighbors
+        
+    Returns:
+        torch.Tensor: Boolean attention mask [B, T, T]
+    """
+
+    invalid = neighbors["invalid"]
+    B, T = invalid.shape
+    crow_indices = neighbors["crow_indices"]
+    rows = torch.repeat_interleave(torch.arange(B * T, device=invalid.device), crow_indices[1:] - crow_indices[:-1])
+    mask = torch.zeros(B, T, T, dtype=torch.bool, device=invalid.device)
+    mask[rows // T, rows % T, neighbors["col_indices"]] = True
+    mask |= invalid[:, :, None] & invalid[:, None, :]
+    return mask
+
+
+def voxel_neighbors_to_block_mask(neighbors, block_size=64):
+
+    """Block-sparse layout of compute_voxel_grid_neighbors output for blocked attention kernels.
+
+    Args:
+        neighbors: Output of compute_voxel_grid_neighbors
+        block_size: Query and key tokens per block
+
+    Returns:
+        torch.Tensor: Boolean mask [B, ceil(T / block_size), ceil(T / block_size)], True where a
+            block contains at least one neighbour pair
+    """
+
+    invalid = neighbors["invalid"]
+    B, T = invalid.shape
+    num_blocks = (T + block_size - 1) // block_size
+    crow_indices = neighbors["crow_indices"]
+    rows = torch.repeat_interleave(torch.arange(B * T, device=invalid.device), crow_indices[1:] - crow_indices[:-1])
+    block_mask = torch.zeros(B, num_blocks, num_blocks, dtype=torch.bool, device=invalid.device)
+    block_mask[rows // T, (rows % T) // block_size, neighbors["col_indices"] // block_size] = True
+    invalid_batch, invalid_token = torch.nonzero(invalid, as_tuple=True)
+    invalid_blocks = torch.zeros(B, num_blocks, dtype=torch.bool, device=invalid.device)
+    invalid_blocks[invalid_batch, invalid_token // block_size] = True
+    block_mask |= invalid_blocks[:, :, None] & invalid_blocks[:, None, :]
+    return block_mask
+
+
 def compute_multi_resolution_mask(position_maps, grid_resolutions=[32, 16, 8]):
 
     """Generates attention masks at multiple spatial resolutions.
@@ -200,6 +345,26 @@ def compute_multi_resolution_mask(position_maps, grid_resolutions=[32, 16, 8]):
     return position_attn_mask
 
 
+def compute_sparse_multi_resolution_mask(position_maps, grid_resolutions=[32, 16, 8]):
+
+    """Sparse counterpart of compute_multi_resolution_mask.
+    
+    Args:
+        position_maps: Position maps [B, N, 3, H, W]
+        grid_resolutions: List of downsampling factors
+        
+    Returns:
+        dict: compute_voxel_grid_neighbors outputs keyed by flattened dimension size
+    """
+
+    position_attn_neighbors = {}
+    with torch.no_grad():
+        for grid_resolution in grid_resolutions:
+            neighbors = compute_voxel_grid_neighbors(position_maps, grid_resolution)
+            position_attn_neighbors[neighbors["num_tokens"]] = neighbors
+    return position_attn_neighbors
+
+
 @torch.no_grad()
 def compute_discrete_voxel_indice(position, grid_resolution=8, voxel_resolution=128):
 
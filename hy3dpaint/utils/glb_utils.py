@@ -0,0 +1,345 @@
+# Hunyuan 3D is licensed under the TENCENT HUNYUAN NON-COMMERCIAL LICENSE AGREEMENT
+# except for the third-party components listed below.
+# Hunyuan 3D does not impose any additional limitations beyond what is outlined
+# in the repsective licenses of these third-party components.
+# Users must comply with all terms and conditions of original licenses of these third-party
+# components and must ensure that the usage of the third party components adheres to
+# all relevant laws and regulations.
+
+# For avoidance of doubts, Hunyuan 3D means the large language models and
+# their software and algorithms, including trained model weights, parameters (including
+# optimizer states), machine-learning model code, inference-enabling code, training-enabling code,
+# fine-tuning enabling code and other elements of the foregoing made publicly available
+# by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
+
+import io
+import json
+import os
+import struct
+
+import numpy as np
+from PIL import Image
+
+GLB_MAGIC = 0x46546C67
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+COMPONENT_TYPES = {
+    np.dtype(np.int8): 5120,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+ACCESSOR_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\xabKTX 20\xbb\r\n\x1a\n", "image/ktx2"),
+]
+
+
+def image_mime_type(data):
+    """
+    Detect the glTF mime type of encoded image bytes from their signature.
+
+    Args:
+        data: PNG, JPEG or KTX2 file contents
+
+    Returns:
+        str: "image/png", "image/jpeg" or "image/ktx2"
+    """
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if bytes(data[: len(signature)]) == signature:
+            return mime_type
+    raise ValueError("Unsupported image data: expected PNG, JPEG or KTX2")
+
+
+def encode_image(image, image_format="PNG", **save_kwargs):
+    """
+    Encode an image for embedding, without touching the disk.
+
+    Args:
+        image: Encoded bytes, a file path, a PIL image or a uint8 HxW(xC) array
+        image_format: PIL format used when the image has to be encoded
+        **save_kwargs: Extra PIL save options (e.g. quality=95)
+
+    Returns:
+        bytes: Encoded image; bytes and files are returned as they are
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            return f.read()
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image_format.upper() in ("JPEG", "JPG") and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **save_kwargs)
+    return buffer.getvalue()
+
+
+class GLBBuilder:
+    """
+    Assembles a binary glTF 2.0 file in memory.
+
+    Mesh attributes, indices and encoded images all become bufferViews of a
+    single binary chunk, so nothing is base64 encoded and no intermediate file
+    is written. The chunk is never concatenated: `write` streams the header,
+    the JSON and each piece of binary data to the target in turn.
+
+    Example:
+        builder = GLBBuilder()
+        albedo = builder.add_texture(builder.add_image("albedo.jpg"))
+        material = builder.add_pbr_material(base_color_texture=albedo)
+        builder.add_mesh(vertices, faces, uvs=uvs, normals=normals, material=material)
+        builder.write("textured_mesh.glb")
+    """
+
+    def __init__(self, generator="Hunyuan3D-2.1"):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": generator},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "textures": [],
+            "images": [],
+            "samplers": [],
+            "accessors": [],
+            "bufferViews": [],
+            "buffers": [],
+        }
+        self._blobs = []
+        self._byte_length = 0
+
+    def _append(self, key, item):
+        self.gltf[key].append(item)
+        return len(self.gltf[key]) - 1
+
+    def add_buffer_view(self, data, target=None):
+        """
+        Append raw bytes to the binary chunk.
+
+        Args:
+            data: Bytes-like object (numpy arrays are taken as C-contiguous bytes)
+            target: ARRAY_BUFFER or ELEMENT_ARRAY_BUFFER for vertex data, None for images
+
+        Returns:
+            int: bufferView index
+        """
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data)
+        data = memoryview(data).cast("B")
+        # Every bufferView starts on a 4 byte boundary, as accessors require
+        padding = -self._byte_length % 4
+        if padding:
+            self._blobs.append(b"\x00" * padding)
+            self._byte_length += padding
+        buffer_view = {"buffer": 0, "byteOffset": self._byte_length, "byteLength": len(data)}
+        if target is not None:
+            buffer_view["target"] = target
+        self._blobs.append(data)
+        self._byte_length += len(data)
+        return self._append("bufferViews", buffer_view)
+
+    def add_accessor(self, array, target=ARRAY_BUFFER, with_bounds=False):
+        """
+        Add a typed array as an accessor.
+
+        Args:
+            array: Array of shape [count] or [count, 1-4] with a glTF component type
+            target: bufferView target
+            with_bounds: Store min/max (required for POSITION)
+
+        Returns:
+            int: accessor index
+        """
+        array = np.ascontiguousarray(array)
+        if array.dtype not in COMPONENT_TYPES:
+            raise ValueError(f"Unsupported accessor dtype: {array.dtype}")
+        components = 1 if array.ndim == 1 else array.shape[1]
+        accessor = {
+            "bufferView": self.add_buffer_view(array, target),
+            "componentType": COMPONENT_TYPES[array.dtype],
+            "count": len(array),
+            "type": ACCESSOR_TYPES[components],
+        }
+        if with_bounds:
+            accessor["min"] = array.reshape(len(array), components).min(axis=0).tolist()
+            accessor["max"] = array.reshape(len(array), components).max(axis=0).tolist()
+        return self._append("accessors", accessor)
+
+    def add_image(self, image, mime_type=None, image_format="PNG", **save_kwargs):
+        """
+        Embed an image as a bufferView.
+
+        Args:
+            image: Encoded bytes, a file path, a PIL image or a uint8 array (see encode_image)
+            mime_type: Overrides the type detected from the encoded bytes
+            image_format: PIL format for images that still have to be encoded
+            **save_kwargs: Extra PIL save options
+
+        Returns:
+            int: image index
+        """
+        data = encode_image(image, image_format, **save_kwargs)
+        mime_type = mime_type or image_mime_type(data)
+        return self._append("images", {"bufferView": self.add_buffer_view(data), "mimeType": mime_type})
+
+    def add_texture(self, image_index, sampler=None):
+        """
+        Add a texture sampling an embedded image.
+
+        KTX2 images are referenced through KHR_texture_basisu, which is then
+        declared as a required extension.
+
+        Args:
+            image_index: Index returned by add_image
+            sampler: Optional glTF sampler dict; linear/mipmapped repeat is the default
+
+        Returns:
+            int: texture index
+        """
+        texture = {}
+        if sampler is not None:
+            texture["sampler"] = self._append("samplers", sampler)
+        if self.gltf["images"][image_index]["mimeType"] == "image/ktx2":
+            texture["extensions"] = {"KHR_texture_basisu": {"source": image_index}}
+            for key in ("extensionsUsed", "extensionsRequired"):
+                extensions = self.gltf.setdefault(key, [])
+                if "KHR_texture_basisu" not in extensions:
+                    extensions.append("KHR_texture_basisu")
+        else:
+            texture["source"] = image_index
+        return self._append("textures", texture)
+
+    def add_pbr_material(
+        self,
+        base_color_texture=None,
+        metallic_roughness_texture=None,
+        normal_texture=None,
+        occlusion_texture=None,
+        base_color_factor=(1.0, 1.0, 1.0, 1.0),
+        metallic_factor=1.0,
+        roughness_factor=1.0,
+        name="PBR_Material",
+    ):
+        """
+        Add a metallic-roughness material.
+
+        Args:
+            base_color_texture: Texture index of the albedo map
+            metallic_roughness_texture: Texture index of the combined map (G roughness, B metallic)
+            normal_texture: Texture index of the tangent-space normal map
+            occlusion_texture: Texture index of the ambient occlusion map (R channel)
+            base_color_factor, metallic_factor, roughness_factor: Material factors
+            name: Material name
+
+        Returns:
+            int: material index
+        """
+        pbr = {
+            "baseColorFactor": list(base_color_factor),
+            "metallicFactor": metallic_factor,
+            "roughnessFactor": roughness_factor,
+        }
+        if base_color_texture is not None:
+            pbr["baseColorTexture"] = {"index": base_color_texture}
+        if metallic_roughness_texture is not None:
+            pbr["metallicRoughnessTexture"] = {"index": metallic_roughness_texture}
+        material = {"name": name, "pbrMetallicRoughness": pbr}
+        if normal_texture is not None:
+            material["normalTexture"] = {"index": normal_texture}
+        if occlusion_texture is not None:
+            material["occlusionTexture"] = {"index": occlusion_texture}
+        return self._append("materials", material)
+
+    def add_mesh(self, vertices, faces, uvs=None, normals=None, material=None, name=None):
+        """
+        Add a triangle mesh and a scene node instancing it.
+
+        Args:
+            vertices: [V, 3] positions
+            faces: [F, 3] vertex indices
+            uvs: Optional [V, 2] texture coordinates with the OBJ convention (v up); flipped for glTF
+            normals: Optional [V, 3] vertex normals
+            material: Optional material index
+            name: Optional mesh name
+
+        Returns:
+            int: mesh index
+        """
+        attributes = {"POSITION": self.add_accessor(np.asarray(vertices, dtype=np.float32), with_bounds=True)}
+        if normals is not None:
+            attributes["NORMAL"] = self.add_accessor(np.asarray(normals, dtype=np.float32))
+        if uvs is not None:
+            uvs = np.array(uvs, dtype=np.float32)[:, :2]
+            uvs[:, 1] = 1.0 - uvs[:, 1]
+            attributes["TEXCOORD_0"] = self.add_accessor(uvs)
+        faces = np.asarray(faces)
+        index_dtype = np.uint16 if len(vertices) <= np.iinfo(np.uint16).max else np.uint32
+        primitive = {
+            "attributes": attributes,
+            "indices": self.add_accessor(faces.astype(index_dtype).reshape(-1), target=ELEMENT_ARRAY_BUFFER),
+            "mode": 4,
+        }
+        if material is not None:
+            primitive["material"] = material
+        mesh = {"primitives": [primitive]}
+        if name is not None:
+            mesh["name"] = name
+        mesh_index = self._append("meshes", mesh)
+        node = self._append("nodes", {"mesh": mesh_index})
+        self.gltf["scenes"][0]["nodes"].append(node)
+        return mesh_index
+
+    def _json_chunk(self):
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if self._byte_length:
+            gltf["buffers"] = [{"byteLength": self._byte_length}]
+        data = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        return data + b" " * (-len(data) % 4)
+
+    def write(self, file):
+        """
+        Stream the GLB to a path or a binary file object.
+
+        Args:
+            file: Output path or writable binary file object
+
+        Returns:
+            int: Number of bytes written
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "wb") as f:
+                return self.write(f)
+
+        json_chunk = self._json_chunk()
+        bin_padding = -self._byte_length % 4
+        bin_length = self._byte_length + bin_padding
+        total_length = 12 + 8 + len(json_chunk) + (8 + bin_length if self._byte_length else 0)
+        file.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total_length))
+        file.write(struct.pack("<II", len(json_chunk), CHUNK_JSON))
+        file.write(json_chunk)
+        if self._byte_length:
+            file.write(struct.pack("<II", bin_length, CHUNK_BIN))
+            for blob in self._blobs:
+                file.write(blob)
+            file.write(b"\x00" * bin_padding)
+        return total_length
+
+    def to_bytes(self):
+        """Return the whole GLB as bytes."""
+        buffer = io.BytesIO()
+        self.write(buffer)
+        return buffer.getvalue()
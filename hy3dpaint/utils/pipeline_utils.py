@@ -14,6 +14,61 @@
 
 import torch
 import numpy as np
+import scipy.sparse
+
+from DifferentiableRenderer.MeshRender import TextureBakeAccumulator
+
+
+def build_view_face_visibility(face_index_maps, num_faces):
+    """
+    Sparse view x face visibility matrix.
+
+    Args:
+        face_index_maps: Per-view arrays of 1-indexed face ids (0 = background), as rendered by render_alpha
+        num_faces: Number of mesh faces
+
+    Returns:
+        scipy.sparse.csr_matrix of shape [views, num_faces + 1]; entry (v, f) is 1 when face f covers a pixel of view v
+    """
+    visibility = np.zeros((len(face_index_maps), num_faces + 1), dtype=bool)
+    for view, face_index_map in enumerate(face_index_maps):
+        # Scattering into a bitmap is much cheaper than sorting every pixel with np.unique
+        visibility[view, np.asarray(face_index_map).reshape(-1)] = True
+    return scipy.sparse.csr_matrix(visibility, dtype=np.float64)
+
+
+def greedy_view_selection(visibility, face_area_ratios, num_initial_views, max_selected_view_num, min_increment=0.01):
+    """
+    Greedy area coverage: starting from the first num_initial_views views, repeatedly add the
+    view that sees the largest area not seen yet, while that area exceeds min_increment.
+
+    Ties go to the lowest view index. Gains of all candidates are computed at once as a
+    sparse matrix-vector product with the areas of the faces that are still uncovered.
+
+    Args:
+        visibility: View x face matrix from build_view_face_visibility
+        face_area_ratios: Area fraction per face, with the same (1-indexed) face axis
+
+    Returns:
+        List of selected view indices, in selection order
+    """
+    num_views = visibility.shape[0]
+    selected = list(range(min(num_initial_views, num_views)))
+    is_selected = np.zeros(num_views, dtype=bool)
+    is_selected[selected] = True
+    covered = np.zeros(visibility.shape[1], dtype=bool)
+    covered[visibility[selected].indices] = True
+
+    for _ in range(max_selected_view_num - len(selected)):
+        gains = visibility @ np.where(covered, 0.0, face_area_ratios)
+        gains[is_selected] = -np.inf
+        best = int(np.argmax(gains))
+        if not gains[best] > min_increment:
+            break
+        selected.append(best)
+        is_selected[best] = True
+        covered[visibility[best].indices] = True
+    return selected
 
 
 class ViewProcessor:
@@ -22,18 +77,14 @@ class ViewProcessor:
         self.render = render
 
     def render_normal_multiview(self, camera_elevs, camera_azims, use_abs_coor=True):
-        normal_maps = []
-        for elev, azim in zip(camera_elevs, camera_azims):
-            normal_map = self.render.render_normal(elev, azim, use_abs_coor=use_abs_coor, return_type="pl")
-            normal_maps.append(normal_map)
+        normal_maps = self.render.render_normal_batch(
+            camera_elevs, camera_azims, use_abs_coor=use_abs_coor, return_type="pl"
+        )
 
         return normal_maps
 
     def render_position_multiview(self, camera_elevs, camera_azims):
-        position_maps = []
-        for elev, azim in zip(camera_elevs, camera_azims):
-            position_map = self.render.render_position(elev, azim, return_type="pl")
-            position_maps.append(position_map)
+        position_maps = self.render.render_position_batch(camera_elevs, camera_azims, return_type="pl")
 
         return position_maps
 
@@ -44,83 +95,34 @@ class ViewProcessor:
         original_resolution = self.render.default_resolution
         self.render.set_default_render_resolution(1024)
 
-        selected_camera_elevs = []
-        selected_camera_azims = []
-        selected_view_weights = []
-        selected_alpha_maps = []
-        viewed_tri_idxs = []
-        viewed_masks = []
-
         # 计算每个三角片的面积
         face_areas = self.render.get_face_areas(from_one_index=True)
         total_area = face_areas.sum()
         face_area_ratios = face_areas / total_area
 
-        candidate_view_num = len(candidate_camera_elevs)
         self.render.set_boundary_unreliable_scale(2)
 
-        for elev, azim in zip(candidate_camera_elevs, candidate_camera_azims):
-            viewed_tri_idx = self.render.render_alpha(elev, azim, return_type="np")
-            viewed_tri_idxs.append(set(np.unique(viewed_tri_idx.flatten())))
-            viewed_masks.append(viewed_tri_idx[0, :, :, 0] > 0)
-
-        is_selected = [False for _ in range(candidate_view_num)]
-        total_viewed_tri_idxs = set()
-        total_viewed_area = 0.0
-
-        for idx in range(6):
-            selected_camera_elevs.append(candidate_camera_elevs[idx])
-            selected_camera_azims.append(candidate_camera_azims[idx])
-            selected_view_weights.append(candidate_view_weights[idx])
-            selected_alpha_maps.append(viewed_masks[idx])
-            is_selected[idx] = True
-            total_viewed_tri_idxs.update(viewed_tri_idxs[idx])
-
-        total_viewed_area = face_area_ratios[list(total_viewed_tri_idxs)].sum()
-        for iter in range(max_selected_view_num - len(selected_view_weights)):
-            max_inc = 0
-            max_idx = -1
-
-            for idx, (elev, azim, weight) in enumerate(
-                zip(candidate_camera_elevs, candidate_camera_azims, candidate_view_weights)
-            ):
-                if is_selected[idx]:
-                    continue
-                new_tri_idxs = viewed_tri_idxs[idx] - total_viewed_tri_idxs
-                new_inc_area = face_area_ratios[list(new_tri_idxs)].sum()
-
-                if new_inc_area > max_inc:
-                    max_inc = new_inc_area
-                    max_idx = idx
-
-            if max_inc > 0.01:
-                is_selected[max_idx] = True
-                selected_camera_elevs.append(candidate_camera_elevs[max_idx])
-                selected_camera_azims.append(candidate_camera_azims[max_idx])
-                selected_view_weights.append(candidate_view_weights[max_idx])
-                selected_alpha_maps.append(viewed_masks[max_idx])
-                total_viewed_tri_idxs = total_viewed_tri_idxs.union(viewed_tri_idxs[max_idx])
-                total_viewed_area += max_inc
-            else:
-                break
+        viewed_tri_idx_maps = self.render.render_alpha_batch(candidate_camera_elevs, candidate_camera_azims, return_type="np")
+        visibility = build_view_face_visibility(viewed_tri_idx_maps, len(face_areas) - 1)
+        selected = greedy_view_selection(visibility, face_area_ratios, 6, max_selected_view_num)
+
+        selected_camera_elevs = [candidate_camera_elevs[idx] for idx in selected]
+        selected_camera_azims = [candidate_camera_azims[idx] for idx in selected]
+        selected_view_weights = [candidate_view_weights[idx] for idx in selected]
 
         self.render.set_default_render_resolution(original_resolution)
 
         return selected_camera_elevs, selected_camera_azims, selected_view_weights
 
     def bake_from_multiview(self, views, camera_elevs, camera_azims, view_weights):
-        project_textures, project_weighted_cos_maps = [], []
-        project_boundary_maps = []
+        # Fold every back-projected view into running sums once instead of re-merging all previous views
+        accumulator = TextureBakeAccumulator(self.render.texture_size, self.render.device)
 
         for view, camera_elev, camera_azim, weight in zip(views, camera_elevs, camera_azims, view_weights):
-            project_texture, project_cos_map, project_boundary_map = self.render.back_project(
-                view, camera_elev, camera_azim
-            )
+            project_texture, project_cos_map, _ = self.render.back_project(view, camera_elev, camera_azim)
             project_cos_map = weight * (project_cos_map**self.config.bake_exp)
-            project_textures.append(project_texture)
-            project_weighted_cos_maps.append(project_cos_map)
-            project_boundary_maps.append(project_boundary_map)
-            texture, ori_trust_map = self.render.fast_bake_texture(project_textures, project_weighted_cos_maps)
+            accumulator.add(project_texture, project_cos_map)
+        texture, ori_trust_map = accumulator.result()
         return texture, ori_trust_map > 1e-8
 
     def texture_inpaint(self, texture, mask, defualt=None):
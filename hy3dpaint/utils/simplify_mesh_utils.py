@@ -16,22 +16,53 @@ import trimesh
 import pymeshlab
 
 
-def remesh_mesh(mesh_path, remesh_path):
-    mesh = mesh_simplify_trimesh(mesh_path, remesh_path)
+def meshset_to_trimesh(ms):
+    """Convert the current mesh of a pymeshlab.MeshSet to a trimesh.Trimesh without touching the disk."""
+    current = ms.current_mesh()
+    # process=True merges duplicate vertices like trimesh.load did on the intermediate OBJ
+    return trimesh.Trimesh(vertices=current.vertex_matrix(), faces=current.face_matrix(), process=True)
 
 
-def mesh_simplify_trimesh(inputpath, outputpath, target_count=40000):
-    # 先去除离散面
+def trimesh_to_meshset(mesh):
+    """Wrap a trimesh.Trimesh in a pymeshlab.MeshSet without touching the disk."""
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(vertex_matrix=mesh.vertices, face_matrix=mesh.faces))
+    return ms
+
+
+def load_meshset(inputpath):
     ms = pymeshlab.MeshSet()
     if inputpath.endswith(".glb"):
         ms.load_new_mesh(inputpath, load_in_a_single_layer=True)
     else:
         ms.load_new_mesh(inputpath)
-    ms.save_current_mesh(outputpath.replace(".glb", ".obj"), save_textures=False)
+    return ms
+
+
+def remesh_mesh(mesh_path, remesh_path=None):
+    return mesh_simplify_trimesh(mesh_path, remesh_path)
+
+
+def mesh_simplify_trimesh(inputpath, outputpath=None, target_count=40000):
+    """
+    Load a mesh (path, pymeshlab.MeshSet or trimesh.Trimesh) and reduce it to at most target_count faces.
+
+    The mesh is handed from pymeshlab to trimesh as vertex/face arrays; it is only
+    written to disk when outputpath is given.
+
+    Returns:
+        trimesh.Trimesh: Simplified mesh
+    """
+    if isinstance(inputpath, trimesh.Trimesh):
+        courent = inputpath
+    else:
+        ms = inputpath if isinstance(inputpath, pymeshlab.MeshSet) else load_meshset(inputpath)
+        courent = meshset_to_trimesh(ms)
     # 调用减面函数
-    courent = trimesh.load(outputpath.replace(".glb", ".obj"), force="mesh")
     face_num = courent.faces.shape[0]
 
     if face_num > target_count:
         courent = courent.simplify_quadric_decimation(target_count)
-    courent.export(outputpath)
+    if outputpath is not None:
+        courent.export(outputpath)
+    return courent
@@ -12,18 +12,701 @@
 # fine-tuning enabling code and other elements of the foregoing made publicly available
 # by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
 
+import hashlib
+import math
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import scipy.ndimage
+import scipy.sparse
+import scipy.sparse.linalg
 import trimesh
 import xatlas
+from scipy.sparse.csgraph import connected_components
+
+UV_CACHE_FORMAT_VERSION = 1
+
+
+class UVAtlasCache:
+    """
+    Content-addressed cache of xatlas parametrizations.
+
+    Entries are keyed by a hash of the vertex and face arrays, so texturing the
+    same geometry again (e.g. with another style image) skips parametrization.
+    The most recently used entries are kept in memory; when `cache_dir` is set,
+    entries are also stored there as npz files and the least recently used files
+    are removed beyond `max_disk_entries`.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_entries=8, max_disk_entries=512):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(vertices, faces, **params):
+        digest = hashlib.sha256(f"uv-atlas-v{UV_CACHE_FORMAT_VERSION}{sorted(params.items())}".encode())
+        for array in (vertices, faces):
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remember(self, key, atlas):
+        with self._lock:
+            self._memory[key] = atlas
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached (vmapping, indices, uvs) for a key, or None."""
+        with self._lock:
+            atlas = self._memory.get(key)
+            if atlas is not None:
+                self._memory.move_to_end(key)
+        if atlas is None and self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                with np.load(path) as data:
+                    atlas = (data["vmapping"], data["indices"], data["uvs"])
+                # The file modification time orders the on-disk entries for eviction
+                os.utime(path)
+            except (OSError, KeyError, ValueError):
+                atlas = None
+            if atlas is not None:
+                self._remember(key, atlas)
+        if atlas is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Callers keep the arrays in their mesh, so the cached ones are never handed out
+        return tuple(array.copy() for array in atlas)
+
+    def put(self, key, vmapping, indices, uvs):
+        atlas = (np.array(vmapping), np.array(indices), np.array(uvs))
+        self._remember(key, atlas)
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, vmapping=atlas[0], indices=atlas[1], uvs=atlas[2])
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: failed to write UV atlas cache entry: {e}")
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        entries.sort()
+        for _, path in entries[:max(len(entries) - self.max_disk_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+uv_atlas_cache = UVAtlasCache(
+    cache_dir=os.environ.get("HY3DGEN_UV_CACHE_DIR"),
+    max_memory_entries=int(os.environ.get("HY3DGEN_UV_CACHE_MEMORY_ENTRIES", "8")),
+    max_disk_entries=int(os.environ.get("HY3DGEN_UV_CACHE_DISK_ENTRIES", "512")),
+)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _neighbour_pairs(neighbours, faces):
+    """(face, neighbour) pairs for every neighbour of `faces` in a CSR adjacency matrix."""
+    starts = neighbours.indptr[faces]
+    counts = neighbours.indptr[faces + 1] - starts
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    return np.repeat(faces, counts), neighbours.indices[offsets]
+
+
+def _merge_cones(axis_a, angle_a, axis_b, angle_b):
+    """Smallest cones (axis, half-angle) containing pairs of normal cones."""
+    phi = np.arccos(np.clip(np.einsum('ij,ij->i', axis_a, axis_b), -1.0, 1.0))
+    angle = (phi + angle_a + angle_b) / 2
+    turn = angle - angle_a
+    sin_phi = np.sin(phi)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        axis = (np.sin(phi - turn)[:, None] * axis_a + np.sin(turn)[:, None] * axis_b) / sin_phi[:, None]
+    axis = np.where((sin_phi > 1e-12)[:, None], axis, axis_a)
+    a_holds_b = phi + angle_b <= angle_a
+    b_holds_a = phi + angle_a <= angle_b
+    axis = np.where(a_holds_b[:, None], axis_a, np.where(b_holds_a[:, None], axis_b, axis))
+    angle = np.where(a_holds_b, angle_a, np.where(b_holds_a, angle_b, angle))
+    return _normalize(axis), angle
+
+
+def _cone_angles(normals, labels, directions, valid):
+    """Half-angle of every chart's normal cone around its direction; degenerate faces are ignored."""
+    dots = np.where(valid, np.einsum('ij,ij->i', normals, directions[labels]), 1.0)
+    min_dots = np.ones(len(directions))
+    np.minimum.at(min_dots, labels, dots)
+    return np.arccos(np.clip(min_dots, -1.0, 1.0))
+
+
+def segment_charts(mesh, max_stretch=1.5, seed_spacing=None, smooth_iterations=3, min_chart_faces=32,
+                   max_axis_angle=75.0, merge_iterations=32):
+    """
+    Split a mesh into charts whose planar projection has bounded stretch.
+
+    Projecting a face tilted by an angle a from the projection direction shrinks it by
+    cos(a) across the tilt, an L2 stretch of sqrt((1 + 1 / cos(a)^2) / 2). Every chart
+    therefore keeps its face normals inside a cone around its direction whose half-angle
+    is the tilt at which this reaches `max_stretch`, so projecting it never flips a
+    triangle and LSCM starts from a bounded-stretch layout.
+
+    Charts are grown breadth-first from seeds spread over the surface on a grid of
+    `seed_spacing` (a sixth of the bounding box diagonal by default), each around the
+    smoothed normal at its seed, so surface noise within the cone does not split them.
+    Faces that no chart can take seed the next round. Adjacent charts are then merged,
+    tightest union first, while their joint cone stays within the bound, and charts with
+    fewer than `min_chart_faces` faces are folded into the neighbour they share most
+    edges with when its direction is within `max_axis_angle` degrees of all their faces.
+
+    Returns:
+        Tuple of (chart id per face, unit direction per chart)
+    """
+    if max_stretch <= 1.0:
+        raise ValueError(f"max_stretch must be greater than 1, got {max_stretch}")
+    normals = np.asarray(mesh.face_normals, dtype=np.float64)
+    centers = np.asarray(mesh.triangles_center, dtype=np.float64)
+    areas = np.asarray(mesh.area_faces, dtype=np.float64)
+    adjacency = np.asarray(mesh.face_adjacency, dtype=np.int64).reshape(-1, 2)
+    num_faces = len(normals)
+    valid = areas > 1e-20
+    neighbours = scipy.sparse.csr_matrix(
+        (np.ones(2 * len(adjacency)), (adjacency.reshape(-1), adjacency[:, ::-1].reshape(-1))),
+        shape=(num_faces, num_faces),
+    )
+    smoothed = normals * areas[:, None]
+    for _ in range(smooth_iterations):
+        smoothed = smoothed + neighbours @ smoothed
+    smoothed = _normalize(smoothed)
+    max_angle = math.acos(1.0 / math.sqrt(2 * max_stretch ** 2 - 1))
+    min_dot = math.cos(max_angle)
+    if seed_spacing is None:
+        seed_spacing = max(float(np.linalg.norm(np.ptp(centers, axis=0))) / 6, 1e-12) if num_faces else 1.0
+
+    labels = np.full(num_faces, -1, dtype=np.int64)
+    directions = np.zeros((0, 3))
+    while True:
+        free = np.flatnonzero(labels < 0)
+        if len(free) == 0:
+            break
+        # One seed per grid cell: the face that agrees best with its smoothed normal
+        cells = np.floor(centers[free] / seed_spacing).astype(np.int64)
+        cells -= cells.min(axis=0)
+        cell_keys = np.ravel_multi_index(cells.T, cells.max(axis=0) + 1)
+        agreement = np.where(valid[free], np.einsum('ij,ij->i', normals[free], smoothed[free]), -2.0)
+        order = np.lexsort((-agreement, cell_keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = cell_keys[order[1:]] != cell_keys[order[:-1]]
+        seeds = free[order[first]]
+        # A seed outside the cone of its smoothed normal keeps its own; degenerate seeds have none
+        own_normal = valid[seeds] & (agreement[order[first]] <= min_dot)
+        seed_directions = np.where(own_normal[:, None], normals[seeds], smoothed[seeds])
+        seed_directions[np.linalg.norm(seed_directions, axis=1) == 0] = (0.0, 0.0, 1.0)
+        labels[seeds] = len(directions) + np.arange(len(seeds))
+        directions = np.concatenate([directions, seed_directions])
+
+        frontier = seeds
+        while len(frontier):
+            src, dst = _neighbour_pairs(neighbours, frontier)
+            free_dst = labels[dst] < 0
+            src, dst = src[free_dst], dst[free_dst]
+            charts = labels[src]
+            scores = np.where(valid[dst], np.einsum('ij,ij->i', normals[dst], directions[charts]), 1.0)
+            fits = scores > min_dot
+            dst, charts, scores = dst[fits], charts[fits], scores[fits]
+            # A face reachable from several charts joins the one it is best aligned with
+            order = np.lexsort((-scores, dst))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = dst[order[1:]] != dst[order[:-1]]
+            frontier = dst[order[first]]
+            labels[frontier] = charts[order[first]]
+
+    angles = _cone_angles(normals, labels, directions, valid)
+    for _ in range(merge_iterations):
+        pairs = labels[adjacency]
+        pairs = np.unique(np.sort(pairs[pairs[:, 0] != pairs[:, 1]], axis=1), axis=0)
+        if len(pairs) == 0:
+            break
+        axes, merged_angles = _merge_cones(directions[pairs[:, 0]], angles[pairs[:, 0]],
+                                           directions[pairs[:, 1]], angles[pairs[:, 1]])
+        candidates = np.flatnonzero(merged_angles <= max_angle)
+        if len(candidates) == 0:
+            break
+        # Every chart takes part in at most one merge per pass, so the cones stay exact
+        parent = np.arange(len(directions))
+        used = np.zeros(len(directions), dtype=bool)
+        for candidate in candidates[np.argsort(merged_angles[candidates], kind='stable')].tolist():
+            a, b = pairs[candidate]
+            if not used[a] and not used[b]:
+                used[a] = used[b] = True
+                parent[b] = a
+                directions[a] = axes[candidate]
+        kept, labels = np.unique(parent[labels], return_inverse=True)
+        directions = directions[kept]
+        angles = _cone_angles(normals, labels, directions, valid)
+
+    # Fold small charts into the neighbouring chart they share most edges with, when all their faces allow it
+    min_fold_dot = math.cos(math.radians(max_axis_angle))
+    rows = np.arange(num_faces)
+    for _ in range(merge_iterations):
+        num_charts = len(directions)
+        chart_sizes = np.bincount(labels, minlength=num_charts)
+        pairs = labels[adjacency]
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        pairs = np.concatenate([pairs, pairs[:, ::-1]])
+        pairs = pairs[chart_sizes[pairs[:, 0]] < min_chart_faces]
+        if len(pairs) == 0:
+            break
+        pair_keys, pair_counts = np.unique(pairs[:, 0] * num_charts + pairs[:, 1], return_counts=True)
+        order = np.lexsort((-pair_counts, pair_keys // num_charts))
+        small = pair_keys[order] // num_charts
+        first = np.ones(len(small), dtype=bool)
+        first[1:] = small[1:] != small[:-1]
+        small, target = small[first], pair_keys[order][first] % num_charts
+        # Charts that receive a fold keep their own faces this pass
+        keep = ~np.isin(small, target)
+        small, target = small[keep], target[keep]
+        target_of = np.full(num_charts, -1, dtype=np.int64)
+        target_of[small] = target
+        face_target = target_of[labels]
+        movable = rows[face_target >= 0]
+        face_ok = ~valid[movable] | (
+            np.einsum('ij,ij->i', normals[movable], directions[face_target[movable]]) > min_fold_dot)
+        allowed = np.ones(num_charts, dtype=bool)
+        np.logical_and.at(allowed, labels[movable], face_ok)
+        fold = (target_of >= 0) & allowed
+        if not fold.any():
+            break
+        labels = np.where(fold[labels], target_of[labels], labels)
+        kept, labels = np.unique(labels, return_inverse=True)
+        directions = directions[kept]
+    return labels, directions
+
+
+def _axis_basis(axis):
+    # Orthonormal (t1, t2) with t1 x t2 = axis, so triangles facing the axis keep their orientation
+    helper = np.array([0.0, 0.0, 1.0]) if abs(axis[2]) < 0.9 else np.array([1.0, 0.0, 0.0])
+    t1 = np.cross(helper, axis)
+    t1 /= np.linalg.norm(t1)
+    t2 = np.cross(axis, t1)
+    return t1, t2
+
+
+def _signed_areas(uvs, faces):
+    a, b, c = uvs[faces[:, 0]], uvs[faces[:, 1]], uvs[faces[:, 2]]
+    return 0.5 * ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1]))
+
+
+def _lscm(positions, faces, initial, regularization=1e-9):
+    """
+    Least squares conformal map of one chart, pinned at the two vertices farthest
+    apart in `initial` and weakly regularized towards it so that vertices only
+    touching degenerate triangles stay in place.
+    """
+    num_vertices = len(positions)
+    q0, q1, q2 = positions[faces[:, 0]], positions[faces[:, 1]], positions[faces[:, 2]]
+    # Triangle coordinates in its own plane: q0 at the origin, q1 on the x axis
+    e1 = q1 - q0
+    len1 = np.linalg.norm(e1, axis=1)
+    e1 = e1 / np.maximum(len1, 1e-20)[:, None]
+    d2 = q2 - q0
+    x2 = np.einsum('ij,ij->i', d2, e1)
+    y2 = np.linalg.norm(np.cross(e1, d2), axis=1)
+    double_area = len1 * y2
+    valid = double_area > 1e-20
+    scale = 1.0 / np.sqrt(np.where(valid, double_area, 1.0))
+    scale[~valid] = 0.0
+    # Complex coefficients W_j = (x_k - x_i) + i (y_k - y_i) for the edge opposite each corner
+    xs = np.stack([np.zeros_like(len1), len1, x2], axis=1)
+    ys = np.stack([np.zeros_like(len1), np.zeros_like(len1), y2], axis=1)
+    w_real = np.stack([xs[:, 2] - xs[:, 1], xs[:, 0] - xs[:, 2], xs[:, 1] - xs[:, 0]], axis=1) * scale[:, None]
+    w_imag = np.stack([ys[:, 2] - ys[:, 1], ys[:, 0] - ys[:, 2], ys[:, 1] - ys[:, 0]], axis=1) * scale[:, None]
+
+    num_faces = len(faces)
+    rows = np.repeat(np.arange(num_faces), 3)
+    cols = faces.reshape(-1)
+    m1 = scipy.sparse.csr_matrix((w_real.reshape(-1), (rows, cols)), shape=(num_faces, num_vertices))
+    m2 = scipy.sparse.csr_matrix((w_imag.reshape(-1), (rows, cols)), shape=(num_faces, num_vertices))
+    system = scipy.sparse.bmat([[m1, -m2], [m2, m1]], format='csc')
+
+    span = initial.max(axis=0) - initial.min(axis=0)
+    pin_axis = int(np.argmax(span))
+    pins = np.array([np.argmin(initial[:, pin_axis]), np.argmax(initial[:, pin_axis])])
+    pinned = np.concatenate([pins, pins + num_vertices])
+    free = np.setdiff1d(np.arange(2 * num_vertices), pinned)
+    x_init = np.concatenate([initial[:, 0], initial[:, 1]])
+
+    a_free = system[:, free]
+    rhs = -(system[:, pinned] @ x_init[pinned])
+    normal = (a_free.T @ a_free).tocsc()
+    weight = regularization * max(normal.diagonal().mean(), 1e-20)
+    normal = normal + weight * scipy.sparse.identity(len(free), format='csc')
+    solution = scipy.sparse.linalg.spsolve(normal, a_free.T @ rhs + weight * x_init[free])
+
+    x = x_init.copy()
+    x[free] = solution
+    return np.stack([x[:num_vertices], x[num_vertices:]], axis=1)
+
+
+def _parametrize_chart(positions, faces, axis, use_lscm=True):
+    """
+    Flatten one chart. Returns vertex uvs scaled so that the uv area matches the 3D surface area.
+    """
+    t1, t2 = _axis_basis(axis)
+    projection = np.stack([positions @ t1, positions @ t2], axis=1)
+    uvs = projection
+    if use_lscm and len(faces) > 1:
+        try:
+            conformal = _lscm(positions, faces, projection)
+            areas = _signed_areas(conformal, faces)
+            if np.all(np.isfinite(conformal)) and areas.sum() < 0:
+                conformal[:, 0] = -conformal[:, 0]
+                areas = -areas
+            # LSCM can fold charts that are far from a disk; the projection never flips a triangle of the chart
+            if np.all(np.isfinite(conformal)) and np.all(areas >= 0):
+                uvs = conformal
+        except (RuntimeError, ValueError, np.linalg.LinAlgError):
+            pass
+
+    surface_area = 0.5 * np.linalg.norm(
+        np.cross(positions[faces[:, 1]] - positions[faces[:, 0]], positions[faces[:, 2]] - positions[faces[:, 0]]),
+        axis=1,
+    ).sum()
+    uv_area = np.abs(_signed_areas(uvs, faces)).sum()
+    if uv_area > 0 and surface_area > 0:
+        uvs = uvs * math.sqrt(surface_area / uv_area)
+
+    # Align the principal axis with u, which starts the packer from a compact orientation
+    centered = uvs - uvs.mean(axis=0)
+    if len(uvs) > 2:
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        rotation = vt.T
+        if np.linalg.det(rotation) < 0:
+            rotation[:, 1] = -rotation[:, 1]
+        centered = centered @ rotation
+    return centered - centered.min(axis=0)
+
+
+def _boundary_edges(faces):
+    """Edges used by a single face, i.e. the outline of a chart."""
+    num_vertices = int(faces.max()) + 1
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    keys, counts = np.unique(edges[:, 0] * num_vertices + edges[:, 1], return_counts=True)
+    keys = keys[counts == 1]
+    return np.stack([keys // num_vertices, keys % num_vertices], axis=1)
+
+
+def _column_profile(points, edges, column_width, margin):
+    """
+    Lowest and highest point of a chart outline in every column of `column_width`, grown by
+    `margin` on all sides. The outline must start at x = y = margin.
+    """
+    num_columns = max(int(math.ceil((points[:, 0].max() + margin) / column_width)), 1)
+    bottom = np.full(num_columns, np.inf)
+    top = np.full(num_columns, -np.inf)
+    start, end = points[edges[:, 0]], points[edges[:, 1]]
+    swap = start[:, 0] > end[:, 0]
+    start, end = np.where(swap[:, None], end, start), np.where(swap[:, None], start, end)
+    # Split every edge at the column boundaries; the outline's extremes in a column lie on these pieces
+    first = np.minimum((start[:, 0] // column_width).astype(np.int64), num_columns - 1)
+    last = np.minimum((end[:, 0] // column_width).astype(np.int64), num_columns - 1)
+    spans = last - first + 1
+    piece_edges = np.repeat(np.arange(len(edges)), spans)
+    columns = np.repeat(first - (np.cumsum(spans) - spans), spans) + np.arange(spans.sum())
+    x0, y0 = start[piece_edges, 0], start[piece_edges, 1]
+    x1, y1 = end[piece_edges, 0], end[piece_edges, 1]
+    slope = np.divide(y1 - y0, x1 - x0, out=np.zeros_like(x0), where=x1 > x0)
+    ya = y0 + slope * (np.maximum(x0, columns * column_width) - x0)
+    yb = y0 + slope * (np.minimum(x1, (columns + 1) * column_width) - x0)
+    np.minimum.at(bottom, columns, np.minimum(ya, yb))
+    np.maximum.at(top, columns, np.maximum(ya, yb))
+    # Only the margin columns are crossed by no edge, and growing the profile by the margin fills them
+    grow = int(math.ceil(margin / column_width))
+    bottom = scipy.ndimage.minimum_filter1d(bottom, 2 * grow + 1, mode='nearest') - margin
+    top = scipy.ndimage.maximum_filter1d(top, 2 * grow + 1, mode='nearest') + margin
+    return bottom, top
+
+
+# Rotations by 0, 90, 180 and 270 degrees; reflections would flip the triangles of a chart
+QUARTER_TURNS = np.array([[[1, 0], [0, 1]], [[0, -1], [1, 0]], [[-1, 0], [0, -1]], [[0, 1], [-1, 0]]], dtype=np.float64)
+
+
+def _skyline_pack(chart_outlines, num_columns, column_width, margin):
+    """
+    Place charts on a skyline, trying each chart in four 90-degree rotations at every column.
+
+    A chart is lowered onto the skyline with its column profile, so it fills the space
+    next to and above the charts placed before it rather than a whole row. Each chart
+    goes where its top ends lowest, breaking ties by the area left empty below it.
+
+    Returns:
+        Per-chart (rotation, x, y) offsets and the height of the skyline
+    """
+    skyline = np.zeros(num_columns)
+    placements = []
+    for points, edges in chart_outlines:
+        best = None
+        for rotation in range(4):
+            rotated = points @ QUARTER_TURNS[rotation].T
+            rotated = rotated - rotated.min(axis=0) + margin
+            bottom, top = _column_profile(rotated, edges, column_width, margin)
+            width = len(bottom)
+            if width > num_columns:
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(skyline, width)
+            lowest = (windows - bottom).max(axis=1)
+            tops = lowest + top.max()
+            # The empty area below the chart only breaks ties, so it is measured where the top is lowest
+            ties = np.flatnonzero(tops == tops.min())
+            waste = (lowest[ties, None] + bottom - windows[ties]).sum(axis=1)
+            x = int(ties[np.argmin(waste)])
+            score = (tops[x], waste.min())
+            if best is None or score < best[0]:
+                best = (score, rotation, x, lowest[x], top, rotated)
+        if best is None:
+            return None, math.inf
+        _, rotation, x, y, top, rotated = best
+        skyline[x:x + len(top)] = y + top
+        placements.append((rotated, x * column_width, y))
+    return placements, float(skyline.max())
+
+
+def pack_charts(chart_uvs, chart_faces, texture_size=4096, padding=2, iterations=12):
+    """
+    Pack charts into the unit square with a uniform texel density.
+
+    The density is the largest one (found by bisection) for which skyline packing of the
+    chart outlines (_skyline_pack), each grown by `padding` / 2 texels, fits into a
+    `texture_size` x `texture_size` texture. Outlines are resolved on columns of
+    `texture_size` / 1024 texels (at least one).
+
+    Returns:
+        List of per-chart uv arrays in [0, 1]
+    """
+    outlines = [(uvs, _boundary_edges(faces)) for uvs, faces in zip(chart_uvs, chart_faces)]
+    # Largest charts first, so small ones fill the gaps left between them
+    order = np.argsort([-np.prod(uvs.max(axis=0) - uvs.min(axis=0)) for uvs in chart_uvs], kind='stable')
+    column_width = max(texture_size // 1024, 1)
+    num_columns = texture_size // column_width
+    margin = padding / 2
+    total_area = max(sum(float(np.abs(_signed_areas(uvs, faces)).sum())
+                         for uvs, faces in zip(chart_uvs, chart_faces)), 1e-20)
+
+    def layout(density):
+        return _skyline_pack([(outlines[i][0] * density, outlines[i][1]) for i in order],
+                             num_columns, column_width, margin)
+
+    # At this density the charts alone cover the whole texture
+    low, high = 0.0, math.sqrt(texture_size * texture_size / total_area)
+    for _ in range(iterations):
+        placements, height = layout((low + high) / 2)
+        if height <= texture_size:
+            low = (low + high) / 2
+        else:
+            high = (low + high) / 2
+    placements, height = layout(low if low > 0 else high)
+    # Only with more charts than texels would the layout still overflow; shrink it into the square then
+    scale = max(texture_size, height)
+    packed = [None] * len(chart_uvs)
+    for i, (rotated, x, y) in zip(order, placements):
+        packed[i] = (rotated + (x, y)) / scale
+    return packed
+
+
+def chart_parametrize(vertices, faces, texture_size=4096, padding=2, max_workers=None, use_lscm=True,
+                      min_parallel_faces=200000, max_stretch=1.5):
+    """
+    Parametrize a mesh chart by chart; a fallback for when xatlas.parametrize cannot be used.
+
+    The mesh is segmented into charts (segment_charts), every chart is flattened
+    (least squares conformal maps, falling back to a planar projection for charts
+    that would fold) and the charts are packed into an atlas for `texture_size`
+    (pack_charts). Charts are bounded by `max_stretch` rather than optimized
+    jointly, so the atlas has more seams than xatlas produces; xatlas stays the
+    default and this is only meant for meshes xatlas cannot handle.
+
+    Charts are flattened in spawned worker processes for meshes with at least
+    `min_parallel_faces` faces; below that, starting the workers costs more than
+    flattening the charts in this process.
+
+    Args:
+        vertices: Vertex positions [N, 3]
+        faces: Triangle vertex indices [F, 3]
+        texture_size: Texture resolution the atlas is packed for
+        padding: Gap between charts in texels
+        max_workers: Number of worker processes (defaults to the number of CPUs)
+        use_lscm: Flatten charts with LSCM; False projects them onto their chart direction
+        min_parallel_faces: Smallest mesh that is flattened in worker processes
+        max_stretch: Largest L2 stretch of the planar projection of a chart (segment_charts)
+
+    Returns:
+        Tuple of (vmapping, indices, uvs) with the same meaning as xatlas.parametrize:
+        the original vertex of every atlas vertex, the faces indexing atlas vertices
+        (in input face order) and the atlas vertex uvs in [0, 1]
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    mesh = trimesh.Trimesh(vertices, faces, process=False)
+    chart_ids, chart_directions = segment_charts(mesh, max_stretch=max_stretch)
+
+    # One atlas vertex per (chart, original vertex); sorting the keys groups the vertices of each chart
+    num_vertices = len(vertices)
+    chart_ids = chart_ids.astype(np.int64)
+    keys = chart_ids[:, None] * num_vertices + faces
+    unique_keys, inverse = np.unique(keys.reshape(-1), return_inverse=True)
+    indices = inverse.reshape(-1, 3)
+    vmapping = unique_keys % num_vertices
+    vertex_charts = unique_keys // num_vertices
+    num_charts = len(chart_directions)
+    vertex_starts = np.searchsorted(vertex_charts, np.arange(num_charts + 1))
+    face_order = np.argsort(chart_ids, kind='stable')
+    face_starts = np.searchsorted(chart_ids[face_order], np.arange(num_charts + 1))
+
+    # Largest charts first, so the pool does not end on a long tail
+    chart_sizes = np.diff(face_starts)
+    schedule = np.argsort(-chart_sizes, kind='stable').tolist()
+    chart_faces = [indices[face_order[face_starts[chart]:face_starts[chart + 1]]] - vertex_starts[chart]
+                   for chart in range(num_charts)]
+    chart_args = (
+        [vertices[vmapping[vertex_starts[chart]:vertex_starts[chart + 1]]] for chart in schedule],
+        [chart_faces[chart] for chart in schedule],
+        [chart_directions[chart] for chart in schedule],
+        repeat(use_lscm),
+    )
+    max_workers = min(max_workers or os.cpu_count() or 1, num_charts)
+    if max_workers > 1 and len(faces) >= min_parallel_faces:
+        # The LSCM solves hold the GIL for most of their time, so only processes flatten charts in parallel
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            flattened = dict(zip(schedule, pool.map(_parametrize_chart, *chart_args,
+                                                    chunksize=max(num_charts // (8 * max_workers), 1))))
+    else:
+        flattened = dict(zip(schedule, map(_parametrize_chart, *chart_args)))
+    chart_uvs = pack_charts([flattened[chart] for chart in range(num_charts)], chart_faces, texture_size, padding)
+
+    uvs = np.concatenate(chart_uvs, axis=0) if chart_uvs else np.zeros((0, 2))
+    return vmapping.astype(np.uint32), indices.astype(np.uint32), uvs.astype(np.float32)
+
+
+def uv_atlas_quality(vertices, faces, vmapping, indices, uvs):
+    """
+    Quality metrics of a UV atlas.
+
+    Returns:
+        Dict with
+        - stretch: area-weighted L2 texture stretch (Sander et al. 2001), normalized so that
+          an isometric parametrization at any uniform scale scores 1.0;
+        - max_stretch: largest per-face L2 stretch, with the same normalization;
+        - utilisation: fraction of the unit uv square covered by triangles;
+        - flipped_faces: number of faces whose uv orientation differs from the majority;
+        - charts: number of connected uv charts.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    uvs = np.asarray(uvs, dtype=np.float64)
+    indices = np.asarray(indices, dtype=np.int64)
+    positions = vertices[np.asarray(vmapping, dtype=np.int64)]
+    q1, q2, q3 = positions[indices[:, 0]], positions[indices[:, 1]], positions[indices[:, 2]]
+    s1, s2, s3 = uvs[indices[:, 0], 0], uvs[indices[:, 1], 0], uvs[indices[:, 2], 0]
+    t1, t2, t3 = uvs[indices[:, 0], 1], uvs[indices[:, 1], 1], uvs[indices[:, 2], 1]
+
+    uv_area = ((s2 - s1) * (t3 - t1) - (s3 - s1) * (t2 - t1)) / 2
+    surface_area = np.linalg.norm(np.cross(q2 - q1, q3 - q1), axis=1) / 2
+    orientation = 1.0 if uv_area.sum() >= 0 else -1.0
+    flipped = int(np.count_nonzero(uv_area * orientation < 0))
+
+    valid = (np.abs(uv_area) > 1e-20) & (surface_area > 1e-20)
+    safe_area = np.where(valid, 2 * uv_area, 1.0)[:, None]
+    d_s = (q1 * (t2 - t3)[:, None] + q2 * (t3 - t1)[:, None] + q3 * (t1 - t2)[:, None]) / safe_area
+    d_t = (q1 * (s3 - s2)[:, None] + q2 * (s1 - s3)[:, None] + q3 * (s2 - s1)[:, None]) / safe_area
+    face_stretch = np.sqrt((np.einsum('ij,ij->i', d_s, d_s) + np.einsum('ij,ij->i', d_t, d_t)) / 2)
+
+    total_uv_area = np.abs(uv_area[valid]).sum()
+    total_surface_area = surface_area[valid].sum()
+    normalization = math.sqrt(total_uv_area / total_surface_area) if total_surface_area > 0 else 0.0
+    stretch = math.sqrt((face_stretch[valid] ** 2 * surface_area[valid]).sum() / max(total_surface_area, 1e-20))
+
+    num_uv_vertices = len(uvs)
+    edges = indices[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    graph = scipy.sparse.coo_matrix(
+        (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(num_uv_vertices, num_uv_vertices)
+    )
+    _, labels = connected_components(graph, directed=False)
+    num_charts = len(np.unique(labels[indices[:, 0]])) if len(indices) else 0
+
+    return {
+        "stretch": stretch * normalization,
+        "max_stretch": float(face_stretch[valid].max() * normalization) if valid.any() else 0.0,
+        "utilisation": float(total_uv_area),
+        "flipped_faces": flipped,
+        "charts": num_charts,
+    }
+
+
+def mesh_uv_wrap(mesh, cache=uv_atlas_cache, method="xatlas", texture_size=4096):
+    """
+    Replace the mesh with a UV-unwrapped copy of it.
 
+    Args:
+        mesh: trimesh.Trimesh or trimesh.Scene
+        cache: UVAtlasCache to look the atlas up in; None always parametrizes
+        method: "xatlas", or "charts" for the chart_parametrize fallback
+        texture_size: Texture resolution the "charts" atlas is packed for
 
-def mesh_uv_wrap(mesh):
+    Returns:
+        trimesh.Trimesh with split vertices and uvs
+    """
     if isinstance(mesh, trimesh.Scene):
         mesh = mesh.dump(concatenate=True)
 
     if len(mesh.faces) > 500000000:
         raise ValueError("The mesh has more than 500,000,000 faces, which is not supported.")
+    if method not in ("xatlas", "charts"):
+        raise ValueError(f"Unknown UV unwrapping method {method}")
 
-    vmapping, indices, uvs = xatlas.parametrize(mesh.vertices, mesh.faces)
+    params = {"method": method} if method == "xatlas" else {"method": method, "texture_size": texture_size}
+    atlas = None
+    if cache is not None:
+        key = cache.key(mesh.vertices, mesh.faces, **params)
+        atlas = cache.get(key)
+    if atlas is None:
+        if method == "charts":
+            atlas = chart_parametrize(mesh.vertices, mesh.faces, texture_size=texture_size)
+        else:
+            atlas = xatlas.parametrize(mesh.vertices, mesh.faces)
+        if cache is not None:
+            cache.put(key, *atlas)
+    vmapping, indices, uvs = atlas
 
     mesh.vertices = mesh.vertices[vmapping]
     mesh.faces = indices
@@ -0,0 +1,140 @@
+# Hunyuan 3D is licensed under the TENCENT HUNYUAN NON-COMMERCIAL LICENSE AGREEMENT
+# except for the third-party components listed below.
+# Hunyuan 3D does not impose any additional limitations beyond what is outlined
+# in the repsective licenses of these third-party components.
+# Users must comply with all terms and conditions of original licenses of these third-party
+# components and must ensure that the usage of the third party components adheres to
+# all relevant laws and regulations.
+
+# For avoidance of doubts, Hunyuan 3D means the large language models and
+# their software and algorithms, including trained model weights, parameters (including
+# optimizer states), machine-learning model code, inference-enabling code, training-enabling code,
+# fine-tuning enabling code and other elements of the foregoing made publicly available
+# by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import torch
+
+from .utils import logger
+
+
+class _BatchItem:
+    def __init__(self, image, num_inference_steps, guidance_scale, seed):
+        self.image = image
+        self.key = (int(num_inference_steps), float(guidance_scale))
+        self.seed = seed
+        self.future = Future()
+
+
+class ShapeBatcher:
+    """ Micro-batching front-end for `Hunyuan3DDiTFlowMatchingPipeline`.
+
+        Requests submitted from different threads within `max_wait` seconds of each
+        other are grouped by `(num_inference_steps, guidance_scale)` and sampled as a
+        single DiT batch. Each future resolves to the latents of its own item with
+        shape `[1, *vae.latent_shape]`, ready for per-item volume decoding via
+        `pipeline._export`.
+
+        Every item is sampled with its own seeded generator, so the result of a
+        request does not depend on which other requests it was batched with.
+
+        Example:
+        ```python
+        batcher = ShapeBatcher(pipeline, max_batch_size=4).start()
+        latents = batcher.submit(image, num_inference_steps=5, guidance_scale=5.0, seed=1234).result()
+        mesh = pipeline._export(latents, octree_resolution=256)[0]
+        ```
+    """
+
+    def __init__(self, pipeline, max_batch_size=4, max_wait=0.05):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="shape-batcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, image, num_inference_steps=50, guidance_scale=5.0, seed=None):
+        """ Queue one image for sampling and return a future resolving to its latents. """
+        item = _BatchItem(image, num_inference_steps, guidance_scale, seed)
+        self._queue.put(item)
+        return item.future
+
+    def _collect(self):
+        """ Block for the first item, then gather more until the window closes or the batch is full. """
+        first = self._queue.get()
+        if first is None:
+            return None, True
+        items = [first]
+        stop = False
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            items.append(item)
+        return items, stop
+
+    def _run(self):
+        while True:
+            items, stop = self._collect()
+            if items:
+                groups = OrderedDict()
+                for item in items:
+                    groups.setdefault(item.key, []).append(item)
+                for (num_inference_steps, guidance_scale), group in groups.items():
+                    self._run_group(group, num_inference_steps, guidance_scale)
+            if stop:
+                break
+
+    def _run_group(self, group, num_inference_steps, guidance_scale):
+        device = self.pipeline.device
+        generators = []
+        for item in group:
+            generator = torch.Generator(device=device)
+            if item.seed is not None:
+                generator.manual_seed(int(item.seed))
+            else:
+                generator.seed()
+            generators.append(generator)
+
+        try:
+            start = time.time()
+            latents = self.pipeline(
+                image=[item.image for item in group],
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                generator=generators,
+                output_type='latent',
+                enable_pbar=False,
+            )
+            logger.info(f'Sampled a batch of {len(group)} in {time.time() - start:.2f} seconds')
+        except Exception as e:
+            for item in group:
+                item.future.set_exception(e)
+            return
+
+        for i, item in enumerate(group):
+            item.future.set_result(latents[i:i + 1])
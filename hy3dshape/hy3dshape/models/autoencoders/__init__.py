@@ -16,5 +16,6 @@ from .attention_blocks import CrossAttentionDecoder
 from .attention_processors import FlashVDMCrossAttentionProcessor, CrossAttentionProcessor, \
     FlashVDMTopMCrossAttentionProcessor
 from .model import ShapeVAE, VectsetVAE
-from .surface_extractors import SurfaceExtractors, MCSurfaceExtractor, DMCSurfaceExtractor, Latent2MeshOutput
+from .surface_extractors import SurfaceExtractors, MCSurfaceExtractor, DMCSurfaceExtractor, Latent2MeshOutput, \
+    ParallelMCSurfaceExtractor, SparseMCSurfaceExtractor, SparseGrid, SparseGridLogits
 from .volume_decoders import HierarchicalVolumeDecoding, FlashVDMVolumeDecoding, VanillaVolumeDecoder
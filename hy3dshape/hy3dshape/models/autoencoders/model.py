@@ -223,10 +223,12 @@ class VectsetVAE(nn.Module):
         mc_algo='dmc',
     ):
         if enabled:
+            # 'mc_sparse' consumes the refined near-surface points directly, skipping the dense grid
+            sparse_output = mc_algo == 'mc_sparse'
             if adaptive_kv_selection:
-                self.volume_decoder = FlashVDMVolumeDecoding(topk_mode)
+                self.volume_decoder = FlashVDMVolumeDecoding(topk_mode, sparse_output=sparse_output)
             else:
-                self.volume_decoder = HierarchicalVolumeDecoding()
+                self.volume_decoder = HierarchicalVolumeDecoding(sparse_output=sparse_output)
             if mc_algo not in SurfaceExtractors.keys():
                 raise ValueError(f'Unsupported mc_algo {mc_algo}, available:{list(SurfaceExtractors.keys())}')
             self.surface_extractor = SurfaceExtractors[mc_algo]()
@@ -12,6 +12,9 @@
 # fine-tuning enabling code and other elements of the foregoing made publicly available
 # by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Union, Tuple, List
 
 import numpy as np
@@ -25,6 +28,42 @@ class Latent2MeshOutput:
         self.mesh_f = mesh_f
 
 
+class SparseGrid:
+    """Logits of one item known only at a subset of grid points."""
+
+    def __init__(self, indices, values, grid_size):
+        self.indices = indices
+        self.values = values
+        self.grid_size = tuple(int(g) for g in grid_size)
+
+    def to_dense(self):
+        """Scatter the logits into a dense grid, NaN at the points that were not evaluated."""
+        dense = torch.full(self.grid_size, float('nan'), dtype=self.values.dtype, device=self.values.device)
+        dense[tuple(self.indices.long().T)] = self.values
+        return dense
+
+
+class SparseGridLogits:
+    """
+    Batch of `SparseGrid`, returned by the hierarchical volume decoders with `sparse_output=True`.
+
+    Mirrors the parts of the dense (batch, *grid_size) tensor interface used by `SurfaceExtractor`.
+    """
+
+    def __init__(self, grids):
+        self.grids = list(grids)
+
+    @property
+    def shape(self):
+        return (len(self.grids), *self.grids[0].grid_size)
+
+    def __getitem__(self, i):
+        return self.grids[i]
+
+    def __len__(self):
+        return len(self.grids)
+
+
 def center_vertices(vertices):
     """Translate the vertices so that bounding box is centered at zero."""
     vert_min = vertices.min(dim=0)[0]
@@ -34,6 +73,9 @@ def center_vertices(vertices):
 
 
 class SurfaceExtractor:
+    # Extractors that consume a `SparseGrid` directly; the others receive it densified
+    accepts_sparse = False
+
     def _compute_box_stat(self, bounds: Union[Tuple[float], List[float], float], octree_resolution: int):
         """
         Compute grid size, bounding box minimum coordinates, and bounding box size based on input 
@@ -85,7 +127,10 @@ class SurfaceExtractor:
         outputs = []
         for i in range(grid_logits.shape[0]):
             try:
-                vertices, faces = self.run(grid_logits[i], **kwargs)
+                grid_logit = grid_logits[i]
+                if isinstance(grid_logit, SparseGrid) and not self.accepts_sparse:
+                    grid_logit = grid_logit.to_dense()
+                vertices, faces = self.run(grid_logit, **kwargs)
                 vertices = vertices.astype(np.float32)
                 faces = np.ascontiguousarray(faces)
                 outputs.append(Latent2MeshOutput(mesh_v=vertices, mesh_f=faces))
@@ -124,6 +169,224 @@ class MCSurfaceExtractor(SurfaceExtractor):
         return vertices, faces
 
 
+class ParallelMCSurfaceExtractor(SurfaceExtractor):
+    def __init__(self, num_workers=None, backend='process', min_slab_size=32):
+        """
+        Marching Cubes run in parallel over slabs of the grid on CPU.
+
+        Args:
+            num_workers (int): Number of workers; defaults to the CPU count.
+            backend (str): 'process' or 'thread'. skimage's lewiner implementation holds the
+                GIL, so only the process backend runs slabs truly in parallel. Its workers are
+                spawned rather than forked: forking the multi-threaded, CUDA-initialised server
+                process can deadlock or break CUDA in the children.
+            min_slab_size (int): Minimum number of cells per slab along the first axis.
+        """
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"Unsupported backend {backend}, available: ['process', 'thread']")
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.min_slab_size = min_slab_size
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.backend == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.num_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self, grid_logit, *, mc_level, bounds, octree_resolution, **kwargs):
+        """
+        Extract surface mesh by running Marching Cubes on overlapping slabs and welding the seams.
+
+        Consecutive slabs share one plane of samples along the first axis. Vertices on a shared
+        plane are interpolated from the same samples in both slabs, so they are bitwise
+        identical and can be welded exactly, which keeps the output watertight wherever the
+        single-pass 'mc' output is.
+
+        Args:
+            grid_logit (torch.Tensor): 3D grid logits tensor representing the scalar field.
+            mc_level (float): The level (iso-value) at which to extract the surface.
+            bounds (Union[Tuple[float], List[float], float]): Bounding box coordinates or half side length.
+            octree_resolution (int): Resolution of the octree grid.
+            **kwargs: Additional keyword arguments (ignored).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Tuple containing:
+                - vertices (np.ndarray): Extracted mesh vertices, scaled and translated to bounding
+                  box coordinates.
+                - faces (np.ndarray): Extracted mesh faces (triangles).
+        """
+        volume = grid_logit.cpu().numpy()
+        num_cells = volume.shape[0] - 1
+        num_slabs = max(1, min(self.num_workers, num_cells // self.min_slab_size))
+        edges = np.linspace(0, num_cells, num_slabs + 1).round().astype(int)
+
+        executor = self._get_executor()
+        futures = []
+        for start, end in zip(edges[:-1], edges[1:]):
+            slab = np.ascontiguousarray(volume[start:end + 1])
+            # Slabs without a crossing of the iso-level produce no triangles
+            if np.nanmin(slab) > mc_level or np.nanmax(slab) < mc_level:
+                continue
+            futures.append((start, executor.submit(measure.marching_cubes, slab, mc_level, method="lewiner")))
+
+        vertices, faces = [], []
+        num_vertices = 0
+        for start, future in futures:
+            slab_vertices, slab_faces, _, _ = future.result()
+            slab_vertices = slab_vertices.astype(np.float64)
+            slab_vertices[:, 0] += start
+            vertices.append(slab_vertices)
+            faces.append(slab_faces + num_vertices)
+            num_vertices += len(slab_vertices)
+        if not vertices:
+            raise ValueError("Surface level must be within volume data range.")
+        vertices = np.concatenate(vertices)
+        faces = np.concatenate(faces)
+
+        vertices, faces = self._weld_seams(vertices, faces, np.isin(vertices[:, 0], edges[1:-1]))
+        grid_size, bbox_min, bbox_size = self._compute_box_stat(bounds, octree_resolution)
+        vertices = vertices / grid_size * bbox_size + bbox_min
+        return vertices, faces
+
+    @staticmethod
+    def _weld_seams(vertices, faces, seam_mask):
+        """Merge bitwise-identical vertices selected by `seam_mask` and drop collapsed faces."""
+        remap = np.arange(len(vertices))
+        seam_idx = np.nonzero(seam_mask)[0]
+        if len(seam_idx) > 0:
+            _, first, inverse = np.unique(vertices[seam_idx], axis=0, return_index=True, return_inverse=True)
+            remap[seam_idx] = seam_idx[first][inverse.reshape(-1)]
+        faces = remap[faces]
+
+        # Drop faces collapsed by welding, then compact the vertex array
+        keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+        faces = faces[keep]
+        used, faces = np.unique(faces, return_inverse=True)
+        return vertices[used], faces.reshape(-1, 3)
+
+
+def _extract_brick(brick, mc_level):
+    """Run Marching Cubes on one brick; returns None when the brick has no usable crossing."""
+    if not (np.nanmin(brick) <= mc_level <= np.nanmax(brick)):
+        return None
+    vertices, faces, _, _ = measure.marching_cubes(brick, mc_level, method="lewiner")
+    return vertices, faces
+
+
+class SparseMCSurfaceExtractor(ParallelMCSurfaceExtractor):
+    accepts_sparse = True
+
+    def __init__(self, brick_size=32, num_workers=None, backend='process'):
+        """
+        Marching Cubes over the evaluated points of a `SparseGrid`, without a dense volume.
+
+        The evaluated points are scattered into small (brick_size + 1)^3 bricks, only for
+        bricks that contain evaluated points, and the bricks are processed in parallel.
+
+        Args:
+            brick_size (int): Number of cells per brick along each axis.
+            num_workers (int): Number of workers; defaults to the CPU count.
+            backend (str): 'process' or 'thread'.
+        """
+        super().__init__(num_workers=num_workers, backend=backend)
+        self.brick_size = brick_size
+
+    def _bricks(self, grid):
+        """Yield (brick_origin, dense_brick) for every brick touched by the evaluated points."""
+        size = self.brick_size
+        num_cells = np.array(grid.grid_size) - 1
+        bricks_per_axis = np.maximum((num_cells + size - 1) // size, 1)
+        indices = grid.indices.cpu().numpy().astype(np.int64)
+        values = grid.values.float().cpu().numpy()
+
+        # A point on a brick boundary is also the upper corner of the preceding brick
+        owner = np.minimum(indices // size, bricks_per_axis - 1)
+        on_lower_face = (indices % size == 0) & (indices > 0) & (indices // size <= bricks_per_axis - 1)
+        members_brick, members_point = [], []
+        for offset in np.ndindex(2, 2, 2):
+            offset = np.array(offset)
+            valid = np.all(on_lower_face | (offset == 0), axis=1)
+            members_brick.append(owner[valid] - offset)
+            members_point.append(np.nonzero(valid)[0])
+        members_brick = np.concatenate(members_brick)
+        members_point = np.concatenate(members_point)
+
+        keys = np.ravel_multi_index(members_brick.T, bricks_per_axis)
+        order = np.argsort(keys, kind='stable')
+        keys, members_point = keys[order], members_point[order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        for key, start, end in zip(unique_keys, starts, ends):
+            origin = np.array(np.unravel_index(key, bricks_per_axis)) * size
+            extent = np.minimum(origin + size, num_cells) - origin + 1
+            brick = np.full(tuple(extent), np.nan, dtype=np.float32)
+            points = members_point[start:end]
+            local = indices[points] - origin
+            brick[local[:, 0], local[:, 1], local[:, 2]] = values[points]
+            yield origin, brick
+
+    def run(self, grid, *, mc_level, bounds, octree_resolution, **kwargs):
+        """
+        Extract surface mesh from a `SparseGrid`.
+
+        Bricks share their boundary planes, so seam vertices are welded exactly as in
+        `ParallelMCSurfaceExtractor`. Faces touching unevaluated points are dropped.
+
+        Args:
+            grid (SparseGrid): Evaluated grid points and their logits.
+            mc_level (float): The level (iso-value) at which to extract the surface.
+            bounds (Union[Tuple[float], List[float], float]): Bounding box coordinates or half side length.
+            octree_resolution (int): Resolution of the octree grid.
+            **kwargs: Additional keyword arguments (ignored).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Vertices in bounding box coordinates and faces.
+        """
+        if not isinstance(grid, SparseGrid):
+            return super().run(grid, mc_level=mc_level, bounds=bounds, octree_resolution=octree_resolution)
+
+        executor = self._get_executor()
+        futures = [
+            (origin, executor.submit(_extract_brick, brick, mc_level))
+            for origin, brick in self._bricks(grid)
+        ]
+
+        vertices, faces = [], []
+        num_vertices = 0
+        for origin, future in futures:
+            result = future.result()
+            if result is None:
+                continue
+            brick_vertices, brick_faces = result
+            vertices.append(brick_vertices.astype(np.float64) + origin)
+            faces.append(brick_faces + num_vertices)
+            num_vertices += len(brick_vertices)
+        if not vertices:
+            raise ValueError("Surface level must be within volume data range.")
+        vertices = np.concatenate(vertices)
+        faces = np.concatenate(faces)
+
+        # Interpolating towards an unevaluated (NaN) point yields a NaN vertex
+        finite = np.isfinite(vertices).all(axis=1)
+        faces = faces[finite[faces].all(axis=1)]
+
+        seam_mask = np.any(vertices % self.brick_size == 0, axis=1)
+        vertices, faces = self._weld_seams(vertices, faces, seam_mask)
+        grid_size, bbox_min, bbox_size = self._compute_box_stat(bounds, octree_resolution)
+        vertices = vertices / grid_size * bbox_size + bbox_min
+        return vertices, faces
+
+
 class DMCSurfaceExtractor(SurfaceExtractor):
     def run(self, grid_logit, *, octree_resolution, **kwargs):
         """
@@ -160,5 +423,7 @@ class DMCSurfaceExtractor(SurfaceExtractor):
 
 SurfaceExtractors = {
     'mc': MCSurfaceExtractor,
+    'mc_parallel': ParallelMCSurfaceExtractor,
+    'mc_sparse': SparseMCSurfaceExtractor,
     'dmc': DMCSurfaceExtractor,
 }
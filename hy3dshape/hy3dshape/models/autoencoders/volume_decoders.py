@@ -23,6 +23,7 @@ from tqdm import tqdm
 
 from .attention_blocks import CrossAttentionDecoder
 from .attention_processors import FlashVDMCrossAttentionProcessor, FlashVDMTopMCrossAttentionProcessor
+from .surface_extractors import SparseGrid, SparseGridLogits
 from ...utils import logger
 
 
@@ -138,6 +139,101 @@ def generate_dense_grid_points(
     return xyz, grid_size, length
 
 
+def extract_near_surface_index(
+    grid_logit: torch.Tensor,
+    mc_level: float,
+    dilate: nn.Conv3d,
+    expand_num: int,
+    grid_size: np.ndarray,
+):
+    """
+    Select the points of the next octree level that lie near the surface of one item.
+
+    Args:
+        grid_logit (torch.Tensor): Logits of the current level for a single item, shape (D, D, D).
+        mc_level (float): Iso-value of the surface.
+        dilate (nn.Conv3d): All-ones 3x3x3 convolution used to grow the selection.
+        expand_num (int): Number of dilations applied at the current level.
+        grid_size (np.ndarray): Grid size of the next level.
+
+    Returns:
+        Tuple[torch.Tensor]: (x, y, z) indices into the next level grid, as returned by `torch.where`.
+    """
+    dtype = dilate.weight.dtype
+    next_index = torch.zeros(tuple(grid_size), dtype=dtype, device=grid_logit.device)
+    curr_points = extract_near_surface_volume_fn(grid_logit, mc_level)
+    curr_points += grid_logit.abs() < 0.95
+
+    for i in range(expand_num):
+        curr_points = dilate(curr_points.unsqueeze(0).to(dtype)).squeeze(0)
+    (cidx_x, cidx_y, cidx_z) = torch.where(curr_points > 0)
+
+    next_index[cidx_x * 2, cidx_y * 2, cidx_z * 2] = 1
+    for i in range(2 - expand_num):
+        next_index = dilate(next_index.unsqueeze(0)).squeeze(0)
+    return torch.where(next_index > 0)
+
+
+def index_to_points(nidx, resolution: np.ndarray, bbox_min: np.ndarray):
+    """Convert grid indices returned by `extract_near_surface_index` into float32 coordinates."""
+    points = torch.stack(nidx, dim=1).to(torch.float32)
+    device = points.device
+    return (points * torch.tensor(resolution, dtype=torch.float32, device=device) +
+            torch.tensor(bbox_min, dtype=torch.float32, device=device))
+
+
+def decode_ragged_queries(geo_decoder: Callable, latents: torch.FloatTensor, points_list, num_chunks: int,
+                          desc: str = None, enable_pbar: bool = True):
+    """
+    Decode a different number of query points for every item without padding items to the longest one.
+
+    Each item's points are cut into rows of `num_chunks // batch_size` points and the rows of all items
+    are decoded `batch_size` at a time, each with the latents of its item, so that a decoder call holds
+    at most `num_chunks` points. Rows are sorted by length so that only the last, partial row of each
+    item is padded, and only to the length of similar rows.
+
+    Args:
+        geo_decoder (Callable): Decoder called as geo_decoder(queries=..., latents=...).
+        latents (torch.FloatTensor): Latents of shape (batch_size, num_latents, width).
+        points_list (List[torch.Tensor]): Float32 query points of every item, each of shape (N_b, 3).
+        num_chunks (int): Points per decoder call.
+        desc (str): Progress bar description.
+        enable_pbar (bool): Show a progress bar.
+
+    Returns:
+        List[torch.Tensor]: Logits of every item, each of shape (N_b,).
+    """
+    rows_per_call = latents.shape[0]
+    row_size = max(num_chunks // rows_per_call, 1)
+    rows = [
+        (b, start, min(start + row_size, len(points)))
+        for b, points in enumerate(points_list)
+        for start in range(0, len(points), row_size)
+    ]
+    rows.sort(key=lambda row: row[1] - row[2])
+    values = [torch.empty(len(points), dtype=latents.dtype, device=latents.device) for points in points_list]
+    for first in tqdm(range(0, len(rows), rows_per_call), desc=desc, disable=not enable_pbar):
+        group = rows[first:first + rows_per_call]
+        length = max(end - start for _, start, end in group)
+        queries = torch.zeros((len(group), length, 3), dtype=latents.dtype, device=latents.device)
+        for i, (b, start, end) in enumerate(group):
+            queries[i, :end - start] = points_list[b][start:end]
+        owners = torch.tensor([b for b, _, _ in group], device=latents.device)
+        logits = geo_decoder(queries=queries, latents=latents[owners])
+        for i, (b, start, end) in enumerate(group):
+            values[b][start:end] = logits[i, :end - start, 0]
+    return values
+
+
+def dense_to_sparse(grid_logits: torch.Tensor):
+    """Convert dense (batch, D, D, D) logits into `SparseGridLogits`, skipping NaN points."""
+    grids = []
+    for grid_logit in grid_logits:
+        indices = torch.nonzero(~torch.isnan(grid_logit))
+        grids.append(SparseGrid(indices, grid_logit[tuple(indices.T)], grid_logit.shape))
+    return SparseGridLogits(grids)
+
+
 class VanillaVolumeDecoder:
     @torch.no_grad()
     def __call__(
@@ -183,6 +279,14 @@ class VanillaVolumeDecoder:
 
 
 class HierarchicalVolumeDecoding:
+    def __init__(self, sparse_output=False):
+        """
+        Args:
+            sparse_output (bool): Return a `SparseGridLogits` holding only the points evaluated at the
+                finest level instead of a dense grid, for use with the 'mc_sparse' surface extractor.
+        """
+        self.sparse_output = sparse_output
+
     @torch.no_grad()
     def __call__(
         self,
@@ -230,9 +334,12 @@ class HierarchicalVolumeDecoding:
         # 2. latents to 3d volume
         batch_logits = []
         batch_size = latents.shape[0]
-        for start in tqdm(range(0, xyz_samples.shape[0], num_chunks),
-                          desc=f"Hierarchical Volume Decoding [r{resolutions[0] + 1}]"):
-            queries = xyz_samples[start: start + num_chunks, :]
+        # num_chunks bounds the points of a decoder call over the whole batch, as in FlashVDM decoding;
+        # larger calls are slower per point once their activations fall out of cache
+        chunk_size = max(num_chunks // batch_size, 1)
+        for start in tqdm(range(0, xyz_samples.shape[0], chunk_size),
+                          desc=f"Hierarchical Volume Decoding [r{resolutions[0] + 1}]", disable=not enable_pbar):
+            queries = xyz_samples[start: start + chunk_size, :]
             batch_queries = repeat(queries, "p c -> b p c", b=batch_size)
             logits = geo_decoder(queries=batch_queries, latents=latents)
             batch_logits.append(logits)
@@ -242,43 +349,43 @@ class HierarchicalVolumeDecoding:
         for octree_depth_now in resolutions[1:]:
             grid_size = np.array([octree_depth_now + 1] * 3)
             resolution = bbox_size / octree_depth_now
-            next_index = torch.zeros(tuple(grid_size), dtype=dtype, device=device)
-            next_logits = torch.full(next_index.shape, -10000., dtype=dtype, device=device)
-            curr_points = extract_near_surface_volume_fn(grid_logits.squeeze(0), mc_level)
-            curr_points += grid_logits.squeeze(0).abs() < 0.95
+            sparse_level = self.sparse_output and octree_depth_now == resolutions[-1]
+            if not sparse_level:
+                next_logits = torch.full((batch_size, *grid_size), -10000., dtype=dtype, device=device)
 
             if octree_depth_now == resolutions[-1]:
                 expand_num = 0
             else:
                 expand_num = 1
-            for i in range(expand_num):
-                curr_points = dilate(curr_points.unsqueeze(0).to(dtype)).squeeze(0)
-            (cidx_x, cidx_y, cidx_z) = torch.where(curr_points > 0)
-            next_index[cidx_x * 2, cidx_y * 2, cidx_z * 2] = 1
-            for i in range(2 - expand_num):
-                next_index = dilate(next_index.unsqueeze(0)).squeeze(0)
-            nidx = torch.where(next_index > 0)
-
-            next_points = torch.stack(nidx, dim=1)
-            next_points = (next_points * torch.tensor(resolution, dtype=next_points.dtype, device=device) +
-                           torch.tensor(bbox_min, dtype=next_points.dtype, device=device))
-            batch_logits = []
-            for start in tqdm(range(0, next_points.shape[0], num_chunks),
-                              desc=f"Hierarchical Volume Decoding [r{octree_depth_now + 1}]"):
-                queries = next_points[start: start + num_chunks, :]
-                batch_queries = repeat(queries, "p c -> b p c", b=batch_size)
-                logits = geo_decoder(queries=batch_queries.to(latents.dtype), latents=latents)
-                batch_logits.append(logits)
-            grid_logits = torch.cat(batch_logits, dim=1)
-            next_logits[nidx] = grid_logits[0, ..., 0]
-            grid_logits = next_logits.unsqueeze(0)
+
+            # Every item refines its own near-surface region, so query counts are ragged
+            nidx_list = [
+                extract_near_surface_index(grid_logits[b], mc_level, dilate, expand_num, grid_size)
+                for b in range(batch_size)
+            ]
+            values_list = decode_ragged_queries(
+                geo_decoder, latents,
+                [index_to_points(nidx, resolution, bbox_min) for nidx in nidx_list], num_chunks,
+                desc=f"Hierarchical Volume Decoding [r{octree_depth_now + 1}]", enable_pbar=enable_pbar,
+            )
+            if sparse_level:
+                return SparseGridLogits([
+                    SparseGrid(torch.stack(nidx, dim=1), values, grid_size)
+                    for nidx, values in zip(nidx_list, values_list)
+                ])
+            for b, (nidx, values) in enumerate(zip(nidx_list, values_list)):
+                next_logits[b][nidx] = values
+            grid_logits = next_logits
         grid_logits[grid_logits == -10000.] = float('nan')
 
+        if self.sparse_output:
+            return dense_to_sparse(grid_logits)
         return grid_logits
 
 
 class FlashVDMVolumeDecoding:
-    def __init__(self, topk_mode='mean'):
+    def __init__(self, topk_mode='mean', sparse_output=False):
+        self.sparse_output = sparse_output
         if topk_mode not in ['mean', 'merge']:
             raise ValueError(f'Unsupported topk_mode {topk_mode}, available: {["mean", "merge"]}')
 
@@ -353,83 +460,94 @@ class FlashVDMVolumeDecoding:
             -1, mini_grid_size * mini_grid_size * mini_grid_size, 3
         )
         batch_logits = []
-        num_batchs = max(num_chunks // xyz_samples.shape[1], 1)
+        num_batchs = max(num_chunks // xyz_samples.shape[1] // batch_size, 1)
         for start in tqdm(range(0, xyz_samples.shape[0], num_batchs),
                           desc=f"FlashVDM Volume Decoding", disable=not enable_pbar):
             queries = xyz_samples[start: start + num_batchs, :]
             batch = queries.shape[0]
-            batch_latents = repeat(latents.squeeze(0), "p c -> b p c", b=batch)
+            # Fold the items into the mini-grid batch; top-k selection is independent per row.
+            batch_queries = repeat(queries, "n p c -> (b n) p c", b=batch_size)
+            batch_latents = repeat(latents, "b p c -> (b n) p c", n=batch)
             processor.topk = True
-            logits = geo_decoder(queries=queries, latents=batch_latents)
-            batch_logits.append(logits)
-        grid_logits = torch.cat(batch_logits, dim=0).reshape(
+            logits = geo_decoder(queries=batch_queries, latents=batch_latents)
+            batch_logits.append(logits.view(batch_size, batch, -1))
+        grid_logits = torch.cat(batch_logits, dim=1).reshape(
+            batch_size,
             mini_grid_num, mini_grid_num, mini_grid_num,
             mini_grid_size, mini_grid_size,
             mini_grid_size
-        ).permute(0, 3, 1, 4, 2, 5).contiguous().view(
+        ).permute(0, 1, 4, 2, 5, 3, 6).contiguous().view(
             (batch_size, grid_size[0], grid_size[1], grid_size[2])
         )
 
         for octree_depth_now in resolutions[1:]:
             grid_size = np.array([octree_depth_now + 1] * 3)
             resolution = bbox_size / octree_depth_now
-            next_index = torch.zeros(tuple(grid_size), dtype=dtype, device=device)
-            next_logits = torch.full(next_index.shape, -10000., dtype=dtype, device=device)
-            curr_points = extract_near_surface_volume_fn(grid_logits.squeeze(0), mc_level)
-            curr_points += grid_logits.squeeze(0).abs() < 0.95
+            sparse_level = self.sparse_output and octree_depth_now == resolutions[-1]
+            if not sparse_level:
+                next_logits = torch.full((batch_size, *grid_size), -10000., dtype=dtype, device=device)
 
             if octree_depth_now == resolutions[-1]:
                 expand_num = 0
             else:
                 expand_num = 1
-            for i in range(expand_num):
-                curr_points = dilate(curr_points.unsqueeze(0).to(dtype)).squeeze(0)
-            (cidx_x, cidx_y, cidx_z) = torch.where(curr_points > 0)
-
-            next_index[cidx_x * 2, cidx_y * 2, cidx_z * 2] = 1
-            for i in range(2 - expand_num):
-                next_index = dilate(next_index.unsqueeze(0)).squeeze(0)
-            nidx = torch.where(next_index > 0)
-
-            next_points = torch.stack(nidx, dim=1)
-            next_points = (next_points * torch.tensor(resolution, dtype=torch.float32, device=device) +
-                           torch.tensor(bbox_min, dtype=torch.float32, device=device))
-
-            query_grid_num = 6
-            min_val = next_points.min(axis=0).values
-            max_val = next_points.max(axis=0).values
-            vol_queries_index = (next_points - min_val) / (max_val - min_val) * (query_grid_num - 0.001)
-            index = torch.floor(vol_queries_index).long()
-            index = index[..., 0] * (query_grid_num ** 2) + index[..., 1] * query_grid_num + index[..., 2]
-            index = index.sort()
-            next_points = next_points[index.indices].unsqueeze(0).contiguous()
-            unique_values = torch.unique(index.values, return_counts=True)
-            grid_logits = torch.zeros((next_points.shape[1]), dtype=latents.dtype, device=latents.device)
-            input_grid = [[], []]
-            logits_grid_list = []
-            start_num = 0
-            sum_num = 0
-            for grid_index, count in zip(unique_values[0].cpu().tolist(), unique_values[1].cpu().tolist()):
-                if sum_num + count < num_chunks or sum_num == 0:
-                    sum_num += count
-                    input_grid[0].append(grid_index)
-                    input_grid[1].append(count)
+
+            # The adaptive top-k groups depend on where each item's surface lies,
+            # so every item gets its own refinement pass.
+            sparse_grids = []
+            for b in range(batch_size):
+                nidx = extract_near_surface_index(grid_logits[b], mc_level, dilate, expand_num, grid_size)
+                values = self._decode_near_surface(
+                    processor, geo_decoder, latents[b:b + 1],
+                    index_to_points(nidx, resolution, bbox_min), num_chunks,
+                )
+                if sparse_level:
+                    sparse_grids.append(SparseGrid(torch.stack(nidx, dim=1), values, grid_size))
                 else:
-                    processor.topk = input_grid
-                    logits_grid = geo_decoder(queries=next_points[:, start_num:start_num + sum_num], latents=latents)
-                    start_num = start_num + sum_num
-                    logits_grid_list.append(logits_grid)
-                    input_grid = [[grid_index], [count]]
-                    sum_num = count
-            if sum_num > 0:
-                processor.topk = input_grid
-                logits_grid = geo_decoder(queries=next_points[:, start_num:start_num + sum_num], latents=latents)
-                logits_grid_list.append(logits_grid)
-            logits_grid = torch.cat(logits_grid_list, dim=1)
-            grid_logits[index.indices] = logits_grid.squeeze(0).squeeze(-1)
-            next_logits[nidx] = grid_logits
-            grid_logits = next_logits.unsqueeze(0)
+                    next_logits[b][nidx] = values
+            if sparse_level:
+                return SparseGridLogits(sparse_grids)
+            grid_logits = next_logits
 
         grid_logits[grid_logits == -10000.] = float('nan')
 
+        if self.sparse_output:
+            return dense_to_sparse(grid_logits)
+        return grid_logits
+
+    @staticmethod
+    def _decode_near_surface(processor, geo_decoder, latents, next_points, num_chunks):
+        """ Decode the near-surface points of one item, grouping queries by spatial cell for top-k selection. """
+        query_grid_num = 6
+        min_val = next_points.min(axis=0).values
+        max_val = next_points.max(axis=0).values
+        vol_queries_index = (next_points - min_val) / (max_val - min_val) * (query_grid_num - 0.001)
+        index = torch.floor(vol_queries_index).long()
+        index = index[..., 0] * (query_grid_num ** 2) + index[..., 1] * query_grid_num + index[..., 2]
+        index = index.sort()
+        next_points = next_points[index.indices].unsqueeze(0).contiguous()
+        unique_values = torch.unique(index.values, return_counts=True)
+        grid_logits = torch.zeros((next_points.shape[1]), dtype=latents.dtype, device=latents.device)
+        input_grid = [[], []]
+        logits_grid_list = []
+        start_num = 0
+        sum_num = 0
+        for grid_index, count in zip(unique_values[0].cpu().tolist(), unique_values[1].cpu().tolist()):
+            if sum_num + count < num_chunks or sum_num == 0:
+                sum_num += count
+                input_grid[0].append(grid_index)
+                input_grid[1].append(count)
+            else:
+                processor.topk = input_grid
+                logits_grid = geo_decoder(queries=next_points[:, start_num:start_num + sum_num], latents=latents)
+                start_num = start_num + sum_num
+                logits_grid_list.append(logits_grid)
+                input_grid = [[grid_index], [count]]
+                sum_num = count
+        if sum_num > 0:
+            processor.topk = input_grid
+            logits_grid = geo_decoder(queries=next_points[:, start_num:start_num + sum_num], latents=latents)
+            logits_grid_list.append(logits_grid)
+        logits_grid = torch.cat(logits_grid_list, dim=1)
+        grid_logits[index.indices] = logits_grid.squeeze(0).squeeze(-1)
         return grid_logits
@@ -25,6 +25,7 @@
 import os
 import yaml
 import math
+from contextlib import contextmanager
 
 import numpy as np
 import torch
@@ -32,7 +33,7 @@ import torch.nn as nn
 import torch.nn.functional as F
 from einops import rearrange
 
-from .moe_layers import MoEBlock
+from .moe_layers import MoEBlock, MOE_DISPATCH_MODES
 from ...utils import logger, synchronize_timer, smart_load_model
 
 
@@ -174,29 +175,34 @@ class CrossAttention(nn.Module):
             self.dca_dim = decoupled_ca_dim
             self.dca_weight = decoupled_ca_weight
 
-    def forward(self, x, y):
-        """
-        Parameters
-        ----------
-        x: torch.Tensor
-            (batch, seqlen1, hidden_dim) (where hidden_dim = num heads * head dim)
-        y: torch.Tensor
-            (batch, seqlen2, hidden_dim2)
-        freqs_cis_img: torch.Tensor
-            (batch, hidden_dim // 2), RoPE for image
+        # Condition K/V cache, see `HunYuanDiTPlain.cached_condition`
+        self.use_kv_cache = False
+        self.kv_cache = None
+
+    def clear_kv_cache(self):
+        self.kv_cache = None
+
+    def compute_kv(self, y):
         """
-        b, s1, c = x.shape  # [b, s1, D]
+        Project the condition tokens into attention keys and values.
 
+        Returns:
+            Tuple of (k, v, k_dca, v_dca), each (batch, heads, seqlen, head_dim); the
+            decoupled entries are None when decoupled cross-attention is disabled.
+        """
+        b = y.shape[0]
+        k_dca, v_dca = None, None
         if self.with_dca:
             token_len = y.shape[1]
             context_dca = y[:, -self.dca_dim:, :]
             kv_dca = self.kv_proj_dca(context_dca).view(b, self.dca_dim, 2, self.num_heads, self.head_dim)
             k_dca, v_dca = kv_dca.unbind(dim=2)  # [b, s, h, d]
             k_dca = self.k_norm_dca(k_dca)
+            k_dca, v_dca = map(lambda t: rearrange(t, 'b n h d -> b h n d', h=self.num_heads),
+                               (k_dca, v_dca))
             y = y[:, :(token_len - self.dca_dim), :]
 
         _, s2, c = y.shape  # [b, s2, 1024]
-        q = self.to_q(x)
         k = self.to_k(y)
         v = self.to_v(y)
 
@@ -205,19 +211,45 @@ class CrossAttention(nn.Module):
         kv = kv.view(1, -1, self.num_heads, split_size * 2)
         k, v = torch.split(kv, split_size, dim=-1)
 
-        q = q.view(b, s1, self.num_heads, self.head_dim)  # [b, s1, h, d]
         k = k.view(b, s2, self.num_heads, self.head_dim)  # [b, s2, h, d]
         v = v.view(b, s2, self.num_heads, self.head_dim)  # [b, s2, h, d]
 
-        q = self.q_norm(q)
         k = self.k_norm(k)
+        k, v = map(lambda t: rearrange(t, 'b n h d -> b h n d', h=self.num_heads), (k, v))
+        return k, v, k_dca, v_dca
+
+    def forward(self, x, y, cache_key=None):
+        """
+        Parameters
+        ----------
+        x: torch.Tensor
+            (batch, seqlen1, hidden_dim) (where hidden_dim = num heads * head dim)
+        y: torch.Tensor
+            (batch, seqlen2, hidden_dim2)
+        cache_key: torch.Tensor, optional
+            Object identifying the condition `y` was derived from. When the K/V cache is
+            enabled and the key is the same object as on the previous call, the cached
+            projections are reused instead of recomputing them from `y`.
+        """
+        b, s1, c = x.shape  # [b, s1, D]
+
+        if self.use_kv_cache and cache_key is not None:
+            if self.kv_cache is None or self.kv_cache[0] is not cache_key:
+                self.kv_cache = (cache_key, self.compute_kv(y))
+            k, v, k_dca, v_dca = self.kv_cache[1]
+        else:
+            k, v, k_dca, v_dca = self.compute_kv(y)
+
+        q = self.to_q(x)
+        q = q.view(b, s1, self.num_heads, self.head_dim)  # [b, s1, h, d]
+        q = self.q_norm(q)
 
         with torch.backends.cuda.sdp_kernel(
             enable_flash=True,
             enable_math=False,
             enable_mem_efficient=True
         ):
-            q, k, v = map(lambda t: rearrange(t, 'b n h d -> b h n d', h=self.num_heads), (q, k, v))
+            q = rearrange(q, 'b n h d -> b h n d', h=self.num_heads)
             context = F.scaled_dot_product_attention(
                 q, k, v
             ).transpose(1, 2).reshape(b, s1, -1)
@@ -228,8 +260,6 @@ class CrossAttention(nn.Module):
                 enable_math=False,
                 enable_mem_efficient=True
             ):
-                k_dca, v_dca = map(lambda t: rearrange(t, 'b n h d -> b h n d', h=self.num_heads),
-                                   (k_dca, v_dca))
                 context_dca = F.scaled_dot_product_attention(
                     q, k_dca, v_dca).transpose(1, 2).reshape(b, s1, -1)
 
@@ -322,6 +352,7 @@ class HunYuanDiTBlock(nn.Module):
         use_moe: bool = False,
         num_experts: int = 8,
         moe_top_k: int = 2,
+        moe_dispatch: str = 'loop',
         **kwargs,
     ):
         super().__init__()
@@ -371,11 +402,12 @@ class HunYuanDiTBlock(nn.Module):
                 final_dropout=False,
                 ff_inner_dim=int(hidden_size * 4.0),
                 ff_bias=True,
+                dispatch=moe_dispatch,
             )
         else:
             self.mlp = MLP(width=hidden_size)
 
-    def forward(self, x, c=None, text_states=None, skip_value=None):
+    def forward(self, x, c=None, text_states=None, skip_value=None, cache_key=None):
 
         if self.skip_linear is not None:
             cat = torch.cat([skip_value, x], dim=-1)
@@ -392,7 +424,7 @@ class HunYuanDiTBlock(nn.Module):
         x = x + attn_out
 
         # Cross-Attention
-        x = x + self.attn2(self.norm2(x), text_states)
+        x = x + self.attn2(self.norm2(x), text_states, cache_key=cache_key)
 
         # FFN Layer
         mlp_inputs = self.norm3(x)
@@ -559,6 +591,7 @@ class HunYuanDiTPlain(nn.Module):
         num_moe_layers: int = 6,
         num_experts: int = 8,
         moe_top_k: int = 2,
+        moe_dispatch: str = 'loop',
         **kwargs
     ):
         super().__init__()
@@ -626,7 +659,8 @@ class HunYuanDiTPlain(nn.Module):
                             qkv_bias=qkv_bias,
                             use_moe=True if depth - layer <= num_moe_layers else False,
                             num_experts=num_experts,
-                            moe_top_k=moe_top_k
+                            moe_top_k=moe_top_k,
+                            moe_dispatch=moe_dispatch,
                             )
             for layer in range(depth)
         ])
@@ -634,6 +668,47 @@ class HunYuanDiTPlain(nn.Module):
 
         self.final_layer = FinalLayer(hidden_size, self.out_channels)
 
+    def set_moe_dispatch(self, dispatch: str):
+        """ Select the MoE dispatch engine ('loop' or 'grouped') of every MoE block. """
+        if dispatch not in MOE_DISPATCH_MODES:
+            raise ValueError(f'Unsupported dispatch {dispatch}, available: {list(MOE_DISPATCH_MODES)}')
+        for block in self.blocks:
+            if block.use_moe:
+                block.moe.dispatch = dispatch
+
+    def set_condition_cache(self, enabled: bool):
+        """ Enable or disable the cross-attention condition K/V cache; disabling also invalidates it. """
+        for block in self.blocks:
+            block.attn2.use_kv_cache = enabled
+        if not enabled:
+            self.clear_condition_cache()
+
+    def clear_condition_cache(self):
+        """ Invalidation hook: drop cached condition projections, e.g. after changing weights in place. """
+        for block in self.blocks:
+            block.attn2.clear_kv_cache()
+
+    @contextmanager
+    def cached_condition(self):
+        """ Compute condition K/V projections once per sampling run.
+
+            Within the context, every block caches the `to_k`/`to_v` projections of the
+            condition tokens keyed on the identity of `contexts['main']`, which the pipelines
+            pass unchanged to every denoising step. The cache is dropped on exit.
+
+            Example:
+            ```python
+            with model.cached_condition():
+                for t in timesteps:
+                    noise_pred = model(latents, t, cond)
+            ```
+        """
+        self.set_condition_cache(True)
+        try:
+            yield self
+        finally:
+            self.set_condition_cache(False)
+
     def forward(self, x, t, contexts, **kwargs):
         cond = contexts['main']
 
@@ -659,7 +734,7 @@ class HunYuanDiTPlain(nn.Module):
         skip_value_list = []
         for layer, block in enumerate(self.blocks):
             skip_value = None if layer <= self.depth // 2 else skip_value_list.pop()
-            x = block(x, c, cond, skip_value=skip_value)
+            x = block(x, c, cond, skip_value=skip_value, cache_key=contexts['main'])
             if layer < self.depth // 2:
                 skip_value_list.append(x)
 
@@ -109,11 +109,57 @@ class MoEGate(nn.Module):
             aux_loss = None
         return topk_idx, topk_weight, aux_loss
 
+MOE_DISPATCH_MODES = ('loop', 'grouped')
+
+_grouped_mm_support = {}
+
+
+def grouped_mm_supported(device, dtype):
+    """
+    Whether torch._grouped_mm runs on a CUDA device for `dtype`. The op is missing from older
+    torch releases and its CUDA kernels only cover some dtypes and GPU architectures, so
+    support is probed once per device and dtype. On CPU it is a reference implementation
+    that is slower than batched matmuls, so it is never used there.
+    """
+    device = torch.device(device)
+    if device.type != 'cuda' or not hasattr(torch, '_grouped_mm'):
+        return False
+    key = (device, dtype)
+    if key not in _grouped_mm_support:
+        try:
+            torch._grouped_mm(torch.zeros(16, 16, device=device, dtype=dtype),
+                              torch.zeros(1, 16, 16, device=device, dtype=dtype).transpose(1, 2),
+                              offs=torch.tensor([16], device=device, dtype=torch.int32))
+            _grouped_mm_support[key] = True
+        except RuntimeError:
+            _grouped_mm_support[key] = False
+    return _grouped_mm_support[key]
+
+
 class MoEBlock(nn.Module):
+    """
+    Mixture-of-experts feed-forward block.
+
+    `dispatch` selects how routed tokens reach the experts at inference time:
+        - 'loop': sort tokens by expert and run each expert in a Python loop.
+        - 'grouped': stack the expert weights and run all experts in a fixed number of
+          matmul calls, independent of the number of experts. torch._grouped_mm multiplies the
+          unpadded token segments on GPUs that support it; otherwise the experts are split
+          into at most `grouped_buckets` contiguous ranges, each padded only to its own
+          largest token count and run with one baddbmm per layer.
+    """
+    grouped_buckets = 3
+
     def __init__(self, dim, num_experts=8, moe_top_k=2,
                     activation_fn = "gelu", dropout=0.0, final_dropout = False, 
-                    ff_inner_dim = None, ff_bias = True):
+                    ff_inner_dim = None, ff_bias = True, dispatch='loop'):
         super().__init__()
+        if dispatch not in MOE_DISPATCH_MODES:
+            raise ValueError(f'Unsupported dispatch {dispatch}, available: {list(MOE_DISPATCH_MODES)}')
+        if dispatch == 'grouped' and activation_fn not in ('gelu', 'gelu-approximate'):
+            raise ValueError(f"Grouped dispatch only supports gelu experts, got {activation_fn}")
+        self.dispatch = dispatch
+        self._packed_experts = None
         self.moe_top_k = moe_top_k
         self.experts = nn.ModuleList([
                 FeedForward(dim,dropout=dropout, 
@@ -148,7 +194,8 @@ class MoEBlock(nn.Module):
             y =  y.view(*orig_shape)
             y = AddAuxiliaryLoss.apply(y, aux_loss)
         else:
-            y = self.moe_infer(hidden_states, flat_topk_idx, topk_weight.view(-1, 1)).view(*orig_shape)
+            moe_infer = self.moe_infer_grouped if self.dispatch == 'grouped' else self.moe_infer
+            y = moe_infer(hidden_states, flat_topk_idx, topk_weight.view(-1, 1)).view(*orig_shape)
         y = y + self.shared_experts(identity)
         return y
     
@@ -175,3 +222,118 @@ class MoEBlock(nn.Module):
                                          expert_out, 
                                          reduce='sum')
         return expert_cache
+
+    def _pack_expert_weights(self):
+        """
+        Stack the expert weights into [num_experts, ...] tensors for grouped dispatch.
+
+        Each expert's parameters are re-pointed at their slice of the stacked tensors, so
+        no second copy of the weights is kept. The packing is redone if the parameters have
+        been replaced since, e.g. by `.to()`.
+        """
+        params = [
+            (expert.net[0].proj.weight, expert.net[0].proj.bias, expert.net[2].weight, expert.net[2].bias)
+            for expert in self.experts
+        ]
+        data_ptrs = [param.data_ptr() for expert_params in params for param in expert_params if param is not None]
+        if self._packed_experts is not None and self._packed_experts[1] == data_ptrs:
+            return self._packed_experts[0]
+
+        # [E, inner, dim], [E, inner], [E, dim, inner], [E, dim]
+        packed = tuple(
+            torch.stack([expert_params[j].data for expert_params in params]) if params[0][j] is not None else None
+            for j in range(4)
+        )
+        for i, expert_params in enumerate(params):
+            for param, stacked in zip(expert_params, packed):
+                if param is not None:
+                    param.data = stacked[i]
+        data_ptrs = [param.data_ptr() for expert_params in params for param in expert_params if param is not None]
+        self._packed_experts = (packed, data_ptrs)
+        return packed
+
+    @staticmethod
+    def _capacity_buckets(counts, max_buckets):
+        """
+        Split the experts into at most `max_buckets` contiguous ranges that minimise the padded
+        token slots, sum((end - start) * max(counts[start:end])). Contiguous ranges keep the
+        weights of a bucket a view of the stacked weights.
+
+        Returns:
+            List of (start, end, capacity) for the ranges that received tokens.
+        """
+        num_experts = len(counts)
+        max_buckets = min(max_buckets, num_experts)
+        best = [[math.inf] * (num_experts + 1) for _ in range(max_buckets + 1)]
+        split = [[0] * (num_experts + 1) for _ in range(max_buckets + 1)]
+        best[0][0] = 0
+        for k in range(1, max_buckets + 1):
+            for end in range(k, num_experts + 1):
+                capacity = 0
+                for start in range(end - 1, k - 2, -1):
+                    capacity = max(capacity, counts[start])
+                    cost = best[k - 1][start] + (end - start) * capacity
+                    if cost < best[k][end]:
+                        best[k][end], split[k][end] = cost, start
+        buckets = []
+        end = num_experts
+        for k in range(max_buckets, 0, -1):
+            start = split[k][end]
+            buckets.append((start, end, max(counts[start:end])))
+            end = start
+        return [bucket for bucket in reversed(buckets) if bucket[2] > 0]
+
+    @torch.no_grad()
+    def moe_infer_grouped(self, x, flat_expert_indices, flat_expert_weights):
+        num_experts = len(self.experts)
+        idxs = flat_expert_indices.argsort()
+        sorted_experts = flat_expert_indices[idxs]
+        sorted_weights = flat_expert_weights[idxs]
+        counts = flat_expert_indices.bincount(minlength=num_experts)
+        token_idxs = idxs // self.moe_top_k
+        w1, b1, w2, b2 = self._pack_expert_weights()
+        approximate = self.experts[0].net[0].approximate
+
+        if grouped_mm_supported(x.device, x.dtype):
+            # Segment matmuls over the expert-sorted tokens: no padding and no per-expert calls
+            offs = counts.cumsum(0).to(torch.int32)
+            hidden = torch._grouped_mm(x[token_idxs], w1.transpose(1, 2), offs=offs)
+            if b1 is not None:
+                hidden += b1[sorted_experts]
+            hidden = F.gelu(hidden, approximate=approximate)
+            expert_out = torch._grouped_mm(hidden, w2.transpose(1, 2), offs=offs)
+            if b2 is not None:
+                expert_out += b2[sorted_experts]
+            expert_out.mul_(sorted_weights)
+            return torch.zeros_like(x, dtype=expert_out.dtype).index_add_(0, token_idxs, expert_out)
+
+        # Slot of every routed token inside its expert's group
+        offsets = counts.cumsum(0) - counts
+        slots = torch.arange(idxs.numel(), device=x.device) - offsets[sorted_experts]
+        ends = counts.cumsum(0).tolist()
+        # One extra row collects the padding slots and is dropped at the end
+        y = x.new_zeros(x.shape[0] + 1, x.shape[-1])
+        for start, end, capacity in self._capacity_buckets(counts.tolist(), self.grouped_buckets):
+            first, last = (ends[start - 1] if start > 0 else 0), ends[end - 1]
+            slot_idxs = (sorted_experts[first:last] - start) * capacity + slots[first:last]
+            # Padding slots read token 0 but are added to the extra row
+            slot_sources = token_idxs.new_zeros((end - start) * capacity)
+            slot_sources[slot_idxs] = token_idxs[first:last]
+            slot_targets = token_idxs.new_full(((end - start) * capacity,), x.shape[0])
+            slot_targets[slot_idxs] = token_idxs[first:last]
+            slot_weights = sorted_weights.new_zeros((end - start) * capacity, 1)
+            slot_weights[slot_idxs] = sorted_weights[first:last]
+
+            packed = x[slot_sources].view(end - start, capacity, x.shape[-1])
+            hidden = self._bucket_linear(packed, w1[start:end], b1[start:end] if b1 is not None else None)
+            hidden = F.gelu(hidden, approximate=approximate)
+            out = self._bucket_linear(hidden, w2[start:end], b2[start:end] if b2 is not None else None)
+            y.index_add_(0, slot_targets, out.view(-1, x.shape[-1]).mul_(slot_weights))
+        return y[:-1]
+
+    @staticmethod
+    def _bucket_linear(x, weight, bias):
+        """ Batched linear layer: x [E, C, in] with weight [E, out, in] and bias [E, out]. """
+        if bias is None:
+            return x @ weight.transpose(1, 2)
+        return torch.baddbmm(bias.unsqueeze(1), x, weight.transpose(1, 2))
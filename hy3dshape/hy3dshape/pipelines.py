@@ -12,6 +12,7 @@
 # fine-tuning enabling code and other elements of the foregoing made publicly available
 # by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
 
+import contextlib
 import copy
 import importlib
 import inspect
@@ -543,6 +544,15 @@ class Hunyuan3DDiTPipeline:
         assert emb.shape == (w.shape[0], embedding_dim)
         return emb
 
+    def condition_cache(self):
+        """
+        Context caching the denoiser's condition K/V projections across the steps of one sampling run.
+        Falls back to a no-op for denoisers without `cached_condition`.
+        """
+        if hasattr(self.model, 'cached_condition'):
+            return self.model.cached_condition()
+        return contextlib.nullcontext()
+
     def set_surface_extractor(self, mc_algo):
         if mc_algo is None:
             return
@@ -553,6 +563,9 @@ class Hunyuan3DDiTPipeline:
         if mc_algo not in SurfaceExtractors.keys():
             raise ValueError(f"Unknown mc_algo {mc_algo}")
         self.vae.surface_extractor = SurfaceExtractors[mc_algo]()
+        if hasattr(self.vae.volume_decoder, 'sparse_output'):
+            # Only 'mc_sparse' consumes the sparse output of the hierarchical decoders
+            self.vae.volume_decoder.sparse_output = mc_algo == 'mc_sparse'
 
     @torch.no_grad()
     def __call__(
@@ -614,7 +627,7 @@ class Hunyuan3DDiTPipeline:
             guidance_cond = self.get_guidance_scale_embedding(
                 guidance_scale_tensor, embedding_dim=self.model.guidance_cond_proj_dim
             ).to(device=device, dtype=latents.dtype)
-        with synchronize_timer('Diffusion Sampling'):
+        with synchronize_timer('Diffusion Sampling'), self.condition_cache():
             for i, t in enumerate(tqdm(timesteps, disable=not enable_pbar, desc="Diffusion Sampling:", leave=False)):
                 # expand the latents if we are doing classifier free guidance
                 if do_classifier_free_guidance:
@@ -750,7 +763,7 @@ class Hunyuan3DDiTFlowMatchingPipeline(Hunyuan3DDiTPipeline):
             guidance = torch.tensor([guidance_scale] * batch_size, device=device, dtype=dtype)
             # logger.info(f'Using guidance embed with scale {guidance_scale}')
 
-        with synchronize_timer('Diffusion Sampling'):
+        with synchronize_timer('Diffusion Sampling'), self.condition_cache():
             for i, t in enumerate(tqdm(timesteps, disable=not enable_pbar, desc="Diffusion Sampling:")):
                 # expand the latents if we are doing classifier free guidance
                 if do_classifier_free_guidance:
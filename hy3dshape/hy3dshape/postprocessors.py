@@ -59,33 +59,49 @@ def remove_floater(mesh: pymeshlab.MeshSet):
     return mesh
 
 
+def _concatenate_scene(mesh: trimesh.Scene) -> trimesh.Trimesh:
+    geometries = [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
+    if not geometries:
+        return trimesh.Trimesh()
+    return trimesh.util.concatenate(geometries)
+
+
 def pymeshlab2trimesh(mesh: pymeshlab.MeshSet):
-    with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
-        mesh.save_current_mesh(temp_file.name)
-        mesh = trimesh.load(temp_file.name)
-    # 检查加载的对象类型
-    if isinstance(mesh, trimesh.Scene):
-        combined_mesh = trimesh.Trimesh()
-        # 如果是Scene，遍历所有的geometry并合并
-        for geom in mesh.geometry.values():
-            combined_mesh = trimesh.util.concatenate([combined_mesh, geom])
-        mesh = combined_mesh
-    return mesh
+    """
+    Convert the current mesh of a MeshSet to a trimesh.Trimesh from its vertex/face buffers, without touching disk.
+    """
+    current = mesh.current_mesh()
+    vertex_colors = None
+    if current.has_vertex_color():
+        # MeshLab stores 8-bit colors, exposed as floats in [0, 1]
+        vertex_colors = np.round(current.vertex_color_matrix() * 255).astype(np.uint8)
+    # process=True merges duplicate vertices, as trimesh.load did on the intermediate PLY
+    return trimesh.Trimesh(
+        vertices=current.vertex_matrix(),
+        faces=current.face_matrix(),
+        vertex_colors=vertex_colors,
+        process=True,
+    )
 
 
 def trimesh2pymeshlab(mesh: trimesh.Trimesh):
-    with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
-        if isinstance(mesh, trimesh.scene.Scene):
-            for idx, obj in enumerate(mesh.geometry.values()):
-                if idx == 0:
-                    temp_mesh = obj
-                else:
-                    temp_mesh = temp_mesh + obj
-            mesh = temp_mesh
-        mesh.export(temp_file.name)
-        mesh = pymeshlab.MeshSet()
-        mesh.load_new_mesh(temp_file.name)
-    return mesh
+    """
+    Build a MeshSet holding a pymeshlab.Mesh created directly from the trimesh vertex/face buffers.
+    """
+    if isinstance(mesh, trimesh.scene.Scene):
+        mesh = _concatenate_scene(mesh)
+    colors = {}
+    if mesh.visual.kind == 'vertex':
+        colors['v_color_matrix'] = np.asarray(mesh.visual.vertex_colors, dtype=np.float64) / 255.0
+    elif mesh.visual.kind == 'face':
+        colors['f_color_matrix'] = np.asarray(mesh.visual.face_colors, dtype=np.float64) / 255.0
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(
+        vertex_matrix=np.ascontiguousarray(mesh.vertices, dtype=np.float64),
+        face_matrix=np.ascontiguousarray(mesh.faces, dtype=np.int32),
+        **colors,
+    ))
+    return ms
 
 
 def export_mesh(input, output):
@@ -148,10 +164,15 @@ class DegenerateFaceRemover:
     ) -> Union[pymeshlab.MeshSet, trimesh.Trimesh, Latent2MeshOutput]:
         ms = import_mesh(mesh)
 
-        with tempfile.NamedTemporaryFile(suffix='.ply', delete=False) as temp_file:
-            ms.save_current_mesh(temp_file.name)
-            ms = pymeshlab.MeshSet()
-            ms.load_new_mesh(temp_file.name)
+        # Rebuild the mesh from its compacted buffers, which drops the faces and vertices flagged as deleted
+        current = ms.current_mesh()
+        rebuilt = pymeshlab.MeshSet()
+        rebuilt.add_mesh(pymeshlab.Mesh(
+            vertex_matrix=current.vertex_matrix(),
+            face_matrix=current.face_matrix(),
+            v_color_matrix=current.vertex_color_matrix(),
+        ))
+        ms = rebuilt
 
         mesh = export_mesh(mesh, ms)
         return mesh
@@ -3,3 +3,4 @@
 from .misc import get_config_from_file
 from .misc import instantiate_from_config
 from .utils import get_logger, logger, synchronize_timer, smart_load_model
+from .tracing import Tracer, tracer, serve_metrics
@@ -0,0 +1,323 @@
+# Hunyuan 3D is licensed under the TENCENT HUNYUAN NON-COMMERCIAL LICENSE AGREEMENT
+# except for the third-party components listed below.
+# Hunyuan 3D does not impose any additional limitations beyond what is outlined
+# in the repsective licenses of these third-party components.
+# Users must comply with all terms and conditions of original licenses of these third-party
+# components and must ensure that the usage of the third party components adheres to
+# all relevant laws and regulations.
+
+# For avoidance of doubts, Hunyuan 3D means the large language models and
+# their software and algorithms, including trained model weights, parameters (including
+# optimizer states), machine-learning model code, inference-enabling code, training-enabling code,
+# fine-tuning enabling code and other elements of the foregoing made publicly available
+# by Tencent in accordance with TENCENT HUNYUAN COMMUNITY LICENSE AGREEMENT.
+
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import deque
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes():
+    """ Current resident set size of the process (0 where /proc is not available). """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+class Span:
+    """ A timed region of code, created by `Tracer.span`.
+
+        Every span records wall time and CPU time of its thread into the per-name
+        aggregates exported by `Tracer.prometheus_text`. Sampled spans additionally
+        record the process RSS at their end and its change while they were open
+        (both process-wide), and are kept as events for `Tracer.chrome_trace`.
+
+        The CUDA allocator keeps a single peak counter per device, so the peak CUDA
+        memory of a span is only recorded when no span was open on another thread
+        during its whole lifetime; under the stage scheduler, spans of concurrent
+        stages leave it unset rather than report each other's allocations.
+
+        Spans opened while another span is open on the same thread are nested under
+        it. Whether a span is sampled is decided by its root span.
+    """
+
+    __slots__ = ('tracer', 'name', 'attrs', 'parent', 'root', 'active', 'sampled', 'overlapped',
+                 'start', 'cpu_start', 'rss_start', 'peak_gpu_memory')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.root = self
+        self.active = False
+        self.sampled = False
+        # Set on root spans when a span on another thread was open at the same time
+        self.overlapped = False
+        self.rss_start = 0
+        self.peak_gpu_memory = None
+
+    def set(self, **attrs):
+        """ Attach attributes to the span; they show up as `args` in the Chrome trace. """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        tracer = self.tracer
+        if not tracer.enabled:
+            return self
+        stack = tracer._stack()
+        self.parent = stack[-1] if stack else None
+        if self.parent is not None:
+            self.sampled = self.parent.sampled
+            self.root = self.parent.root
+        else:
+            self.sampled = tracer.should_sample(self.attrs.get('uid'))
+            tracer._open_root(self)
+        if self.sampled:
+            self.rss_start = _rss_bytes()
+            if not self.root.overlapped and torch.cuda.is_initialized():
+                # Fold the peak reached so far into the parent before resetting the counter for this span
+                if self.parent is not None:
+                    self.parent.peak_gpu_memory = max(self.parent.peak_gpu_memory or 0,
+                                                      torch.cuda.max_memory_allocated())
+                torch.cuda.reset_peak_memory_stats()
+                self.peak_gpu_memory = 0
+        stack.append(self)
+        self.active = True
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if not self.active:
+            return False
+        wall = time.perf_counter() - self.start
+        cpu = time.thread_time() - self.cpu_start
+        self.active = False
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if self.parent is None:
+            self.tracer._close_root(self)
+        rss = 0
+        if self.sampled:
+            if self.root.overlapped:
+                # Another thread allocated or reset the device peak counter meanwhile
+                self.peak_gpu_memory = None
+            elif self.peak_gpu_memory is not None:
+                self.peak_gpu_memory = max(self.peak_gpu_memory, torch.cuda.max_memory_allocated())
+                if self.parent is not None:
+                    self.parent.peak_gpu_memory = max(self.parent.peak_gpu_memory or 0, self.peak_gpu_memory)
+            rss = _rss_bytes()
+        self.tracer._record(self, wall, cpu, rss, exc_type is not None)
+        return False
+
+
+class Tracer:
+    """ Collects nested spans into per-name metrics and a bounded buffer of trace events.
+
+        Aggregated wall/CPU time per span name is always collected; it costs two clock
+        reads and a locked dict update per span. Peak memory and trace events are only
+        collected for sampled requests, chosen with probability `sample_rate`.
+
+        Example:
+        ```python
+        with tracer.span('generate', uid=uid):
+            with tracer.span('rembg'):
+                image = rembg(image)
+
+        @tracer.traced('bake')
+        def bake(...):
+            pass
+
+        tracer.export_chrome_trace('trace.json')
+        ```
+    """
+
+    def __init__(self, sample_rate=0.0, enabled=True, max_events=100000, namespace='hy3dgen'):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.namespace = namespace
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._events = deque(maxlen=max_events)
+        self._pid = os.getpid()
+        self._roots_lock = threading.Lock()
+        self._open_roots = set()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _open_root(self, span):
+        with self._roots_lock:
+            if self._open_roots:
+                span.overlapped = True
+                for root in self._open_roots:
+                    root.overlapped = True
+            self._open_roots.add(span)
+
+    def _close_root(self, span):
+        with self._roots_lock:
+            self._open_roots.discard(span)
+
+    def should_sample(self, key=None):
+        """ Sampling decision for a root span; spans sharing a key (e.g. a job uid) are sampled together. """
+        if self.sample_rate <= 0:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        if key is None:
+            return random.random() < self.sample_rate
+        return zlib.crc32(str(key).encode()) % 10000 < self.sample_rate * 10000
+
+    def span(self, name, **attrs):
+        """ Open a span; use as a context manager. """
+        return Span(self, name, attrs)
+
+    def traced(self, name=None):
+        """ Decorator opening a span around every call of the wrapped function. """
+
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def _record(self, span, wall, cpu, rss, error):
+        with self._lock:
+            metric = self._metrics.get(span.name)
+            if metric is None:
+                metric = self._metrics[span.name] = {
+                    'count': 0, 'errors': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_gpu_memory': 0, 'rss': 0,
+                }
+            metric['count'] += 1
+            metric['errors'] += int(error)
+            metric['wall'] += wall
+            metric['cpu'] += cpu
+            if span.sampled:
+                args = dict(span.attrs, cpu_ms=cpu * 1e3, rss_bytes=rss, rss_delta_bytes=rss - span.rss_start,
+                            error=error)
+                if span.peak_gpu_memory is not None:
+                    metric['peak_gpu_memory'] = max(metric['peak_gpu_memory'], span.peak_gpu_memory)
+                    args['peak_gpu_memory_bytes'] = span.peak_gpu_memory
+                metric['rss'] = max(metric['rss'], rss)
+                self._events.append({
+                    'name': span.name,
+                    'ph': 'X',
+                    'ts': span.start * 1e6,
+                    'dur': wall * 1e6,
+                    'pid': self._pid,
+                    'tid': threading.get_ident(),
+                    'args': args,
+                })
+
+    def metrics(self):
+        """ Copy of the per-name aggregates. """
+        with self._lock:
+            return {name: dict(metric) for name, metric in self._metrics.items()}
+
+    def prometheus_text(self):
+        """ Render the aggregates in the Prometheus text exposition format. """
+        families = (
+            ('span_count_total', 'counter', 'Number of completed spans', 'count'),
+            ('span_errors_total', 'counter', 'Number of spans that raised an exception', 'errors'),
+            ('span_wall_seconds_total', 'counter', 'Wall time spent in spans', 'wall'),
+            ('span_cpu_seconds_total', 'counter', 'CPU time of the span thread spent in spans', 'cpu'),
+            ('span_peak_gpu_memory_bytes', 'gauge',
+             'Largest peak CUDA memory allocated in a sampled span that ran without concurrent spans',
+             'peak_gpu_memory'),
+            ('span_process_rss_bytes', 'gauge', 'Largest process-wide RSS seen at the end of a sampled span', 'rss'),
+        )
+        metrics = self.metrics()
+        lines = []
+        for suffix, kind, help_text, field in families:
+            metric_name = f'{self.namespace}_{suffix}'
+            lines.append(f'# HELP {metric_name} {help_text}')
+            lines.append(f'# TYPE {metric_name} {kind}')
+            for name, metric in sorted(metrics.items()):
+                label = name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                lines.append(f'{metric_name}{{span="{label}"}} {metric[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def chrome_trace(self):
+        """ Sampled spans in the Chrome trace event format (chrome://tracing, Perfetto). """
+        with self._lock:
+            events = list(self._events)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """ Write `chrome_trace()` to a JSON file. """
+        trace = self.chrome_trace()
+        with open(path + '.tmp', 'w') as f:
+            json.dump(trace, f)
+        os.replace(path + '.tmp', path)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self._events.clear()
+
+
+tracer = Tracer(
+    sample_rate=float(os.environ.get('HY3DGEN_TRACE_SAMPLE_RATE', '0')),
+    enabled=os.environ.get('HY3DGEN_TRACE', '1') == '1',
+)
+
+
+def serve_metrics(port, host='0.0.0.0', tracer=tracer):
+    """ Serve `/metrics` (Prometheus text) and `/trace` (Chrome trace JSON) from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: The running server; call `shutdown()` to stop it.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] == '/metrics':
+                body = tracer.prometheus_text().encode()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path.split('?')[0] == '/trace':
+                body = json.dumps(tracer.chrome_trace()).encode()
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
@@ -18,6 +18,8 @@ from functools import wraps
 
 import torch
 
+from .tracing import tracer
+
 
 def get_logger(name):
     logger = logging.getLogger(name)
@@ -38,7 +40,10 @@ logger = get_logger('hy3dgen.shapgen')
 class synchronize_timer:
     """ Synchronized timer to count the inference time of `nn.Module.forward`.
 
-        Supports both context manager and decorator usage.
+        Supports both context manager and decorator usage. The timed region is also
+        recorded as a `tracing.tracer` span, so it shows up nested in the traces and
+        metrics of the enclosing request. CUDA-synchronized timings are only logged
+        when `HY3DGEN_DEBUG=1`.
 
         Example as context manager:
         ```python
@@ -59,6 +64,7 @@ class synchronize_timer:
 
     def __enter__(self):
         """Context manager entry: start timing."""
+        self.span = tracer.span(self.name or 'synchronize_timer').__enter__()
         if os.environ.get('HY3DGEN_DEBUG', '0') == '1':
             self.start = torch.cuda.Event(enable_timing=True)
             self.end = torch.cuda.Event(enable_timing=True)
@@ -73,13 +79,15 @@ class synchronize_timer:
             self.time = self.start.elapsed_time(self.end)
             if self.name is not None:
                 logger.info(f'{self.name} takes {self.time} ms')
+        self.span.__exit__(exc_type, exc_value, exc_tb)
 
     def __call__(self, func):
         """Decorator: wrap the function to time its execution."""
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            with self:
+            # A fresh timer per call: the decorated function may run on several threads at once.
+            with synchronize_timer(self.name):
                 result = func(*args, **kwargs)
             return result
 
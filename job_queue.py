@@ -0,0 +1,339 @@
+"""
+Asynchronous job queue with a persistent status store for Hunyuan3D API server.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from hy3dshape.utils import logger
+
+
+class JobStatus:
+    """
+    Job states and the transitions allowed between them.
+    """
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    ERROR = "error"
+
+    FINISHED = (COMPLETED, ERROR)
+
+    TRANSITIONS = {
+        PENDING: (PROCESSING, ERROR),
+        PROCESSING: (COMPLETED, ERROR),
+        COMPLETED: (),
+        ERROR: (),
+    }
+
+
+class InvalidTransitionError(RuntimeError):
+    pass
+
+
+class JobStore:
+    """
+    SQLite-backed store holding the state, parameters and result of every job.
+
+    The store is shared between the queue worker thread(s) and the request
+    handlers, so all access goes through a single connection guarded by a lock.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            uid TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            params TEXT,
+            result TEXT,
+            artifacts TEXT,
+            message TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the job database.
+
+        Args:
+            db_path (str): Path to the SQLite file, or ':memory:'
+        """
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if db_path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self._SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "artifacts" not in columns:
+                # Databases created before artifacts were published
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN artifacts TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def create(self, uid, params, priority=0):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (uid, status, priority, params, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (uid, JobStatus.PENDING, priority, json.dumps(params), now, now),
+            )
+
+    def transition(self, uid, status, result=None, message=None):
+        """
+        Move a job to a new state.
+
+        Args:
+            uid (str): Job identifier
+            status (str): Target state, one of JobStatus
+            result (dict): Result payload to store (optional)
+            message (str): Error or progress message (optional)
+
+        Raises:
+            KeyError: If the job does not exist
+            InvalidTransitionError: If the transition is not allowed
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE uid = ?", (uid,)).fetchone()
+            if row is None:
+                raise KeyError(uid)
+            if status not in JobStatus.TRANSITIONS[row["status"]]:
+                raise InvalidTransitionError(f"Job {uid}: {row['status']} -> {status} is not allowed")
+            # Parameters embed the input image; they are not needed once the job has finished.
+            clear_params = status in JobStatus.FINISHED
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = COALESCE(?, result), message = COALESCE(?, message), "
+                "params = CASE WHEN ? THEN NULL ELSE params END, updated_at = ? WHERE uid = ?",
+                (status, None if result is None else json.dumps(result), message, clear_params, time.time(), uid),
+            )
+
+    def set_artifact(self, uid, name, artifact):
+        """
+        Record an intermediate artifact of a job, in any state.
+
+        Args:
+            uid (str): Job identifier
+            name (str): Artifact name; a later artifact with the same name replaces it
+            artifact (dict): JSON-serialisable artifact description (e.g. its download URL)
+
+        Raises:
+            KeyError: If the job does not exist
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT artifacts FROM jobs WHERE uid = ?", (uid,)).fetchone()
+            if row is None:
+                raise KeyError(uid)
+            artifacts = json.loads(row["artifacts"]) if row["artifacts"] else {}
+            artifacts[name] = artifact
+            self._conn.execute(
+                "UPDATE jobs SET artifacts = ?, updated_at = ? WHERE uid = ?",
+                (json.dumps(artifacts), time.time(), uid),
+            )
+
+    def get(self, uid):
+        """
+        Get a job record.
+
+        Returns:
+            dict: Job record without its parameters, or None if unknown
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uid, status, priority, result, artifacts, message, created_at, updated_at "
+                "FROM jobs WHERE uid = ?",
+                (uid,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["artifacts"] = json.loads(job["artifacts"]) if job["artifacts"] else {}
+        return job
+
+    def get_params(self, uid):
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM jobs WHERE uid = ?", (uid,)).fetchone()
+        return json.loads(row["params"]) if row is not None and row["params"] else None
+
+    def list_uids(self, status):
+        """Return uids in the given state, highest priority and oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT uid, priority FROM jobs WHERE status = ? ORDER BY priority DESC, created_at ASC",
+                (status,),
+            ).fetchall()
+        return [(row["uid"], row["priority"]) for row in rows]
+
+    def count(self, status):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    Priority job queue executing jobs on background worker threads.
+
+    Jobs are executed by `handler(uid, params) -> dict`; the returned dict is
+    stored as the job result. Any exception moves the job to the error state.
+    """
+
+    def __init__(self, handler, store, num_workers=1):
+        """
+        Args:
+            handler (callable): Function called as handler(uid, params) for each job
+            store (JobStore): Persistent status store
+            num_workers (int): Number of worker threads
+        """
+        self.handler = handler
+        self.store = store
+        self.num_workers = num_workers
+        self._queue = queue.PriorityQueue()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+        self._done = {}
+        self._done_lock = threading.Lock()
+        self._threads = []
+        self._stopping = False
+        self._recover()
+
+    def _recover(self):
+        """Re-queue pending jobs and fail jobs interrupted by a restart."""
+        for uid, _ in self.store.list_uids(JobStatus.PROCESSING):
+            self.store.transition(uid, JobStatus.ERROR, message="Job interrupted by worker restart")
+        for uid, priority in self.store.list_uids(JobStatus.PENDING):
+            self._put(uid, priority)
+
+    def _put(self, uid, priority):
+        with self._counter_lock:
+            self._counter += 1
+            seq = self._counter
+        with self._done_lock:
+            self._done.setdefault(uid, threading.Event())
+        # PriorityQueue pops the smallest item first; higher priority must come first.
+        self._queue.put((-priority, seq, uid))
+
+    def start(self):
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        for _ in self._threads:
+            self._queue.put((float('inf'), 0, None))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, params, uid=None, priority=0):
+        """
+        Add a job to the queue.
+
+        Args:
+            params (dict): Generation parameters passed to the handler
+            uid (str): Job identifier, generated if None
+            priority (int): Larger values run first
+
+        Returns:
+            str: Job identifier
+        """
+        uid = str(uid or uuid.uuid4())
+        self.store.create(uid, params, priority)
+        self._put(uid, priority)
+        logger.info(f"Job {uid} enqueued (priority={priority}, queue_length={self.queue_length()})")
+        return uid
+
+    def status(self, uid):
+        """
+        Get the current state of a job.
+
+        Returns:
+            dict: Job record, or None if the job is unknown
+        """
+        return self.store.get(str(uid))
+
+    def result(self, uid, timeout=None):
+        """
+        Block until a job finishes and return its record.
+
+        Args:
+            uid (str): Job identifier
+            timeout (float): Seconds to wait, forever if None
+
+        Returns:
+            dict: Job record; its status tells whether the job completed
+
+        Raises:
+            KeyError: If the job is unknown
+            TimeoutError: If the job did not finish in time
+        """
+        uid = str(uid)
+        job = self.store.get(uid)
+        if job is None:
+            raise KeyError(uid)
+        if job["status"] in JobStatus.FINISHED:
+            return job
+        with self._done_lock:
+            event = self._done.setdefault(uid, threading.Event())
+        # The job may have finished (and its event been popped) since it was read above
+        job = self.store.get(uid)
+        if job["status"] in JobStatus.FINISHED:
+            with self._done_lock:
+                if self._done.get(uid) is event:
+                    del self._done[uid]
+            return job
+        if not event.wait(timeout):
+            raise TimeoutError(f"Job {uid} did not finish within {timeout} seconds")
+        return self.store.get(uid)
+
+    def queue_length(self):
+        """Number of jobs waiting or running."""
+        return self.store.count(JobStatus.PENDING) + self.store.count(JobStatus.PROCESSING)
+
+    def _run(self):
+        while not self._stopping:
+            _, _, uid = self._queue.get()
+            if uid is None:
+                break
+            try:
+                self._execute(uid)
+            finally:
+                with self._done_lock:
+                    event = self._done.pop(uid, None)
+                if event is not None:
+                    event.set()
+
+    def _execute(self, uid):
+        params = self.store.get_params(uid)
+        try:
+            self.store.transition(uid, JobStatus.PROCESSING)
+        except (KeyError, InvalidTransitionError) as e:
+            logger.warning(f"Skipping job {uid}: {e}")
+            return
+        start_time = time.time()
+        try:
+            result = self.handler(uid, params)
+        except Exception as e:
+            logger.error(f"Job {uid} failed: {e}")
+            traceback.print_exc()
+            self.store.transition(uid, JobStatus.ERROR, message=str(e))
+            return
+        self.store.transition(uid, JobStatus.COMPLETED, result=result or {})
+        logger.info(f"Job {uid} completed in {time.time() - start_time:.2f} seconds")
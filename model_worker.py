@@ -6,6 +6,7 @@ import time
 import uuid
 import base64
 import trimesh
+from concurrent.futures import Future
 from io import BytesIO
 from PIL import Image
 import torch
@@ -23,9 +24,11 @@ except ImportError:
 except Exception as e:
     print(f"Warning: Failed to apply torchvision fix: {e}")
 
-from hy3dshape import Hunyuan3DDiTFlowMatchingPipeline
+from hy3dshape import Hunyuan3DDiTFlowMatchingPipeline, ShapeBatcher
 from hy3dshape.rembg import BackgroundRemover
-from hy3dshape.utils import logger
+from hy3dshape.utils import logger, tracer
+from stage_scheduler import Stage, StageScheduler
+from warm_start import WarmStartCache, pipeline_checkpoint_paths
 # Import texture pipeline - using relative import from root
 import os
 import sys
@@ -37,34 +40,6 @@ except ImportError:
     # Try from hy3dpaint directory if root import fails
     sys.path.insert(0, os.path.join(os.getcwd(), 'hy3dpaint'))
     from textureGenPipeline import Hunyuan3DPaintPipeline, Hunyuan3DPaintConfig
-# Import GLB conversion utilities - path already set above
-
-try:
-    from hy3dpaint.convert_utils import create_glb_with_pbr_materials
-    HAS_GLB_UTILS = True
-except ImportError:
-    print("Warning: GLB conversion utils not found, using basic trimesh export")
-    HAS_GLB_UTILS = False
-
-
-def quick_convert_with_obj2gltf(obj_path: str, glb_path: str):
-    """Convert OBJ to GLB with PBR materials if possible"""
-    if HAS_GLB_UTILS:
-        try:
-            textures = {
-                'albedo': obj_path.replace('.obj', '.jpg'),
-                'metallic': obj_path.replace('.obj', '_metallic.jpg'),
-                'roughness': obj_path.replace('.obj', '_roughness.jpg')
-            }
-            create_glb_with_pbr_materials(obj_path, textures, glb_path)
-            return
-        except Exception as e:
-            print(f"Warning: PBR GLB conversion failed: {e}, using basic conversion")
-    
-    # Fallback to basic trimesh conversion
-    import trimesh
-    mesh = trimesh.load(obj_path)
-    mesh.export(glb_path)
 
 
 def load_image_from_base64(image):
@@ -102,7 +77,8 @@ class ModelWorker:
                  low_vram_mode=False,
                  worker_id=None,
                  model_semaphore=None,
-                 save_dir='gradio_cache'):
+                 save_dir='gradio_cache',
+                 warm_start_dir=None):
         """
         Initialize the model worker.
         
@@ -114,6 +90,8 @@ class ModelWorker:
             worker_id (str): Unique identifier for this worker
             model_semaphore: Semaphore for controlling model concurrency
             save_dir (str): Directory to save generated files
+            warm_start_dir (str): Directory of the warm_start.WarmStartCache to restore the
+                pipelines from, or to populate on a cold start (optional)
         """
         self.model_path = model_path
         self.worker_id = worker_id or str(uuid.uuid4())[:6]
@@ -121,16 +99,21 @@ class ModelWorker:
         self.low_vram_mode = low_vram_mode
         self.model_semaphore = model_semaphore
         self.save_dir = save_dir
+        # Set by the API server when jobs are dispatched through job_queue.JobQueue
+        self.job_queue = None
+        # Set by start_scheduler to pipeline requests across generation stages
+        self.scheduler = None
+        # Set by enable_batching to sample concurrent requests as one DiT batch
+        self.batcher = None
+        # Set by the API server to upload intermediate outputs while later stages run
+        self.artifact_publisher = None
         
         logger.info(f"Loading the model {model_path} on worker {self.worker_id} ...")
 
         # Initialize background remover
         self.rembg = BackgroundRemover()
         
-        # Initialize shape generation pipeline (matching demo.py)
-        self.pipeline = Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(model_path)
-        
-        # Initialize texture generation pipeline (exactly like demo.py)
+        # Initialize texture generation pipeline config (exactly like demo.py)
         max_num_view = 6  # can be 6 to 9
         resolution = 512  # can be 768 or 512
         conf = Hunyuan3DPaintConfig(max_num_view, resolution)
@@ -138,7 +121,29 @@ class ModelWorker:
         conf.realesrgan_ckpt_path = "hy3dpaint/ckpt/RealESRGAN_x4plus.pth"
         conf.multiview_cfg_path = "hy3dpaint/cfgs/hunyuan-paint-pbr.yaml"
         conf.custom_pipeline = "hy3dpaint/hunyuanpaintpbr"
-        self.paint_pipeline = Hunyuan3DPaintPipeline(conf)
+
+        warm_start = None
+        if warm_start_dir:
+            warm_start = WarmStartCache(warm_start_dir, checkpoint_paths=pipeline_checkpoint_paths(model_path, conf),
+                                        model_path=model_path, paint_config=vars(conf))
+        restored = False
+        if warm_start is not None and warm_start.is_valid():
+            try:
+                self.pipeline = warm_start.load_shape_pipeline(device=device)
+                self.paint_pipeline = warm_start.load_paint_pipeline(conf)
+                restored = True
+                logger.info(f"Restored models from {warm_start_dir} in {sum(warm_start.load_times.values()):.2f} seconds")
+            except Exception as e:
+                logger.warning(f"Failed to restore models from {warm_start_dir}: {e}, loading from scratch")
+        if not restored:
+            self._load_pipelines(model_path, conf)
+            if warm_start is not None:
+                try:
+                    warm_start.save_shape_pipeline(self.pipeline)
+                    warm_start.save_paint_pipeline(self.paint_pipeline)
+                except Exception as e:
+                    logger.warning(f"Failed to populate warm start cache {warm_start_dir}: {e}")
+
         # clean cache in save_dir (create directory if not exists)
         os.makedirs(self.save_dir, exist_ok=True)
         if os.path.exists(self.save_dir):
@@ -147,6 +152,13 @@ class ModelWorker:
                 if os.path.isfile(file_path):
                     os.remove(file_path)
             
+    def _load_pipelines(self, model_path, conf):
+        """Build the shape and texture pipelines from the model checkpoints."""
+        # Initialize shape generation pipeline (matching demo.py)
+        self.pipeline = Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(model_path)
+        # Initialize texture generation pipeline (exactly like demo.py)
+        self.paint_pipeline = Hunyuan3DPaintPipeline(conf)
+
     def get_queue_length(self):
         """
         Get the current queue length for model processing.
@@ -154,6 +166,8 @@ class ModelWorker:
         Returns:
             int: Number of tasks in the queue
         """
+        if self.job_queue is not None:
+            return self.job_queue.queue_length()
         if self.model_semaphore is None:
             return 0
         else:
@@ -167,12 +181,63 @@ class ModelWorker:
         Returns:
             dict: Status information including speed and queue length
         """
-        return {
+        status = {
             "speed": 1,
             "queue_length": self.get_queue_length(),
         }
+        if self.scheduler is not None:
+            status["stages"] = self.scheduler.stats()
+        return status
+
+    def build_stages(self, maxsize=1):
+        """
+        Build the ordered generation stages used by generate and the stage scheduler.
+
+        Args:
+            maxsize (int): Capacity of each stage input queue
+
+        Returns:
+            list: stage_scheduler.Stage instances
+        """
+        # With batching, the shape stage only submits to the batcher and decode waits for the latents:
+        # both queues must hold a full batch, or batches never grow past the few requests in between.
+        batch_maxsize = max(maxsize, self.batcher.max_batch_size) if self.batcher is not None else maxsize
+        return [
+            Stage('preprocess', self._stage_preprocess, maxsize),
+            Stage('shape', self._stage_shape, batch_maxsize),
+            Stage('decode', self._stage_decode, batch_maxsize),
+            Stage('postprocess', self._stage_postprocess, maxsize),
+            Stage('texture', self._stage_texture, maxsize),
+            Stage('export', self._stage_export, maxsize),
+        ]
+
+    def start_scheduler(self, maxsize=1):
+        """
+        Start the stage scheduler so that consecutive requests overlap across stages.
+
+        Returns:
+            StageScheduler: The running scheduler
+        """
+        self.scheduler = StageScheduler(self.build_stages(maxsize)).start()
+        return self.scheduler
+
+    def enable_batching(self, max_batch_size=4, max_wait=0.05):
+        """
+        Collect shape requests arriving within max_wait seconds into one DiT sampling batch.
+
+        Only useful with the stage scheduler, which keeps several requests in flight; call it
+        before start_scheduler so that the stage queues are sized for a full batch.
+
+        Args:
+            max_batch_size (int): Maximum number of requests sampled together
+            max_wait (float): Batching window in seconds
+
+        Returns:
+            ShapeBatcher: The running batcher
+        """
+        self.batcher = ShapeBatcher(self.pipeline, max_batch_size=max_batch_size, max_wait=max_wait).start()
+        return self.batcher
 
-    @torch.inference_mode()
     def generate(self, uid, params):
         """
         Generate a 3D model from the given parameters.
@@ -184,8 +249,21 @@ class ModelWorker:
         Returns:
             tuple: (file_path, uid) - Path to generated file and task ID
         """
-        start_time = time.time()
+        ctx = {'uid': uid, 'params': params, 'start_time': time.time()}
         logger.info(f"Generating 3D model for uid: {uid}")
+        with tracer.span('generate', uid=uid):
+            if self.scheduler is not None:
+                # Stages run on the scheduler threads; their spans share the uid but not this parent.
+                ctx = self.scheduler.run(uid, ctx)
+            else:
+                for stage in self.build_stages():
+                    ctx = stage.run(ctx)
+        logger.info("---Total generation takes %s seconds ---" % (time.time() - ctx['start_time']))
+        return ctx['final_save_path'], uid
+
+    @torch.inference_mode()
+    def _stage_preprocess(self, ctx):
+        params = ctx['params']
         # Handle input image
         if 'image' in params:
             image = params["image"]
@@ -195,96 +273,153 @@ class ModelWorker:
 
         # Remove background if needed (do this before RGBA conversion)
         if params.get('remove_background', True):
-            image = self.rembg(image)
+            with tracer.span('rembg'):
+                image = self.rembg(image)
         
         # Convert to RGBA after background removal
-        image = image.convert("RGBA")
+        ctx['image'] = image.convert("RGBA")
+        return ctx
 
+    @torch.inference_mode()
+    def _stage_shape(self, ctx):
+        params = ctx['params']
         # Extract generation parameters with type enforcement
         seed = int(params.get('seed', 1234))
-        octree_resolution = int(params.get('octree_resolution', 256))
         num_inference_steps = int(params.get('num_inference_steps', 5))
         guidance_scale = float(params.get('guidance_scale', 5.0))
-        face_count = int(params.get('face_count', 40000))
         
-        # Set random seed (seed is now guaranteed to be int)
-        if seed is not None:
-            import random
-            import numpy as np
-            torch.manual_seed(seed)
-            torch.cuda.manual_seed_all(seed)
-            np.random.seed(seed)
-            random.seed(seed)
-
-        # Generate mesh with parameters
+        if self.batcher is not None and self.scheduler is not None:
+            # Without the scheduler only one request is in flight, so it always samples alone.
+            # Per-request generators keep results independent of batch composition;
+            # the decode stage waits on the future.
+            ctx['latents'] = self.batcher.submit(
+                ctx['image'],
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                seed=seed,
+            )
+            return ctx
+
+        # A per-request generator instead of the global RNGs, which the other stage
+        # threads consume concurrently, so the same seed gives the same mesh
+        generator = torch.Generator(device=self.pipeline.device).manual_seed(seed)
+
+        # Sample latents only; decoding runs in its own stage so marching cubes
+        # for this request can overlap diffusion for the next one.
         try:
-            result = self.pipeline(
-                image=image,
+            ctx['latents'] = self.pipeline(
+                image=ctx['image'],
                 num_inference_steps=num_inference_steps,
                 guidance_scale=guidance_scale,
-                octree_resolution=octree_resolution
+                generator=generator,
+                output_type='latent'
+            )
+        except Exception as e:
+            logger.error(f"Shape generation failed: {e}")
+            raise ValueError(f"Failed to generate 3D mesh: {str(e)}")
+        return ctx
+
+    @torch.inference_mode()
+    def _stage_decode(self, ctx):
+        octree_resolution = int(ctx['params'].get('octree_resolution', 256))
+        try:
+            latents = ctx.pop('latents')
+            if isinstance(latents, Future):
+                latents = latents.result()
+            # Same export arguments as Hunyuan3DDiTFlowMatchingPipeline.__call__ defaults
+            result = self.pipeline._export(
+                latents,
+                output_type='trimesh',
+                box_v=1.01,
+                mc_level=0.0,
+                num_chunks=8000,
+                octree_resolution=octree_resolution,
+                mc_algo=None,
             )
             
             # FIXED: Match original demo.py - simple [0] extraction like demo
             # Original: mesh = pipeline_shapegen(image=image)[0]
-            mesh = result[0]
+            ctx['mesh'] = result[0]
                 
-            logger.info("---Shape generation takes %s seconds ---" % (time.time() - start_time))
+            logger.info("---Shape generation takes %s seconds ---" % (time.time() - ctx['start_time']))
         except Exception as e:
             logger.error(f"Shape generation failed: {e}")
             raise ValueError(f"Failed to generate 3D mesh: {str(e)}")
-        
+        return ctx
+
+    def _stage_postprocess(self, ctx):
+        mesh = ctx.pop('mesh')
+        face_count = int(ctx['params'].get('face_count', 40000))
         # Apply face reduction if needed (ensure mesh has faces attribute)
         if face_count and hasattr(mesh, 'faces') and len(mesh.faces) > face_count:
             logger.info(f"Reducing faces from {len(mesh.faces)} to {face_count}")
             # Use trimesh built-in simplification
             try:
-                mesh = mesh.simplify_quadratic_decimation(face_count)
+                with tracer.span('simplify', faces=len(mesh.faces), target_faces=face_count):
+                    mesh = mesh.simplify_quadratic_decimation(face_count)
             except Exception as e:
                 logger.warning(f"Face reduction failed: {e}, keeping original mesh")
 
         # Export initial mesh
-        initial_save_path = os.path.join(self.save_dir, f'{str(uid)}_initial.glb')
-        mesh.export(initial_save_path)
-        
+        initial_save_path = os.path.join(self.save_dir, f'{str(ctx["uid"])}_initial.glb')
+        with tracer.span('export_initial'):
+            mesh.export(initial_save_path)
+        ctx['initial_save_path'] = initial_save_path
+        # The untextured mesh doubles as a preview while texturing runs
+        self._publish_artifact(ctx, 'initial_mesh', initial_save_path)
+        return ctx
+
+    def _publish_artifact(self, ctx, name, path):
+        """Upload an intermediate output in the background, if an artifact publisher is set."""
+        if self.artifact_publisher is None:
+            return
+        try:
+            # Read now: the file is renamed or removed by later stages
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.artifact_publisher.publish(ctx['uid'], name, data, local_path=path)
+        except Exception as e:
+            logger.warning(f"Failed to publish {name} for {ctx['uid']}: {e}")
+
+    @torch.inference_mode()
+    def _stage_texture(self, ctx):
+        uid = ctx['uid']
         # Check if texture generation is requested (default False to match api_models.py)
-        generate_texture = bool(params.get('texture', False))
-        
-        if generate_texture:
-            # Generate textured mesh as obj (as in demo)
-            try:
-                output_mesh_path_obj = os.path.join(self.save_dir, f'{str(uid)}_texturing.obj')
-                textured_path_obj = self.paint_pipeline(
-                    mesh_path=initial_save_path,
-                    image_path=image,
-                    output_mesh_path=output_mesh_path_obj,
-                    save_glb=False            
-                )
-                logger.info("---Texture generation takes %s seconds ---" % (time.time() - start_time))
-                logger.info(f"output_mesh_path: {output_mesh_path_obj} textured_path: {textured_path_obj}")
-
-                # Convert textured OBJ to GLB using obj2gltf with PBR support
-                print("convert textured OBJ to GLB")
-                glb_path_textured = os.path.join(self.save_dir, f'{str(uid)}_texturing.glb')
-                quick_convert_with_obj2gltf(textured_path_obj, glb_path_textured)
-                # now rename glb_path to uid_textured.glb
-                print("done.")
-                final_save_path = os.path.join(self.save_dir, f'{str(uid)}_textured.glb')
-                os.rename(glb_path_textured, final_save_path)
-                print(f"final_save_path: {final_save_path}")
-                
-            except Exception as e:
-                logger.error(f"Texture generation failed: {e}")
-                # Fall back to untextured mesh if texture generation fails
-                final_save_path = initial_save_path
-                logger.warning(f"Using untextured mesh as fallback: {final_save_path}")
-        else:
-            # Use untextured mesh
-            final_save_path = initial_save_path
+        if not bool(ctx['params'].get('texture', False)):
             logger.info("Texture generation skipped by request")
+            return ctx
+
+        # Generate the textured PBR GLB straight from the renderer, without the OBJ round trip
+        try:
+            output_mesh_path_glb = os.path.join(self.save_dir, f'{str(uid)}_texturing.glb')
+            textured_path_glb = self.paint_pipeline(
+                mesh_path=ctx['initial_save_path'],
+                image_path=ctx['image'],
+                output_mesh_path=output_mesh_path_glb,
+                save_glb=False
+            )
+            logger.info("---Texture generation takes %s seconds ---" % (time.time() - ctx['start_time']))
+            logger.info(f"output_mesh_path: {output_mesh_path_glb} textured_path: {textured_path_glb}")
+            ctx['textured_path_glb'] = textured_path_glb
+        except Exception as e:
+            logger.error(f"Texture generation failed: {e}")
+        return ctx
+
+    def _stage_export(self, ctx):
+        uid = ctx['uid']
+        final_save_path = ctx['initial_save_path']
+        if 'textured_path_glb' in ctx:
+            final_save_path = os.path.join(self.save_dir, f'{str(uid)}_textured.glb')
+            os.replace(ctx['textured_path_glb'], final_save_path)
+            self._publish_artifact(ctx, 'textured_mesh', final_save_path)
+            print(f"final_save_path: {final_save_path}")
+
+        if final_save_path == ctx['initial_save_path'] and bool(ctx['params'].get('texture', False)):
+            # Fall back to untextured mesh if texture generation fails
+            logger.warning(f"Using untextured mesh as fallback: {final_save_path}")
 
         if self.low_vram_mode:
             torch.cuda.empty_cache()
-            
-        logger.info("---Total generation takes %s seconds ---" % (time.time() - start_time))
-        return final_save_path, uid 
\ No newline at end of file
+
+        ctx['final_save_path'] = final_save_path
+        return ctx
@@ -0,0 +1,203 @@
+"""
+Concurrent multipart upload engine for S3-compatible object stores (Cloudflare R2).
+
+The payload can be bytes, a file path, a binary file object or a producer
+yielding byte chunks of any size. It is cut into parts of `part_size` bytes
+that are uploaded by `max_concurrency` threads; each part is retried on its own
+with exponential backoff, so a transient error costs one part instead of the
+whole upload. At most `max_concurrency` parts are buffered at a time, which
+bounds memory for streaming producers. Payloads that fit in a single part are
+sent with one put_object call.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from hy3dshape.utils import logger
+
+MIN_PART_SIZE = 5 * 2 ** 20
+MAX_PARTS = 10000
+
+
+class UploadError(RuntimeError):
+    pass
+
+
+def iter_parts(source, part_size):
+    """
+    Cut a payload into parts of part_size bytes (the last one may be shorter).
+
+    Args:
+        source: bytes-like object, file path, binary file object or iterable of byte chunks
+        part_size (int): Part size in bytes
+
+    Yields:
+        bytes or memoryview: Consecutive parts; bytes-like sources are sliced without copying
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast('B')
+        for start in range(0, len(view), part_size):
+            yield view[start:start + part_size]
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_parts(f, part_size)
+        return
+    if hasattr(source, 'read'):
+        while True:
+            part = source.read(part_size)
+            if not part:
+                return
+            yield part
+
+    # Producer yielding chunks of arbitrary size: regroup them into parts
+    buffer = bytearray()
+    for chunk in source:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class MultipartUploader:
+    """
+    Uploads payloads with concurrent, individually retried multipart parts.
+
+    The boto3 client is shared by the upload threads (clients are thread-safe);
+    give it `Config(max_pool_connections=max_concurrency)` or more so that the
+    threads do not wait for a connection.
+
+    Example:
+        ```python
+        uploader = MultipartUploader(s3, 'hunyuan3d', part_size=16 * 2 ** 20, max_concurrency=8)
+        stats = uploader.upload(glb_bytes, 'model.glb', content_type='model/gltf-binary')
+        print(stats['throughput_mb_s'])
+        ```
+    """
+
+    def __init__(self, client, bucket, part_size=8 * 2 ** 20, max_concurrency=8, max_retries=3, retry_backoff=0.5):
+        """
+        Args:
+            client: boto3 S3 client
+            bucket (str): Target bucket
+            part_size (int): Bytes per part, at least 5 MiB (the S3 minimum for all but the last part)
+            max_concurrency (int): Parts uploaded in parallel
+            max_retries (int): Retries per part after the first attempt
+            retry_backoff (float): Delay before the first retry in seconds, doubled on each retry
+        """
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes, got {part_size}")
+        self.client = client
+        self.bucket = bucket
+        self.part_size = int(part_size)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+
+    def _with_retries(self, description, fn, stats):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise UploadError(f"{description} failed after {attempt + 1} attempts: {e}") from e
+                with self._lock:
+                    stats['retries'] += 1
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"{description} failed ({e}), retrying in {delay:.1f} seconds")
+                time.sleep(delay)
+
+    def _upload_part(self, key, upload_id, part_number, data, stats):
+        response = self._with_retries(
+            f"Upload of part {part_number} of {key}",
+            lambda: self.client.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=bytes(data)
+            ),
+            stats,
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def upload(self, source, key, content_type=None):
+        """
+        Upload a payload to `key`.
+
+        Args:
+            source: bytes-like object, file path, binary file object or iterable of byte chunks
+            key (str): Object key
+            content_type (str): Optional Content-Type of the object
+
+        Returns:
+            dict: bytes, parts, retries, seconds and throughput_mb_s of the upload
+        """
+        extra_args = {'ContentType': content_type} if content_type else {}
+        stats = {'bytes': 0, 'parts': 0, 'retries': 0}
+        start = time.perf_counter()
+
+        parts = iter_parts(source, self.part_size)
+        first = next(parts, b'')
+        second = next(parts, None)
+        if second is None:
+            # Small payload: a single request, no multipart bookkeeping
+            self._with_retries(
+                f"Upload of {key}",
+                lambda: self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(first), **extra_args),
+                stats,
+            )
+            stats['bytes'], stats['parts'] = len(first), 1
+            return self._finish(key, stats, start)
+
+        upload_id = self._with_retries(
+            f"Creation of the multipart upload of {key}",
+            lambda: self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra_args),
+            stats,
+        )['UploadId']
+        completed = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='upload') as executor:
+                pending = set()
+                for part_number, data in enumerate(self._chain(first, second, parts), start=1):
+                    if part_number > MAX_PARTS:
+                        raise UploadError(f"{key} needs more than {MAX_PARTS} parts, increase part_size")
+                    # Keep at most max_concurrency parts in memory
+                    if len(pending) >= self.max_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        completed.extend(future.result() for future in done)
+                    stats['bytes'] += len(data)
+                    pending.add(executor.submit(self._upload_part, key, upload_id, part_number, data, stats))
+                completed.extend(future.result() for future in pending)
+            stats['parts'] = len(completed)
+            self._with_retries(
+                f"Completion of the multipart upload of {key}",
+                lambda: self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': sorted(completed, key=lambda part: part['PartNumber'])},
+                ),
+                stats,
+            )
+        except BaseException:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"Failed to abort the multipart upload of {key}: {e}")
+            raise
+        return self._finish(key, stats, start)
+
+    @staticmethod
+    def _chain(first, second, parts):
+        yield first
+        yield second
+        yield from parts
+
+    @staticmethod
+    def _finish(key, stats, start):
+        stats['seconds'] = time.perf_counter() - start
+        stats['throughput_mb_s'] = stats['bytes'] / 2 ** 20 / max(stats['seconds'], 1e-9)
+        logger.info(f"Uploaded {key}: {stats['bytes'] / 2 ** 20:.1f} MB in {stats['parts']} parts, "
+                    f"{stats['seconds']:.2f} seconds ({stats['throughput_mb_s']:.1f} MB/s, {stats['retries']} retries)")
+        return stats
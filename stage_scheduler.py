@@ -0,0 +1,133 @@
+"""
+Stage-level pipelining scheduler for Hunyuan3D generation requests.
+
+Each stage owns a bounded input queue and a single worker thread, so one
+request can be in the GPU-heavy shape diffusion stage while the previous one
+is in the CPU-heavy marching cubes, UV unwrapping or baking stages.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from hy3dshape.utils import logger, tracer
+
+
+class Stage:
+    """
+    A single pipeline stage.
+
+    Args:
+        name (str): Stage name used in logs and stats
+        fn (callable): Function called as fn(ctx) -> ctx on the stage worker thread
+        maxsize (int): Capacity of the stage input queue; producers block when it is full
+    """
+
+    def __init__(self, name, fn, maxsize=1):
+        self.name = name
+        self.fn = fn
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.busy = False
+        self.processed = 0
+        self.total_time = 0.0
+
+    def run(self, ctx):
+        """Call the stage function inside a tracing span named after the stage."""
+        with tracer.span(f"stage.{self.name}", uid=ctx.get('uid')):
+            return self.fn(ctx)
+
+
+class StageScheduler:
+    """
+    Runs requests through an ordered list of stages, one worker thread per stage.
+
+    Example:
+        ```python
+        scheduler = StageScheduler([Stage('shape', shape_fn), Stage('texture', texture_fn)]).start()
+        ctx = scheduler.submit(uid, {'params': params}).result()
+        ```
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._threads = []
+
+    def start(self):
+        for index, stage in enumerate(self.stages):
+            thread = threading.Thread(
+                target=self._run, args=(index,), name=f"stage-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        # The sentinel flows through every stage in order, so in-flight requests finish first.
+        self.stages[0].queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, uid, ctx):
+        """
+        Submit a request to the first stage.
+
+        Args:
+            uid: Request identifier, stored in ctx['uid']
+            ctx (dict): Request context passed from stage to stage
+
+        Returns:
+            concurrent.futures.Future: Resolves to the context returned by the last stage
+        """
+        future = Future()
+        ctx['uid'] = uid
+        self.stages[0].queue.put((ctx, future))
+        return future
+
+    def run(self, uid, ctx, timeout=None):
+        """Submit a request and block until it leaves the last stage."""
+        return self.submit(uid, ctx).result(timeout)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per-stage queue depth, busy flag, processed count and mean latency in seconds
+        """
+        return {
+            stage.name: {
+                "queued": stage.queue.qsize(),
+                "busy": stage.busy,
+                "processed": stage.processed,
+                "mean_time": stage.total_time / stage.processed if stage.processed else 0.0,
+            }
+            for stage in self.stages
+        }
+
+    def _run(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is None:
+                if next_stage is not None:
+                    next_stage.queue.put(None)
+                break
+            ctx, future = item
+            if future.cancelled():
+                continue
+            stage.busy = True
+            start_time = time.time()
+            try:
+                ctx = stage.run(ctx)
+            except BaseException as e:
+                logger.error(f"Stage {stage.name} failed for {ctx.get('uid')}: {e}")
+                future.set_exception(e)
+                continue
+            finally:
+                stage.busy = False
+                stage.processed += 1
+                stage.total_time += time.time() - start_time
+            if next_stage is None:
+                future.set_result(ctx)
+            else:
+                # Blocks when the next stage is saturated, which throttles this one.
+                next_stage.queue.put((ctx, future))
@@ -14,7 +14,6 @@
 
 import os
 import torch
-import copy
 import trimesh
 import numpy as np
 from PIL import Image
@@ -26,7 +25,7 @@ from utils.multiview_utils import multiviewDiffusionNet
 from utils.pipeline_utils import ViewProcessor
 from utils.image_super_utils import imageSuperNet
 from utils.uvwrap_utils import mesh_uv_wrap
-from DifferentiableRenderer.mesh_utils import convert_obj_to_glb
+from hy3dshape.utils import tracer
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -45,6 +44,7 @@ class Hunyuan3DPaintConfig:
         self.multiview_pretrained_path = "tencent/Hunyuan3D-2.1"
         self.dino_ckpt_path = "facebook/dinov2-giant"
         self.realesrgan_ckpt_path = "ckpt/RealESRGAN_x4plus.pth"
+        self.super_resolution_batch_size = 12
 
         self.raster_mode = "cr"
         self.bake_mode = "back_sample"
@@ -54,6 +54,8 @@ class Hunyuan3DPaintConfig:
         self.resolution = resolution
         self.bake_exp = 4
         self.merge_method = "fast"
+        # "xatlas" or "charts" (chart-level fallback with a looser atlas, see utils.uvwrap_utils.chart_parametrize)
+        self.uv_unwrap_method = "xatlas"
 
         # view selection
         self.candidate_camera_azims = [0, 90, 180, 270, 0, 180]
@@ -72,7 +74,7 @@ class Hunyuan3DPaintConfig:
 
 class Hunyuan3DPaintPipeline:
 
-    def __init__(self, config=None) -> None:
+    def __init__(self, config=None, models=None) -> None:
         self.config = config if config is not None else Hunyuan3DPaintConfig()
         self.models = {}
         self.stats_logs = {}
@@ -83,7 +85,11 @@ class Hunyuan3DPaintPipeline:
             raster_mode=self.config.raster_mode,
         )
         self.view_processor = ViewProcessor(self.config, self.render)
-        self.load_models()
+        if models is None:
+            self.load_models()
+        else:
+            # Already constructed models, e.g. restored by warm_start.WarmStartCache
+            self.models.update(models)
 
     def load_models(self):
         torch.cuda.empty_cache()
@@ -92,8 +98,14 @@ class Hunyuan3DPaintPipeline:
         print("Models Loaded.")
 
     @torch.no_grad()
+    @tracer.traced("paint")
     def __call__(self, mesh_path=None, image_path=None, output_mesh_path=None, use_remesh=True, save_glb=True):
-        """Generate texture for 3D mesh using multiview diffusion"""
+        """Generate texture for 3D mesh using multiview diffusion
+
+        An output_mesh_path ending in .glb is exported directly as a PBR GLB from the
+        in-memory mesh and textures, without writing the OBJ, MTL and JPG files.
+        Otherwise the OBJ is saved, plus a GLB next to it when save_glb is set.
+        """
         # Handle different image input types consistently
         if isinstance(image_path, str):
             # File path string
@@ -111,35 +123,39 @@ class Hunyuan3DPaintPipeline:
         if not isinstance(image_prompt, list):
             image_prompt = [image_prompt]
 
-        # Process mesh
+        # Process mesh; the remeshed mesh is handed over in memory
         path = os.path.dirname(mesh_path)
         if use_remesh:
-            processed_mesh_path = os.path.join(path, "white_mesh_remesh.obj")
-            remesh_mesh(mesh_path, processed_mesh_path)
+            with tracer.span("paint.remesh"):
+                mesh = remesh_mesh(mesh_path)
         else:
-            processed_mesh_path = mesh_path
+            mesh = trimesh.load(mesh_path)
 
         # Output path
         if output_mesh_path is None:
             output_mesh_path = os.path.join(path, f"textured_mesh.obj")
 
-        # Load mesh
-        mesh = trimesh.load(processed_mesh_path)
-        mesh = mesh_uv_wrap(mesh)
-        self.render.load_mesh(mesh=mesh)
+        with tracer.span("paint.uv_wrap") as span:
+            mesh = mesh_uv_wrap(mesh, method=self.config.uv_unwrap_method, texture_size=self.config.texture_size)
+            # A loaded GLB is a Scene until mesh_uv_wrap concatenates it
+            span.set(faces=len(mesh.faces))
+        with tracer.span("paint.load_mesh"):
+            self.render.load_mesh(mesh=mesh)
 
         ########### View Selection #########
-        selected_camera_elevs, selected_camera_azims, selected_view_weights = self.view_processor.bake_view_selection(
-            self.config.candidate_camera_elevs,
-            self.config.candidate_camera_azims,
-            self.config.candidate_view_weights,
-            self.config.max_selected_view_num,
-        )
+        with tracer.span("paint.view_selection"):
+            selected_camera_elevs, selected_camera_azims, selected_view_weights = self.view_processor.bake_view_selection(
+                self.config.candidate_camera_elevs,
+                self.config.candidate_camera_azims,
+                self.config.candidate_view_weights,
+                self.config.max_selected_view_num,
+            )
 
-        normal_maps = self.view_processor.render_normal_multiview(
-            selected_camera_elevs, selected_camera_azims, use_abs_coor=True
-        )
-        position_maps = self.view_processor.render_position_multiview(selected_camera_elevs, selected_camera_azims)
+        with tracer.span("paint.render_maps", views=len(selected_camera_elevs)):
+            normal_maps = self.view_processor.render_normal_multiview(
+                selected_camera_elevs, selected_camera_azims, use_abs_coor=True
+            )
+            position_maps = self.view_processor.render_position_multiview(selected_camera_elevs, selected_camera_azims)
 
         ##########  Style  ###########
         image_caption = "high quality"
@@ -154,21 +170,22 @@ class Hunyuan3DPaintPipeline:
         image_style = [image.convert("RGB") for image in image_style]
 
         ###########  Multiview  ##########
-        multiviews_pbr = self.models["multiview_model"](
-            image_style,
-            normal_maps + position_maps,
-            prompt=image_caption,
-            custom_view_size=self.config.resolution,
-            resize_input=True,
-        )
+        with tracer.span("paint.multiview"):
+            multiviews_pbr = self.models["multiview_model"](
+                image_style,
+                normal_maps + position_maps,
+                prompt=image_caption,
+                custom_view_size=self.config.resolution,
+                resize_input=True,
+            )
         ###########  Enhance  ##########
         enhance_images = {}
-        enhance_images["albedo"] = copy.deepcopy(multiviews_pbr["albedo"])
-        enhance_images["mr"] = copy.deepcopy(multiviews_pbr["mr"])
-
-        for i in range(len(enhance_images["albedo"])):
-            enhance_images["albedo"][i] = self.models["super_model"](enhance_images["albedo"][i])
-            enhance_images["mr"][i] = self.models["super_model"](enhance_images["mr"][i])
+        with tracer.span("paint.super_resolution"):
+            # Albedo and MR views go through the upscaler together, in as few batches as possible
+            num_views = len(multiviews_pbr["albedo"])
+            enhanced = self.models["super_model"].enhance_batch(multiviews_pbr["albedo"] + multiviews_pbr["mr"])
+            enhance_images["albedo"] = enhanced[:num_views]
+            enhance_images["mr"] = enhanced[num_views:]
 
         ###########  Bake  ##########
         for i in range(len(enhance_images)):
@@ -176,26 +193,34 @@ class Hunyuan3DPaintPipeline:
                 (self.config.render_size, self.config.render_size)
             )
             enhance_images["mr"][i] = enhance_images["mr"][i].resize((self.config.render_size, self.config.render_size))
-        texture, mask = self.view_processor.bake_from_multiview(
-            enhance_images["albedo"], selected_camera_elevs, selected_camera_azims, selected_view_weights
-        )
-        mask_np = (mask.squeeze(-1).cpu().numpy() * 255).astype(np.uint8)
-        texture_mr, mask_mr = self.view_processor.bake_from_multiview(
-            enhance_images["mr"], selected_camera_elevs, selected_camera_azims, selected_view_weights
-        )
-        mask_mr_np = (mask_mr.squeeze(-1).cpu().numpy() * 255).astype(np.uint8)
+        with tracer.span("paint.bake"):
+            texture, mask = self.view_processor.bake_from_multiview(
+                enhance_images["albedo"], selected_camera_elevs, selected_camera_azims, selected_view_weights
+            )
+            mask_np = (mask.squeeze(-1).cpu().numpy() * 255).astype(np.uint8)
+            texture_mr, mask_mr = self.view_processor.bake_from_multiview(
+                enhance_images["mr"], selected_camera_elevs, selected_camera_azims, selected_view_weights
+            )
+            mask_mr_np = (mask_mr.squeeze(-1).cpu().numpy() * 255).astype(np.uint8)
 
         ##########  inpaint  ###########
-        texture = self.view_processor.texture_inpaint(texture, mask_np)
-        self.render.set_texture(texture, force_set=True)
-        if "mr" in enhance_images:
-            texture_mr = self.view_processor.texture_inpaint(texture_mr, mask_mr_np)
-            self.render.set_texture_mr(texture_mr)
+        with tracer.span("paint.inpaint"):
+            texture = self.view_processor.texture_inpaint(texture, mask_np)
+            self.render.set_texture(texture, force_set=True)
+            if "mr" in enhance_images:
+                texture_mr = self.view_processor.texture_inpaint(texture_mr, mask_mr_np)
+                self.render.set_texture_mr(texture_mr)
+
+        if output_mesh_path.lower().endswith(".glb"):
+            with tracer.span("paint.save_glb"):
+                self.render.save_glb(output_mesh_path, downsample=True)
+            return output_mesh_path
 
-        self.render.save_mesh(output_mesh_path, downsample=True)
+        with tracer.span("paint.save_mesh"):
+            self.render.save_mesh(output_mesh_path, downsample=True)
 
         if save_glb:
-            convert_obj_to_glb(output_mesh_path, output_mesh_path.replace(".obj", ".glb"))
-            output_glb_path = output_mesh_path.replace(".obj", ".glb")
+            with tracer.span("paint.glb"):
+                self.render.save_glb(os.path.splitext(output_mesh_path)[0] + ".glb", downsample=True)
 
         return output_mesh_path
@@ -0,0 +1,260 @@
+"""
+Persistent warm-start cache for ModelWorker initialisation.
+
+Building the shape and paint pipelines means resolving Hub snapshots, parsing
+checkpoints, randomly initialising every module and then overwriting it with
+the loaded weights. The cache stores the fully-constructed components once, as
+torch zip archives (one file per component), and restores them with
+torch.load(mmap=True): tensor storages are mapped straight from the archive
+instead of being read and copied, so a warm start only pays for the page-ins
+(and the host-to-device copy when the components live on the GPU).
+
+The archives are full pickles restored with torch.load(weights_only=False), which
+can execute arbitrary code: only point the cache at a directory that no one but
+the server can write to.
+"""
+import hashlib
+import json
+import os
+import time
+
+import torch
+
+from hy3dshape.utils import logger
+
+CACHE_FORMAT_VERSION = 1
+
+SHAPE_COMPONENTS = ('vae', 'model', 'conditioner', 'image_processor', 'scheduler')
+PAINT_COMPONENTS = ('super_model', 'multiview_model')
+
+
+def checkpoint_fingerprint(paths):
+    """
+    Identify the checkpoint files the cached models were built from.
+
+    Hugging Face snapshots are directories of symlinks into content-addressed blobs, so
+    the resolved path of every file changes with the snapshot revision; size and
+    modification time cover checkpoints replaced in place.
+
+    Args:
+        paths (iterable): Checkpoint files or directories; missing ones are recorded as such
+
+    Returns:
+        dict: path -> [resolved path, size, mtime in ns] for every file, or None for a missing path
+    """
+    fingerprint = {}
+    for path in paths:
+        path = os.path.abspath(os.path.expanduser(path))
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path, followlinks=True)
+                for name in names
+            )
+        elif os.path.exists(path):
+            files = [path]
+        else:
+            fingerprint[path] = None
+            continue
+        for file in files:
+            stat = os.stat(file)
+            fingerprint[file] = [os.path.realpath(file), stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def hf_cache_path(repo_id):
+    """Directory of a model repository in the local Hugging Face Hub cache."""
+    from huggingface_hub.constants import HF_HUB_CACHE
+
+    return os.path.join(HF_HUB_CACHE, "models--" + repo_id.replace("/", "--"))
+
+
+def pipeline_checkpoint_paths(model_path, paint_config):
+    """
+    Checkpoint locations of the shape and paint pipelines built by ModelWorker.
+
+    Args:
+        model_path (str): Shape model repository, as passed to from_pretrained
+        paint_config (Hunyuan3DPaintConfig): Paint configuration
+
+    Returns:
+        list: Paths for WarmStartCache(checkpoint_paths=...)
+    """
+    return [
+        # smart_load_model downloads the shape checkpoints here
+        os.path.join(os.environ.get('HY3DGEN_MODELS', '~/.cache/hy3dgen'), model_path),
+        hf_cache_path(paint_config.multiview_pretrained_path),
+        hf_cache_path(paint_config.dino_ckpt_path),
+        paint_config.realesrgan_ckpt_path,
+    ]
+
+
+def _register_custom_pipeline():
+    """
+    Import the paint diffusion pipeline class that diffusers loads as a dynamic module,
+    so pickled instances of it can be resolved when the cache is loaded.
+    """
+    from diffusers.utils.dynamic_modules_utils import get_class_from_dynamic_module
+    from utils import multiview_utils
+
+    custom_pipeline = os.path.join(os.path.dirname(multiview_utils.__file__), "..", "hunyuanpaintpbr")
+    get_class_from_dynamic_module(custom_pipeline, module_file="pipeline.py")
+
+
+def _synchronize():
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+class WarmStartCache:
+    """
+    On-disk cache of the constructed Hunyuan3DDiTFlowMatchingPipeline and
+    Hunyuan3DPaintPipeline components.
+
+    The cache is only used when its manifest matches the key built from the
+    format version, the torch version, the given key parameters and the
+    fingerprint of the checkpoint files, so changing the model path or the paint
+    configuration, or updating a snapshot, rebuilds it.
+
+    The components are unpickled in full when loaded: the cache directory must be
+    trusted (see the module docstring).
+
+    Example:
+        ```python
+        cache = WarmStartCache('/cache/hy3dgen', checkpoint_paths=['~/.cache/hy3dgen/tencent/Hunyuan3D-2.1'],
+                               model_path='tencent/Hunyuan3D-2.1')
+        if cache.is_valid():
+            pipeline = cache.load_shape_pipeline(device='cuda')
+        else:
+            pipeline = Hunyuan3DDiTFlowMatchingPipeline.from_pretrained('tencent/Hunyuan3D-2.1')
+            cache.save_shape_pipeline(pipeline)
+        ```
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, cache_dir, checkpoint_paths=(), **key_params):
+        """
+        Args:
+            cache_dir (str): Directory holding the manifest and component archives
+            checkpoint_paths (iterable): Checkpoint files or directories the models are loaded from
+            **key_params: JSON-serialisable values identifying the cached models
+        """
+        self.cache_dir = cache_dir
+        self.checkpoint_paths = list(checkpoint_paths)
+        self.key_params = dict(key_params, format_version=CACHE_FORMAT_VERSION, torch_version=torch.__version__)
+        # Seconds spent restoring each component during the last load, keyed by component name
+        self.load_times = {}
+
+    @property
+    def key(self):
+        # Recomputed on every use: a cold start may download the checkpoints between the check and the save
+        key = dict(self.key_params, checkpoints=checkpoint_fingerprint(self.checkpoint_paths))
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.pt")
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, components):
+        key = self.key
+        manifest = self._read_manifest() or {}
+        if manifest.get("key") != key:
+            manifest = {"key": key, "components": {}}
+        manifest["components"].update(components)
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def is_valid(self, names=SHAPE_COMPONENTS + ('shape_kwargs',) + PAINT_COMPONENTS):
+        """Whether every named component is cached for the current key."""
+        manifest = self._read_manifest()
+        if manifest is None or manifest.get("key") != self.key:
+            return False
+        return all(
+            name in manifest["components"] and os.path.exists(self._path(name))
+            for name in names
+        )
+
+    def _save(self, objects):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        components = {}
+        for name, obj in objects.items():
+            path = self._path(name)
+            start_time = time.time()
+            # Write next to the target and rename, so a crash never leaves a truncated archive behind.
+            torch.save(obj, path + ".tmp")
+            os.replace(path + ".tmp", path)
+            components[name] = {"bytes": os.path.getsize(path)}
+            logger.info(f"Cached {name} ({components[name]['bytes'] / 2 ** 20:.1f} MB) "
+                        f"in {time.time() - start_time:.2f} seconds")
+        self._write_manifest(components)
+
+    def _load(self, name):
+        start_time = time.perf_counter()
+        # Storages are restored to the device they were saved from; mmap avoids reading them into memory first.
+        obj = torch.load(self._path(name), mmap=True, weights_only=False)
+        _synchronize()
+        self.load_times[name] = time.perf_counter() - start_time
+        logger.info(f"Restored {name} in {self.load_times[name]:.2f} seconds")
+        return obj
+
+    def save_shape_pipeline(self, pipeline):
+        """
+        Cache the components of a constructed shape pipeline.
+
+        Args:
+            pipeline (Hunyuan3DDiTFlowMatchingPipeline): Pipeline to cache
+        """
+        objects = {name: getattr(pipeline, name) for name in SHAPE_COMPONENTS}
+        objects["shape_kwargs"] = pipeline.kwargs
+        self._save(objects)
+
+    def load_shape_pipeline(self, device='cuda', dtype=torch.float16):
+        """
+        Restore a shape pipeline from the cache.
+
+        Args:
+            device (str): Device to move the pipeline to
+            dtype (torch.dtype): Pipeline dtype
+
+        Returns:
+            Hunyuan3DDiTFlowMatchingPipeline: Restored pipeline
+        """
+        from hy3dshape import Hunyuan3DDiTFlowMatchingPipeline
+
+        components = {name: self._load(name) for name in SHAPE_COMPONENTS}
+        kwargs = self._load("shape_kwargs")
+        return Hunyuan3DDiTFlowMatchingPipeline(**components, device=device, dtype=dtype, **kwargs)
+
+    def save_paint_pipeline(self, pipeline):
+        """
+        Cache the models of a constructed paint pipeline.
+
+        Args:
+            pipeline (Hunyuan3DPaintPipeline): Pipeline to cache
+        """
+        self._save({name: pipeline.models[name] for name in PAINT_COMPONENTS})
+
+    def load_paint_pipeline(self, config):
+        """
+        Restore a paint pipeline from the cache.
+
+        Args:
+            config (Hunyuan3DPaintConfig): Paint configuration; the renderer is rebuilt from it
+
+        Returns:
+            Hunyuan3DPaintPipeline: Restored pipeline
+        """
+        from textureGenPipeline import Hunyuan3DPaintPipeline
+
+        _register_custom_pipeline()
+        models = {name: self._load(name) for name in PAINT_COMPONENTS}
+        return Hunyuan3DPaintPipeline(config, models=models)